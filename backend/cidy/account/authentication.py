@@ -0,0 +1,237 @@
+"""
+JWT authentication resolving the user and his profile from a per-worker cache.
+
+The access tokens carry the profile_type claim ('teacher', 'student' or
+'parent'), so the authentication loads the user with his profile in a single
+query, then serves them from memory for AUTH_USER_CACHE_TTL seconds : most
+requests don't query the database to authenticate, and request.user.teacher
+(.student, .parent) is already loaded. The cache keeps the
+AUTH_USER_CACHE_MAX_SIZE most recently used users, the others are evicted.
+
+The cache holds the field values (not the instances, which the views may
+modify) and the saves and deletes of the users and profiles invalidate their
+entry. Another worker can serve a stale user for at most AUTH_USER_CACHE_TTL
+seconds, hence the short default.
+
+The async views (common/async_views.py) authenticate with aauthenticate(),
+which only leaves the event loop to load a user missing from the cache.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from parent.models import Parent
+from student.models import Student
+from teacher.models import Teacher
+from .models import User
+
+PROFILE_MODELS = {
+    'teacher': Teacher,
+    'student': Student,
+    'parent': Parent,
+}
+
+_lock = threading.Lock()
+# user id -> entry, from the least to the most recently used
+_cache = OrderedDict()
+
+
+def _cache_ttl():
+    return getattr(settings, 'AUTH_USER_CACHE_TTL', 30)
+
+
+def _cache_max_size():
+    return getattr(settings, 'AUTH_USER_CACHE_MAX_SIZE', 10000)
+
+
+def get_profile(user):
+    """Return (profile_type, profile) of the user with a single query (profile is None for a user without profile)."""
+    for profile_type in PROFILE_MODELS:
+        if profile_type in user._state.fields_cache and user._state.fields_cache[profile_type] is not None:
+            return profile_type, user._state.fields_cache[profile_type]
+
+    user_with_profiles = User.objects.select_related(*PROFILE_MODELS).get(pk=user.pk)
+    for profile_type in PROFILE_MODELS:
+        profile = getattr(user_with_profiles, profile_type, None)
+        if profile is not None:
+            _attach_profile(user, profile_type, profile)
+            return profile_type, profile
+    return None, None
+
+
+def _attach_profile(user, profile_type, profile):
+    """Cache the profile on the user (and the absence of the other profiles) so that accessing them doesn't query."""
+    for other_profile_type in PROFILE_MODELS:
+        user._state.fields_cache[other_profile_type] = None
+    user._state.fields_cache[profile_type] = profile
+    profile._state.fields_cache['user'] = user
+
+
+def get_access_token(user):
+    """Return the access token of the user with his profile_type claim."""
+    token = AccessToken.for_user(user)
+    add_profile_claims(token, user)
+    return token
+
+
+def add_profile_claims(token, user):
+    profile_type, profile = get_profile(user)
+    if profile is not None:
+        token['profile_type'] = profile_type
+    return token
+
+
+def _snapshot(instance):
+    return tuple(getattr(instance, field.attname) for field in instance._meta.concrete_fields)
+
+
+def _restore(model, values):
+    return model.from_db('default', [field.attname for field in model._meta.concrete_fields], values)
+
+
+def _load_entry(user_id, profile_type):
+    """Load the user with his profile, as the values stored in the cache."""
+    queryset = User.objects.all()
+    if profile_type in PROFILE_MODELS:
+        queryset = queryset.select_related(profile_type)
+    else:
+        queryset = queryset.select_related(*PROFILE_MODELS)
+    user = queryset.get(pk=user_id)
+
+    for candidate_type in ([profile_type] if profile_type in PROFILE_MODELS else PROFILE_MODELS):
+        profile = getattr(user, candidate_type, None)
+        if profile is not None:
+            return _snapshot(user), candidate_type, _snapshot(profile)
+    return _snapshot(user), None, None
+
+
+def _get_entry(user_id):
+    with _lock:
+        entry = _cache.get(user_id)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del _cache[user_id]
+            return None
+        _cache.move_to_end(user_id)
+        return entry
+
+
+def _store_entry(user_id, loaded_entry):
+    entry = (time.monotonic() + _cache_ttl(), *loaded_entry)
+    with _lock:
+        _cache[user_id] = entry
+        _cache.move_to_end(user_id)
+        # evict the least recently used users
+        while len(_cache) > _cache_max_size():
+            _cache.popitem(last=False)
+    return entry
+
+
+def _build_user(entry):
+    _expires_at, user_values, profile_type, profile_values = entry
+    user = _restore(User, user_values)
+    if profile_type is not None:
+        _attach_profile(user, profile_type, _restore(PROFILE_MODELS[profile_type], profile_values))
+    return user
+
+
+def get_cached_user(user_id, profile_type=None):
+    """Return a fresh User instance (with his profile attached) from the cache, loading it if needed."""
+    # the user id claim is a string in the tokens
+    user_id = str(user_id)
+    entry = _get_entry(user_id)
+    if entry is None:
+        entry = _store_entry(user_id, _load_entry(user_id, profile_type))
+    return _build_user(entry)
+
+
+async def aget_cached_user(user_id, profile_type=None):
+    """Async version of get_cached_user()."""
+    user_id = str(user_id)
+    entry = _get_entry(user_id)
+    if entry is None:
+        entry = _store_entry(user_id, await sync_to_async(_load_entry)(user_id, profile_type))
+    return _build_user(entry)
+
+
+def invalidate_cached_user(user_id):
+    with _lock:
+        _cache.pop(str(user_id), None)
+
+
+def clear_user_cache():
+    with _lock:
+        _cache.clear()
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication serving the users (and their profile) from the per-worker cache."""
+
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+
+        try:
+            user = get_cached_user(validated_token[api_settings.USER_ID_CLAIM], validated_token.get('profile_type'))
+        except User.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        return self.check_user(user, validated_token)
+
+    async def aget_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            return await sync_to_async(super().get_user)(validated_token)
+
+        try:
+            user = await aget_cached_user(validated_token[api_settings.USER_ID_CLAIM], validated_token.get('profile_type'))
+        except User.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        return self.check_user(user, validated_token)
+
+    async def aauthenticate(self, request):
+        """Async version of authenticate() (the token validation doesn't query the database)."""
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    def check_user(self, user, validated_token):
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
+
+
+@receiver([post_save, post_delete], sender=User)
+def user_changed(sender, instance, **kwargs):
+    invalidate_cached_user(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Teacher)
+@receiver([post_save, post_delete], sender=Student)
+@receiver([post_save, post_delete], sender=Parent)
+def profile_changed(sender, instance, **kwargs):
+    if instance.user_id is not None:
+        invalidate_cached_user(instance.user_id)
@@ -5,6 +5,9 @@ from teacher.models import Teacher
 from parent.models import Parent 
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from teacher.models import Level 
+from common.reference_data import get_reference_data
+from common.thumbnails import thumbnail_url
+from .authentication import add_profile_claims, get_profile
 
 
 
@@ -92,6 +95,14 @@ class UserRegistrationSerializer(serializers.Serializer):
             raise serializers.ValidationError("A user with this email already exists.")
         return value
     
+    def validate_level_id(self, value):
+        """
+        Check that the level exists.
+        """
+        if get_reference_data().get_level_by_id(value) is None:
+            raise serializers.ValidationError("Please select a valid level.")
+        return value
+
     def validate_phone_number(self, value):
         """
         Validate phone number format and uniqueness.
@@ -124,7 +135,7 @@ class UserRegistrationSerializer(serializers.Serializer):
             print("create a student")
             level = validated_data.get('level_id')
             if level : 
-                level = Level.objects.get(id=level)
+                level = get_reference_data().get_level_by_id(level)
             Student.objects.create(
                 user=user,
                 fullname=fullname,
@@ -149,25 +160,23 @@ class UserRegistrationSerializer(serializers.Serializer):
 
 
 class MyAccessTokenSerializer(TokenObtainPairSerializer):
-    
+
+    @classmethod
+    def get_token(cls, user):
+        # embed the profile_type claim used by CachedJWTAuthentication
+        return add_profile_claims(super().get_token(user), user)
+
     def validate(self, attrs):
-        print("validate")
-        print(attrs)
         data = super().validate(attrs)
-        print(f"data : {data}")
-        if hasattr(self.user, 'student'):
-            profile_type = 'student'
-        elif hasattr(self.user, 'teacher'):
-            profile_type = 'teacher'
-        else:
-            profile_type = 'parent'
+        # the profile was loaded (in a single query) by get_token()
+        profile_type, profile = get_profile(self.user)
 
         # Only return access token
-        profile = getattr(self.user, profile_type)
         user_data = {
             'email' : self.user.email,
             'fullname': profile.fullname,
             'image_url': profile.image.url,
+            'thumbnail_url': thumbnail_url(profile.image, 'medium'),
             'profile_type': profile_type
         }
         return {'access': data['access'],'user': user_data}
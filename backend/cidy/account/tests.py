@@ -1,3 +1,69 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
 
-# Create your tests here.
+from account.authentication import _cache, clear_user_cache, get_access_token, get_cached_user
+from account.models import User
+from teacher.models import Teacher
+
+
+class CachedJWTAuthenticationTestCase(TestCase):
+    def setUp(self):
+        clear_user_cache()
+        self.user = User.objects.create_user('teacher@test.com', '11111111', 'testpass123')
+        self.teacher = Teacher.objects.create(user=self.user, fullname='Teacher')
+        self.client = APIClient()
+
+    def tearDown(self):
+        clear_user_cache()
+
+    def test_token_has_the_profile_claims(self):
+        response = self.client.post('/api/auth/token/', {'email': 'teacher@test.com', 'password': 'testpass123'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['user']['profile_type'], 'teacher')
+        token = AccessToken(response.data['access'])
+        self.assertEqual(token['profile_type'], 'teacher')
+        self.assertNotIn('profile_id', token)
+
+    def test_user_and_profile_are_served_from_the_cache(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_access_token(self.user)}')
+
+        # the first request loads the user with his profile in one query
+        response = self.client.get('/api/teacher/account/info/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['teacher_account_data']['fullname'], 'Teacher')
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/teacher/account/info/')
+        self.assertEqual(response.data['teacher_account_data']['fullname'], 'Teacher')
+
+    def test_saving_the_profile_invalidates_the_cache(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_access_token(self.user)}')
+        self.client.get('/api/teacher/account/info/')
+
+        self.teacher.fullname = 'Renamed Teacher'
+        self.teacher.save()
+
+        response = self.client.get('/api/teacher/account/info/')
+        self.assertEqual(response.data['teacher_account_data']['fullname'], 'Renamed Teacher')
+
+    def test_inactive_user_is_rejected(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_access_token(self.user)}')
+        self.user.active = False
+        self.user.save()
+
+        response = self.client.get('/api/teacher/account/info/')
+        self.assertEqual(response.status_code, 401)
+
+    @override_settings(AUTH_USER_CACHE_MAX_SIZE=2)
+    def test_least_recently_used_users_are_evicted(self):
+        users = [self.user] + [User.objects.create_user(f'user{i}@test.com', f'2222222{i}', 'testpass123') for i in range(2)]
+        get_cached_user(users[0].id)
+        get_cached_user(users[1].id)
+        # served from the cache, the first user becomes the most recently used
+        with self.assertNumQueries(0):
+            get_cached_user(users[0].id)
+        get_cached_user(users[2].id)
+
+        self.assertEqual(list(_cache), [str(users[0].id), str(users[2].id)])
@@ -3,8 +3,9 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework_simplejwt.views import TokenObtainPairView
 from .serializers import UserRegistrationSerializer
-from rest_framework_simplejwt.tokens import AccessToken
-from teacher.models import Level
+from .authentication import get_access_token, get_profile
+from common.reference_data import get_reference_data
+from common.thumbnails import thumbnail_url
 from .serializers import LevelsSerializer, MyAccessTokenSerializer
 import time
 
@@ -31,16 +32,8 @@ def register_user(request):
         user = serializer.save()
         
         # Generate JWT tokens for the user
-        token = AccessToken.for_user(user)
-
-        if hasattr(user, 'student'):
-            profile_type = 'student'
-        elif hasattr(user, 'teacher'):
-            profile_type = 'teacher'
-        else:
-            profile_type = 'parent'
-
-        profile = getattr(user, profile_type)
+        token = get_access_token(user)
+        profile_type, profile = get_profile(user)
 
         # Return success response with user data (excluding password)
         return Response({
@@ -50,6 +43,7 @@ def register_user(request):
                 'email' : user.email,
                 'fullname': profile.fullname,
                 'image_url': profile.image.url,
+                'thumbnail_url': thumbnail_url(profile.image, 'medium'),
                 'profile_type': profile_type
             }
         }, status=status.HTTP_200_OK)
@@ -61,7 +55,7 @@ def register_user(request):
 
 @api_view(['GET'])
 def get_levels(request):
-    levels = Level.objects.all()
+    levels = get_reference_data().levels
     serializer = LevelsSerializer(levels, many=True)
     return Response(serializer.data, status=status.HTTP_200_OK)
 
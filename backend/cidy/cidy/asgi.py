@@ -3,6 +3,22 @@ ASGI config for cidy project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Served by ASGI, the hot read endpoints (the notifications polling, the week
+schedule, the sons and the subjects lists) use their async variants (see
+common/async_views.py), so a worker keeps serving many idle polling mobile
+clients instead of one request per thread :
+
+    gunicorn cidy.asgi:application -k uvicorn.workers.UvicornWorker --workers 4
+    uvicorn cidy.asgi:application --workers 4   # without gunicorn
+
+The project middlewares (the static files, the replica pinning and the
+idempotency keys) are async capable too, so a request only leaves the event
+loop for the sync views and the queries.
+
+The async ORM runs the queries in threads that don't outlive the requests,
+so run it with DB_CONN_MAX_AGE=0 and the connection pool (DB_POOL_MAX_SIZE)
+instead of the persistent connections.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -12,5 +28,6 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cidy.settings')
+os.environ.setdefault('ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 from pathlib import Path
 import os
 from datetime import timedelta
+from corsheaders.defaults import default_headers
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -55,6 +56,7 @@ AUTH_USER_MODEL = 'account.User'
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'common.files.StaticFilesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -62,10 +64,13 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'common.routers.ReplicaPinningMiddleware',
+    'common.idempotency.IdempotencyMiddleware',
 ]
 
 ROOT_URLCONF = 'cidy.urls'
 CORS_ORIGIN_ALLOW_ALL = True
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -87,23 +92,22 @@ WSGI_APPLICATION = 'cidy.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': 'cidy_db',
-        'USER': 'cidy_user',
-        'PASSWORD': 'cidy_password',
-        'HOST': 'localhost',
-        'PORT': '3300',
-    }
-}
-
-
 import dj_database_url
 
+# keep the connections open between the requests of a worker (in seconds, 0 to close them after each request)
+DB_CONN_MAX_AGE = int(os.environ.get("DB_CONN_MAX_AGE", 600))
+# with DB_POOL_MAX_SIZE > 0 the workers borrow their connections from a psycopg pool instead
+# (psycopg 3 and psycopg-pool, see requirements.txt)
+DB_POOL_MIN_SIZE = int(os.environ.get("DB_POOL_MIN_SIZE", 2))
+DB_POOL_MAX_SIZE = int(os.environ.get("DB_POOL_MAX_SIZE", 0))
+# how long (in seconds) a request waits for a connection of the pool
+DB_POOL_TIMEOUT = int(os.environ.get("DB_POOL_TIMEOUT", 10))
+
 if os.environ.get("RENDER"):  # Render sets this env var automatically
     DATABASES = {
-        'default': dj_database_url.config(default=os.environ["DATABASE_URL"])
+        'default': dj_database_url.config(
+            default=os.environ["DATABASE_URL"], conn_max_age=DB_CONN_MAX_AGE, conn_health_checks=True
+        )
     }
 else:
     DATABASES = {
@@ -114,6 +118,55 @@ else:
             'PASSWORD': 'cidy_password',
             'HOST': 'localhost',
             'PORT': '3300',
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+        }
+    }
+
+if DB_POOL_MAX_SIZE:
+    # a pooled connection is returned to the pool at the end of each request
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default'].setdefault('OPTIONS', {})['pool'] = {
+        'min_size': DB_POOL_MIN_SIZE,
+        'max_size': DB_POOL_MAX_SIZE,
+        'timeout': DB_POOL_TIMEOUT,
+    }
+
+# the read-only endpoints (@read_from_replica, common/routers.py) read from this replica when it's set
+# e.g. DATABASE_REPLICA_URL=postgres://... (or sqlite:////path/to/replica.sqlite3 to try it locally)
+REPLICA_DATABASE = None
+if os.environ.get("DATABASE_REPLICA_URL"):
+    REPLICA_DATABASE = 'replica'
+    DATABASES[REPLICA_DATABASE] = dj_database_url.config(
+        env="DATABASE_REPLICA_URL", conn_max_age=DB_CONN_MAX_AGE, conn_health_checks=True
+    )
+    # the tests run on the test database of the primary
+    DATABASES[REPLICA_DATABASE]['TEST'] = {'MIRROR': 'default'}
+# how long (in seconds) the reads of a user stay on the primary after he has written
+REPLICA_STICKY_SECONDS = 10
+
+DATABASE_ROUTERS = ['common.routers.ReplicaRouter']
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+# the version of the reference data (common/reference_data.py), the versions of the week schedules (teacher/schedule.py)
+# and the replica pins of the users (common/routers.py) must be seen by every worker : a deployment running more than
+# one process requires a shared cache, e.g. REDIS_URL=redis://localhost:6379/0 (checked by manage.py check --deploy).
+# Without it (development) each process keeps its own in-memory cache.
+REDIS_URL = os.environ.get("REDIS_URL")
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         }
     }
 
@@ -158,6 +211,22 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR,'media')
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    # content hashed names and precompressed copies, served by common.files.StaticFilesMiddleware
+    "staticfiles": {"BACKEND": "common.files.CompressedManifestStaticFilesStorage"},
+}
+# how long (in seconds) the clients cache the static files collected without a hash in their name
+STATIC_MAX_AGE = 60
+
+# who sends the bytes of the media files (common/files.py) : 'django' (development), 'x-accel-redirect' (nginx)
+# or 'x-sendfile' (Apache, lighttpd)
+MEDIA_SERVING = os.environ.get("MEDIA_SERVING", "django")
+# the internal nginx location aliasing MEDIA_ROOT
+MEDIA_ACCEL_REDIRECT_LOCATION = os.environ.get("MEDIA_ACCEL_REDIRECT_LOCATION", "/protected-media/")
+# how long (in seconds) the clients cache the media files not named after their content (the default pictures)
+MEDIA_MAX_AGE = 3600
+
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -165,6 +234,59 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 
+# Reference data (levels and subjects) registry
+# bump the version when the seed of setup_db.py changes to make every worker reload it
+REFERENCE_DATA_VERSION = 1
+# how often (in seconds) a worker checks the shared version of the reference data
+REFERENCE_DATA_CHECK_INTERVAL = 60
+
+
+# Background jobs (run by the run_jobs management command)
+# number of rows deleted per transaction by the purges
+JOBS_PURGE_CHUNK_SIZE = 1000
+# a failed job is retried until it has been run this many times
+JOBS_MAX_ATTEMPTS = 3
+# a job running for longer than this (in seconds) is considered abandoned by its worker and requeued
+JOBS_STALE_AFTER = 3600
+# how long (in days) the read notifications are kept per role, None keeps them (common/retention.py, purge_notifications command)
+NOTIFICATION_RETENTION_DAYS = {'teacher': 90, 'student': 60, 'parent': 60}
+
+
+# Name search (common/search.py)
+# match the names with similar words (pg_trgm) on PostgreSQL to tolerate typos
+SEARCH_FUZZY = True
+
+# how long (in seconds) a worker serves an authenticated user and his profile from memory (account/authentication.py)
+AUTH_USER_CACHE_TTL = 30
+# how many users a worker keeps in that cache, the least recently used are evicted
+AUTH_USER_CACHE_MAX_SIZE = 10000
+
+# the square thumbnails (width in pixels) generated for the profile pictures (common/thumbnails.py)
+THUMBNAIL_SIZES = {'small': 96, 'medium': 256}
+# WEBP, or JPEG for clients without WebP support
+THUMBNAIL_FORMAT = 'WEBP'
+
+# how long (in seconds) the week schedule of a teacher stays cached (teacher/schedule.py), the saves of his groups drop it
+# in every worker through the shared cache (REDIS_URL)
+SCHEDULE_CACHE_TIMEOUT = 24 * 3600
+
+# the maximum number of rows of a CSV file of students imported at once (teacher/imports.py)
+STUDENTS_IMPORT_MAX_ROWS = 5000
+
+# the month the school year starts in : the archive_classes command archives the settled classes of the previous years (teacher/archive.py)
+SCHOOL_YEAR_START_MONTH = 9
+
+# the mutating requests sent with an Idempotency-Key header to these paths are replayed to their retries (common/idempotency.py)
+IDEMPOTENCY_PATH_PREFIXES = ('/api/teacher/',)
+# how long (in seconds) the response of a request is kept for its retries
+IDEMPOTENCY_KEY_TTL = 24 * 3600
+# after how long (in seconds) a request still in progress is considered dead and its key freed
+IDEMPOTENCY_LOCK_TIMEOUT = 60
+
+# serve the async variants of the hot read endpoints (common/async_views.py), set by the ASGI entry point cidy/asgi.py
+ASYNC_VIEWS = os.environ.get("ASYNC_VIEWS") == "1"
+
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME' : timedelta(days=14),
     'REFRESH_TOKEN_LIFETIME' : timedelta(0),
@@ -190,6 +312,16 @@ SIMPLE_JWT = {
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'account.authentication.CachedJWTAuthentication',
+    ),
+    # orjson backed (with a fallback on the json module), see common/renderers.py
+    'DEFAULT_RENDERER_CLASSES': (
+        'common.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'common.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ),
 }
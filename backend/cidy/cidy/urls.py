@@ -14,14 +14,17 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+import re
+
 from django.contrib import admin
-from django.urls import path,include
+from django.urls import path,include,re_path
 from account import urls as account_urls
 from student import urls as student_urls
 from teacher import urls as teacher_urls
 from parent import urls as parent_urls
+from common.views import get_worker_metrics
+from common.files import serve_media
 from django.conf import settings
-from django.conf.urls.static import static
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -29,8 +32,10 @@ urlpatterns = [
     path('api/student/', include(student_urls)),
     path('api/teacher/', include(teacher_urls)),
     path('api/parent/', include(parent_urls)),
+    path('api/metrics/', get_worker_metrics, name='worker_metrics'),
+]
+# the media files, sent by the web server in production (common/files.py), the static files are
+# served by the StaticFilesMiddleware (and by runserver in development)
+urlpatterns += [
+    re_path(r'^%s(?P<path>.*)$' % re.escape(settings.MEDIA_URL.lstrip('/')), serve_media, name='media'),
 ]
-#if settings.DEBUG:
-urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
-urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
-
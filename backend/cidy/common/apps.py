@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class CommonConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'common'
+
+    def ready(self):
+        # register the signal receivers that keep the reference data registry fresh
+        from . import reference_data  # noqa: F401
+        # and the ones counting the requests and the database connections of the worker
+        from . import instrumentation  # noqa: F401
+        # and the handler of the purge of the expired notifications (run_jobs only discovers the jobs.py modules)
+        from . import retention  # noqa: F401
+        # and the deploy check requiring a cache shared by the workers
+        from . import checks  # noqa: F401
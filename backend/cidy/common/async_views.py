@@ -0,0 +1,74 @@
+"""
+Async (ASGI) variants of the hot read-only endpoints.
+
+DRF's @api_view only runs sync views, so the async variants are plain
+django async views wrapped with @async_api_view, which reproduces what the
+read-only DRF views need : GET only, the JWT authentication (served from the
+per-worker user cache without leaving the event loop), the IsAuthenticated
+permission and the JSON rendering of the API with the same error payloads.
+Their queries use the async ORM.
+
+The urls serve the async variants when settings.ASYNC_VIEWS is set (the
+ASGI entry point cidy/asgi.py sets it), the sync ones otherwise :
+
+    path('notifications/new/', sync_or_async(views.get_new_notifications, views.aget_new_notifications), ...)
+"""
+import functools
+
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework import exceptions
+
+from account.authentication import CachedJWTAuthentication
+from .renderers import FastJSONRenderer
+
+ALLOWED_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_renderer = FastJSONRenderer()
+_authentication = CachedJWTAuthentication()
+
+
+def json_response(data, status=200, headers=None):
+    return HttpResponse(_renderer.render(data), content_type='application/json', status=status, headers=headers)
+
+
+def exception_response(exc):
+    """The response of DRF's exception handler for the API exception."""
+    headers = {}
+    if getattr(exc, 'auth_header', None):
+        headers['WWW-Authenticate'] = exc.auth_header
+    data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+    return json_response(data, status=exc.status_code, headers=headers)
+
+
+def async_api_view(view):
+    """Run the async view like a read-only @api_view(['GET']) @permission_classes([IsAuthenticated]) view."""
+
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            if request.method not in ALLOWED_METHODS:
+                raise exceptions.MethodNotAllowed(request.method)
+
+            try:
+                user_auth_tuple = await _authentication.aauthenticate(request)
+            except exceptions.AuthenticationFailed as exc:
+                exc.auth_header = _authentication.authenticate_header(request)
+                raise
+            if user_auth_tuple is None:
+                exc = exceptions.NotAuthenticated()
+                exc.auth_header = _authentication.authenticate_header(request)
+                raise exc
+            request.user, request.auth = user_auth_tuple
+
+            if request.method == 'OPTIONS':
+                return json_response({}, headers={'Allow': ', '.join(ALLOWED_METHODS)})
+            return await view(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            return exception_response(exc)
+    return wrapper
+
+
+def sync_or_async(sync_view, async_view):
+    """The view the url serves : the async variant in the ASGI deployment, the DRF view otherwise."""
+    return async_view if getattr(settings, 'ASYNC_VIEWS', False) else sync_view
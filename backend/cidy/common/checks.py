@@ -0,0 +1,31 @@
+"""
+System checks of the deployment.
+
+The reference data registry, the week schedules and the replica pins keep their
+versions in the default cache so that every worker sees the bumps of the others.
+A cache local to the process (LocMemCache, DummyCache) silently breaks them as
+soon as more than one worker serves the API, so `manage.py check --deploy`
+refuses it (development keeps its in-memory cache).
+"""
+from django.conf import settings
+from django.core.checks import Error, register
+
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    backend = settings.CACHES.get('default', {}).get('BACKEND')
+    if backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [
+        Error(
+            "The default cache (%s) isn't shared by the workers." % backend,
+            hint="Set REDIS_URL (or configure a shared backend in CACHES) : the reference data, "
+                 "the schedules and the replica pins are versioned in the default cache.",
+            id='common.E001',
+        )
+    ]
@@ -0,0 +1,55 @@
+"""
+File responses (CSV, PDF) for the exports and the statements.
+
+The CSV rows are written to the response while they're read (an iterator over
+the queryset), so the memory of the worker doesn't grow with the size of the
+export. The CSV starts with a BOM so that Excel reads it as UTF-8 (the names
+are accented). The names are typed by the students themselves, so the text
+cells Excel would run as a formula (starting with =, +, -, @, a tab or a
+carriage return) are written with a leading quote. The PDF documents (a statement, a few pages) are laid out
+before they're sent, see common/pdf.py.
+"""
+import csv
+
+from django.http import HttpResponse, StreamingHttpResponse
+
+from .pdf import table_pdf
+
+
+class Echo:
+    """The file-like object csv.writer writes to : returns the line instead of buffering it."""
+
+    def write(self, value):
+        return value
+
+
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def escape_formula(value):
+    """The value of the cell, quoted if it's a text Excel would run as a formula."""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def stream_csv(header, rows):
+    writer = csv.writer(Echo())
+    yield '\ufeff'
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow([escape_formula(value) for value in row])
+
+
+def _attachment(filename):
+    return {'Content-Disposition': f'attachment; filename="{filename}"'}
+
+
+def csv_response(filename, header, rows):
+    """Stream the rows (sequences of values) as a CSV attachment."""
+    return StreamingHttpResponse(stream_csv(header, rows), content_type='text/csv; charset=utf-8', headers=_attachment(filename))
+
+
+def pdf_response(filename, title, columns, rows):
+    """The rows as a PDF table attachment (see common/pdf.py)."""
+    return HttpResponse(table_pdf(title, columns, rows), content_type='application/pdf', headers=_attachment(filename))
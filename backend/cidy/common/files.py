@@ -0,0 +1,263 @@
+"""
+Serving the static and the media files without tying up the workers.
+
+Static files : collectstatic (with the CompressedManifestStaticFilesStorage)
+names the files after the hash of their content (app.css -> app.4f1c2a9e07b3.css,
+recorded in staticfiles.json) and writes a gzip copy (and a brotli one when
+the brotli package is installed) of the text files next to them. The
+StaticFilesMiddleware indexes STATIC_ROOT once per worker and answers the
+static requests before the rest of the middleware stack : the precompressed
+copy the client accepts, an ETag / Last-Modified (304 on revalidation) and a
+Cache-Control of a year (immutable) for the hashed names, a short one for
+the unhashed ones.
+
+Media files (the uploaded pictures and their thumbnails) : serve_media checks
+the path and, depending on settings.MEDIA_SERVING, lets the front web server
+send the bytes :
+
+    'django'            the worker streams the file (development)
+    'x-accel-redirect'  nginx serves it from the internal location MEDIA_ACCEL_REDIRECT_LOCATION
+    'x-sendfile'        Apache (mod_xsendfile) / lighttpd serve it from its path
+
+    location /protected-media/ {
+        internal;
+        alias /path/to/cidy/media/;
+    }
+
+The pictures are stored under the hash of their content and the thumbnails
+named after them (common/thumbnails.py), so they are cached forever too.
+"""
+import gzip
+import json
+import mimetypes
+import os
+import posixpath
+import re
+from urllib.parse import quote, urlsplit
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed, SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotAllowed
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from django.views.static import serve
+
+from .thumbnails import DIGEST_LENGTH, THUMBNAILS_DIRECTORY
+
+try:
+    import brotli
+except ImportError:  # the gzip copies are enough
+    brotli = None
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.mjs', '.map', '.json', '.svg', '.txt', '.html', '.xml', '.ico', '.ttf', '.otf', '.eot')
+# a compressed copy saving less than this isn't worth the decompression by the client
+MIN_COMPRESSION_RATIO = 0.95
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+_hashed_upload_re = re.compile(r'^[0-9a-f]{%d}\.' % DIGEST_LENGTH)
+
+
+# --- static files
+
+
+def compress_file(path):
+    """Write the compressed copies (path.gz, path.br) of the file worth compressing, return their paths."""
+    if not path.endswith(COMPRESSIBLE_EXTENSIONS):
+        return []
+    with open(path, 'rb') as file:
+        content = file.read()
+    compressed = [('.gz', gzip.compress(content, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        compressed.append(('.br', brotli.compress(content)))
+
+    written = []
+    for suffix, data in compressed:
+        if len(data) < len(content) * MIN_COMPRESSION_RATIO:
+            with open(path + suffix, 'wb') as file:
+                file.write(data)
+            written.append(path + suffix)
+    return written
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """The manifest storage (content hashed names) writing the compressed copies of the collected files."""
+
+    # a file missing from the manifest (not collected yet) is served under its name instead of failing the page
+    manifest_strict = False
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+        for name in set(paths) | set(self.hashed_files.values()):
+            if self.exists(name):
+                compress_file(self.path(name))
+
+
+def get_immutable_names(static_root):
+    """The hashed names recorded in the manifest of collectstatic."""
+    try:
+        with open(os.path.join(static_root, ManifestStaticFilesStorage.manifest_name), encoding='utf-8') as file:
+            return set(json.load(file).get('paths', {}).values())
+    except (OSError, ValueError):
+        return set()
+
+
+def content_type(name):
+    mime_type, _encoding = mimetypes.guess_type(name)
+    mime_type = mime_type or 'application/octet-stream'
+    if mime_type.startswith('text/') or mime_type in ('application/javascript', 'application/json', 'image/svg+xml'):
+        mime_type += '; charset=utf-8'
+    return mime_type
+
+
+class StaticFile:
+    """A collected file and its compressed copies, with the headers computed once."""
+
+    def __init__(self, path, name, encodings, immutable):
+        self.path = path
+        self.content_type = content_type(name)
+        self.cache_control = {'public': True, 'max_age': IMMUTABLE_MAX_AGE, 'immutable': True} if immutable else \
+            {'public': True, 'max_age': getattr(settings, 'STATIC_MAX_AGE', 60)}
+        # (content encoding, path, size, mtime) from the preferred one to the identity
+        self.variants = []
+        for encoding, suffix in ENCODINGS:
+            if encoding in encodings:
+                self.variants.append((encoding,) + self._stat(path + suffix))
+        self.variants.append((None,) + self._stat(path))
+
+    @staticmethod
+    def _stat(path):
+        stat = os.stat(path)
+        return path, stat.st_size, int(stat.st_mtime)
+
+    def get_variant(self, accept_encoding):
+        accepted = set()
+        for part in accept_encoding.split(','):
+            coding, _sep, params = part.strip().partition(';')
+            if params.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+                accepted.add(coding.strip().lower())
+        for variant in self.variants:
+            if variant[0] is None or variant[0] in accepted or '*' in accepted:
+                return variant
+
+
+class StaticFilesMiddleware:
+    """Serves the files of STATIC_ROOT (see the module docstring), put it right after the SecurityMiddleware."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+        static_url = settings.STATIC_URL or ''
+        # a STATIC_URL on another host (a CDN) isn't for us
+        if not settings.STATIC_ROOT or urlsplit(static_url).netloc:
+            raise MiddlewareNotUsed
+        self.prefix = '/' + static_url.lstrip('/')
+        self.files = self.scan(settings.STATIC_ROOT)
+        if not self.files:
+            raise MiddlewareNotUsed
+
+    def scan(self, static_root):
+        immutable_names = get_immutable_names(static_root)
+        files = {}
+        for directory, _subdirectories, filenames in os.walk(static_root):
+            present = set(filenames)
+            for filename in filenames:
+                if filename.endswith(('.gz', '.br')) and filename[:-3] in present:
+                    continue
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, static_root).replace(os.sep, '/')
+                encodings = {encoding for encoding, suffix in ENCODINGS if filename + suffix in present}
+                files[self.prefix + name] = StaticFile(path, name, encodings, name in immutable_names)
+        return files
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        static_file = self.files.get(request.path_info)
+        if static_file is None:
+            return self.get_response(request)
+        return self.serve(request, static_file)
+
+    async def __acall__(self, request):
+        static_file = self.files.get(request.path_info)
+        if static_file is None:
+            return await self.get_response(request)
+        # the stat and the open of the file leave the event loop
+        return await sync_to_async(self.serve, thread_sensitive=False)(request, static_file)
+
+    def serve(self, request, static_file):
+        if request.method not in ('GET', 'HEAD'):
+            return HttpResponseNotAllowed(['GET', 'HEAD'])
+        encoding, path, size, mtime = static_file.get_variant(request.headers.get('Accept-Encoding', ''))
+        etag = f'"{mtime:x}-{size:x}{"-" + encoding if encoding else ""}"'
+
+        response = HttpResponse(content_type=static_file.content_type)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(mtime)
+        if len(static_file.variants) > 1:
+            response['Vary'] = 'Accept-Encoding'
+        patch_cache_control(response, **static_file.cache_control)
+        conditional_response = get_conditional_response(request, etag=etag, last_modified=mtime, response=response)
+        if conditional_response is not response:
+            return conditional_response
+
+        if request.method == 'GET':
+            headers = response.headers
+            response = FileResponse(open(path, 'rb'), content_type=static_file.content_type)
+            for header, value in headers.items():
+                response[header] = value
+            del response['Content-Disposition']
+        if encoding:
+            response['Content-Encoding'] = encoding
+        response['Content-Length'] = str(size)
+        return response
+
+
+# --- media files
+
+
+def get_media_serving():
+    mode = getattr(settings, 'MEDIA_SERVING', 'django')
+    if mode not in ('django', 'x-accel-redirect', 'x-sendfile'):
+        raise ImproperlyConfigured(f"MEDIA_SERVING must be 'django', 'x-accel-redirect' or 'x-sendfile', not {mode!r}")
+    return mode
+
+
+def is_immutable_media(path):
+    """The thumbnails and the pictures stored under the hash of their content never change."""
+    return path.startswith(THUMBNAILS_DIRECTORY + '/') or bool(_hashed_upload_re.match(posixpath.basename(path)))
+
+
+def serve_media(request, path):
+    """Serve the media file under the path (relative to MEDIA_ROOT), handing the bytes to the web server when configured."""
+    mode = get_media_serving()
+    if mode == 'django':
+        response = serve(request, path, document_root=settings.MEDIA_ROOT)
+    else:
+        path = posixpath.normpath(path).lstrip('/')
+        try:
+            full_path = safe_join(settings.MEDIA_ROOT, path)
+        except SuspiciousFileOperation:
+            raise Http404
+        if not os.path.isfile(full_path):
+            raise Http404
+        response = HttpResponse(content_type=mimetypes.guess_type(full_path)[0] or 'application/octet-stream')
+        if mode == 'x-accel-redirect':
+            location = getattr(settings, 'MEDIA_ACCEL_REDIRECT_LOCATION', '/protected-media/')
+            response['X-Accel-Redirect'] = quote(location.rstrip('/') + '/' + path)
+        else:
+            response['X-Sendfile'] = full_path
+
+    if is_immutable_media(path):
+        patch_cache_control(response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=getattr(settings, 'MEDIA_MAX_AGE', 3600))
+    return response
@@ -0,0 +1,190 @@
+"""
+Idempotency keys of the mutating endpoints.
+
+The mobile app retries a request that timed out, which used to run it twice
+(a second attendance, a second payment) or fail late on an overlap. It now
+sends an Idempotency-Key header (a random UUID per action, reused by its
+retries) with its PUT / POST / PATCH / DELETE requests to the endpoints under
+settings.IDEMPOTENCY_PATH_PREFIXES. The IdempotencyMiddleware stores the
+response of the first request under (user, key) and replays it to the retries
+(with an Idempotent-Replayed header) without running the view again.
+
+The row is inserted before the view runs : the unique (user, key) constraint
+is the lock shared by the workers, so a retry arriving while the first request
+is still processed gets a 409 instead of running concurrently. The rows expire
+after IDEMPOTENCY_KEY_TTL seconds (purge_idempotency_keys removes them). The
+5xx responses aren't stored, so the retry of a request that crashed runs it
+again, and a key reused for another request (another path or body) gets a 422.
+"""
+import hashlib
+from datetime import timedelta
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
+
+from account.authentication import CachedJWTAuthentication
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+
+def _path_prefixes():
+    return getattr(settings, 'IDEMPOTENCY_PATH_PREFIXES', ('/api/teacher/',))
+
+
+def _ttl():
+    return timedelta(seconds=getattr(settings, 'IDEMPOTENCY_KEY_TTL', 24 * 3600))
+
+
+def _lock_timeout():
+    return timedelta(seconds=getattr(settings, 'IDEMPOTENCY_LOCK_TIMEOUT', 60))
+
+
+def fingerprint(request):
+    """The hash of what makes the request : its method, its path (with the query string) and its body."""
+    digest = hashlib.sha256()
+    digest.update(request.method.encode())
+    digest.update(request.get_full_path().encode())
+    if request.content_type == 'multipart/form-data':
+        # the uploads aren't read in memory, their size stands for them
+        digest.update(request.META.get('CONTENT_LENGTH', '').encode())
+    else:
+        digest.update(request.body)
+    return digest.hexdigest()
+
+
+def purge_expired_keys(now=None):
+    """Delete the stored responses older than the TTL, return the number of rows deleted."""
+    now = now or timezone.now()
+    return IdempotencyKey.objects.filter(created_at__lt=now - _ttl()).delete()[0]
+
+
+def _error(message, status):
+    return JsonResponse({'error': message}, status=status)
+
+
+class IdempotencyMiddleware:
+    """Replays the stored response of a mutating request sent again with the same Idempotency-Key."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.authentication = CachedJWTAuthentication()
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        key = self.get_key(request)
+        if key is None:
+            return self.get_response(request)
+        if len(key) > IdempotencyKey._meta.get_field('key').max_length:
+            return _error(f"The {HEADER} is too long", 400)
+
+        user = self.get_user(request)
+        if user is None:
+            # the view answers the unauthenticated request (401)
+            return self.get_response(request)
+
+        record = self.acquire(user, key, fingerprint(request))
+        if not isinstance(record, IdempotencyKey):
+            return record
+
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            record.delete()
+            raise
+        return self.store(record, response)
+
+    async def __acall__(self, request):
+        # the requests without a key (all the reads) don't leave the event loop
+        key = self.get_key(request)
+        if key is None:
+            return await self.get_response(request)
+        if len(key) > IdempotencyKey._meta.get_field('key').max_length:
+            return _error(f"The {HEADER} is too long", 400)
+
+        user = await self.aget_user(request)
+        if user is None:
+            return await self.get_response(request)
+
+        record = await sync_to_async(self.acquire)(user, key, fingerprint(request))
+        if not isinstance(record, IdempotencyKey):
+            return record
+
+        try:
+            response = await self.get_response(request)
+        except BaseException:
+            await record.adelete()
+            raise
+        return await sync_to_async(self.store)(record, response)
+
+    def get_key(self, request):
+        """The Idempotency-Key of the request, None when it isn't a mutating request under the prefixes."""
+        key = request.headers.get(HEADER)
+        if not key or request.method in SAFE_METHODS or not request.path.startswith(_path_prefixes()):
+            return None
+        return key
+
+    def get_user(self, request):
+        try:
+            authenticated = self.authentication.authenticate(request)
+        except AuthenticationFailed:
+            return None
+        return authenticated[0] if authenticated else None
+
+    async def aget_user(self, request):
+        try:
+            authenticated = await self.authentication.aauthenticate(request)
+        except AuthenticationFailed:
+            return None
+        return authenticated[0] if authenticated else None
+
+    def store(self, record, response):
+        """Keep the response for the retries (the 5xx and the streamed ones free the key instead)."""
+        if response.status_code >= 500 or response.streaming:
+            record.delete()
+            return response
+        record.status_code = response.status_code
+        record.content = response.content
+        record.content_type = response.get('Content-Type', '')
+        record.save(update_fields=['status_code', 'content', 'content_type'])
+        return response
+
+    def acquire(self, user, key, request_fingerprint):
+        """The new IdempotencyKey of the request, or the response to return instead of running it."""
+        for _attempt in range(2):
+            try:
+                with transaction.atomic():
+                    return IdempotencyKey.objects.create(user=user, key=key, fingerprint=request_fingerprint)
+            except IntegrityError:
+                pass
+
+            record = IdempotencyKey.objects.filter(user=user, key=key).first()
+            if record is None:
+                continue
+            now = timezone.now()
+            if record.created_at < now - _ttl() or (record.status_code is None and record.created_at < now - _lock_timeout()):
+                # expired, or left in progress by a worker that died : the key is free again
+                IdempotencyKey.objects.filter(pk=record.pk, created_at=record.created_at).delete()
+                continue
+            if record.status_code is None:
+                response = _error(f"A request with this {HEADER} is being processed", 409)
+                response['Retry-After'] = '1'
+                return response
+            if record.fingerprint != request_fingerprint:
+                return _error(f"The {HEADER} was already used for another request", 422)
+
+            response = HttpResponse(bytes(record.content), status=record.status_code, content_type=record.content_type or None)
+            response[REPLAYED_HEADER] = 'true'
+            return response
+        return _error(f"A request with this {HEADER} is being processed", 409)
@@ -0,0 +1,90 @@
+"""
+Per-worker metrics of the database connections.
+
+The counters are kept in memory by each worker process (gunicorn worker,
+run_jobs command, ...) from the Django signals : a request that opens a
+database connection instead of reusing the persistent one (CONN_MAX_AGE) or
+borrowing it from the pool shows up as connections_opened growing with
+requests. get_metrics() returns a snapshot, served by the metrics endpoint.
+"""
+import os
+import threading
+import time
+
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+_lock = threading.Lock()
+_started_at = time.time()
+_counters = {
+    'requests': 0,
+    'connections_opened': 0,
+}
+_connections_opened_by_alias = {}
+
+
+def _increment(name, alias=None):
+    with _lock:
+        _counters[name] += 1
+        if alias is not None:
+            _connections_opened_by_alias[alias] = _connections_opened_by_alias.get(alias, 0) + 1
+
+
+def _connection_settings(alias):
+    settings_dict = connections.settings[alias]
+    pool = (settings_dict.get('OPTIONS') or {}).get('pool')
+    return {
+        'vendor': connections[alias].vendor,
+        'conn_max_age': settings_dict.get('CONN_MAX_AGE'),
+        'conn_health_checks': settings_dict.get('CONN_HEALTH_CHECKS'),
+        'pool': bool(pool),
+    }
+
+
+def _pool_stats(alias):
+    """The statistics of the psycopg pool of the alias (None if the alias doesn't use one)."""
+    pool = getattr(connections[alias], 'pool', None) if _connection_settings(alias)['pool'] else None
+    if pool is None:
+        return None
+    return pool.get_stats()
+
+
+def get_metrics():
+    with _lock:
+        counters = dict(_counters)
+        connections_opened_by_alias = dict(_connections_opened_by_alias)
+
+    requests_count = counters['requests']
+    return {
+        'pid': os.getpid(),
+        'uptime': round(time.time() - _started_at, 1),
+        **counters,
+        'connections_opened_per_request': round(counters['connections_opened'] / requests_count, 3) if requests_count else None,
+        'databases': {
+            alias: {
+                **_connection_settings(alias),
+                'connections_opened': connections_opened_by_alias.get(alias, 0),
+                'pool_stats': _pool_stats(alias),
+            }
+            for alias in connections.settings
+        },
+    }
+
+
+def reset_metrics():
+    with _lock:
+        for name in _counters:
+            _counters[name] = 0
+        _connections_opened_by_alias.clear()
+
+
+@receiver(request_started)
+def count_request(sender, **kwargs):
+    _increment('requests')
+
+
+@receiver(connection_created)
+def count_connection(sender, connection, **kwargs):
+    _increment('connections_opened', connection.alias)
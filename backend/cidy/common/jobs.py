@@ -0,0 +1,115 @@
+"""
+A lightweight job queue stored in the database (no external broker).
+
+The views enqueue jobs with enqueue_job(), the run_jobs management command
+claims them one by one and runs the handler registered for their kind with
+the @job_handler decorator. Handlers live in the jobs.py module of each app,
+they report their progress on the job through report_progress().
+"""
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+_handlers = {}
+
+
+def job_handler(kind):
+    """Register the decorated function as the handler of the jobs of this kind."""
+    def decorator(func):
+        _handlers[kind] = func
+        return func
+    return decorator
+
+
+def get_job_handler(kind):
+    return _handlers.get(kind)
+
+
+def enqueue_job(kind, owner=None, **payload):
+    """Add a job to the queue, it will be run by the next free worker."""
+    return Job.objects.create(kind=kind, owner=owner, payload=payload)
+
+
+def claim_next_job():
+    """Mark the oldest pending job as running and return it (None if the queue is empty).
+
+    The row is locked with SKIP LOCKED so that many workers never claim the same job.
+    """
+    with transaction.atomic():
+        job = (Job.objects.select_for_update(skip_locked=True)
+                          .filter(status='pending')
+                          .order_by('id')
+                          .first())
+        if job is None:
+            return None
+        job.status = 'running'
+        job.attempts += 1
+        job.started_at = timezone.now()
+        job.save(update_fields=['status', 'attempts', 'started_at'])
+    return job
+
+
+def requeue_stale_jobs():
+    """Put back in the queue the jobs left running by a worker that died."""
+    stale_after = timedelta(seconds=getattr(settings, 'JOBS_STALE_AFTER', 3600))
+    return Job.objects.filter(status='running', started_at__lt=timezone.now() - stale_after).update(status='pending')
+
+
+def run_job(job):
+    """Run the handler of the job and record its outcome."""
+    handler = get_job_handler(job.kind)
+    try:
+        if handler is None:
+            raise LookupError(f"No handler registered for the jobs of kind {job.kind}")
+        handler(job)
+    except Exception:
+        logger.exception("The job %s failed", job.id)
+        max_attempts = getattr(settings, 'JOBS_MAX_ATTEMPTS', 3)
+        job.status = 'pending' if handler is not None and job.attempts < max_attempts else 'failed'
+        job.error = traceback.format_exc()
+        job.finished_at = timezone.now() if job.status == 'failed' else None
+    else:
+        job.status = 'done'
+        job.processed = job.total
+        job.error = ''
+        job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'processed', 'error', 'finished_at'])
+    return job
+
+
+def report_progress(job, processed=None, total=None):
+    if total is not None:
+        job.total = total
+    if processed is not None:
+        job.processed = processed
+    job.save(update_fields=['total', 'processed'])
+
+
+def purge_in_chunks(job, querysets, chunk_size=None):
+    """Delete the rows of each queryset, in order, by chunks of primary keys.
+
+    Each chunk is deleted in its own short transaction (with its cascades) and the
+    progress of the job is saved after it, so a purge never holds long locks and
+    can be resumed from where it stopped.
+    """
+    chunk_size = chunk_size or getattr(settings, 'JOBS_PURGE_CHUNK_SIZE', 1000)
+    report_progress(job, processed=0, total=sum(queryset.count() for queryset in querysets))
+
+    processed = 0
+    for queryset in querysets:
+        while True:
+            pks = list(queryset.values_list('pk', flat=True)[:chunk_size])
+            if not pks:
+                break
+            with transaction.atomic():
+                queryset.model._base_manager.filter(pk__in=pks).delete()
+            processed += len(pks)
+            report_progress(job, processed=processed)
@@ -0,0 +1,58 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.core.signals import request_finished, request_started
+from django.db import connections
+
+from common.instrumentation import get_metrics, reset_metrics
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the latency of requests closing their database connection (CONN_MAX_AGE = 0) "
+        "with the one of requests reusing the persistent connection of the worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--requests', type=int, default=200, help="Number of requests simulated per mode.")
+        parser.add_argument('--queries', type=int, default=3, help="Number of queries run by each request.")
+
+    def simulate_requests(self, connection, number, queries):
+        """Run the requests like the handler does : request_started, the queries, then request_finished."""
+        reset_metrics()
+        durations = []
+        for _ in range(number):
+            started_at = time.perf_counter()
+            request_started.send(sender=self.__class__)
+            for _ in range(queries):
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+                    cursor.fetchone()
+            # closes the connection if it's older than CONN_MAX_AGE (or returns it to the pool)
+            request_finished.send(sender=self.__class__)
+            durations.append(time.perf_counter() - started_at)
+        durations.sort()
+        return durations, get_metrics()['connections_opened']
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        conn_max_age = connection.settings_dict['CONN_MAX_AGE']
+        modes = [('CONN_MAX_AGE = 0', 0), (f'CONN_MAX_AGE = {conn_max_age or 600}', conn_max_age or 600)]
+        if connection.settings_dict.get('OPTIONS', {}).get('pool'):
+            modes = [('pool', 0)]
+
+        try:
+            for label, max_age in modes:
+                connection.close()
+                connection.settings_dict['CONN_MAX_AGE'] = max_age
+                durations, connections_opened = self.simulate_requests(connection, options['requests'], options['queries'])
+                average = sum(durations) / len(durations)
+                p95 = durations[int(len(durations) * 0.95) - 1]
+                self.stdout.write(
+                    f"{label} : {average * 1e3:.2f} ms per request (p95 {p95 * 1e3:.2f} ms), "
+                    f"{connections_opened} connections opened for {len(durations)} requests"
+                )
+        finally:
+            connection.close()
+            connection.settings_dict['CONN_MAX_AGE'] = conn_max_age
@@ -0,0 +1,108 @@
+import datetime
+import timeit
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from common.renderers import FastJSONRenderer, orjson
+
+
+def build_groups_page(size):
+    """Shaped like the response of teacher get_groups."""
+    return {
+        'has_groups': True,
+        'groups': [{
+            'id': i,
+            'name': f'Groupe {i}',
+            'subject_name': 'Mathématiques',
+            'level': 'Quatrième année secondaire',
+            'section': 'Sciences expérimentales',
+            'week_day': 'Monday',
+            'start_time': datetime.time(8, 30),
+            'end_time': datetime.time(10),
+            'students_count': 25,
+            'total_paid': Decimal('1250.00'),
+            'total_unpaid': Decimal('340.50'),
+        } for i in range(size)],
+        'total_groups': size,
+        'current_page': 1,
+    }
+
+
+def build_student_details(size):
+    """Shaped like the response of teacher get_student_details (a student with his classes history)."""
+    return {
+        'id': 1,
+        'fullname': 'Hélène Ben Salah',
+        'phone_number': '22123456',
+        'paid_amount': Decimal('420.00'),
+        'unpaid_amount': Decimal('60.00'),
+        'groups': [{
+            'id': g,
+            'name': f'Groupe {g}',
+            'paid_amount': Decimal('140.00'),
+            'unpaid_amount': Decimal('20.00'),
+            'classes': [{
+                'id': g * size + c,
+                'status': 'attended_and_paid',
+                'attendance_date': datetime.date(2025, 1, 1) + datetime.timedelta(days=7 * c),
+                'attendance_start_time': datetime.time(8, 30),
+                'attendance_end_time': datetime.time(10),
+                'paid_at': datetime.datetime(2025, 1, 1, 10, 5, 12, 123456, tzinfo=datetime.timezone.utc),
+            } for c in range(size)],
+        } for g in range(3)],
+    }
+
+
+def build_notifications_page(size):
+    """Shaped like a page of notifications."""
+    return {
+        'notifications': [{
+            'id': i,
+            'image': '/media/defaults/teacher.png',
+            'message': "Votre professeur Ahmed Ben Ali a marqué votre présence dans le groupe Mathématiques.",
+            'is_read': bool(i % 2),
+            'meta_data': {'group_id': i, 'student_id': i * 3},
+            'created_at': datetime.datetime(2025, 1, 1, 10, 5, 12, 123456, tzinfo=datetime.timezone.utc),
+        } for i in range(size)],
+        'total_count': size,
+        'page': 1,
+    }
+
+
+PAYLOADS = {
+    'get_groups': build_groups_page,
+    'get_student_details': build_student_details,
+    'notifications': build_notifications_page,
+}
+
+
+class Command(BaseCommand):
+    help = "Compare the rendering time of the default JSON renderer and of common.renderers.FastJSONRenderer."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=100, help="Number of items of each payload.")
+        parser.add_argument('--number', type=int, default=200, help="Number of renders timed per payload.")
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write("orjson isn't installed, FastJSONRenderer falls back to JSONRenderer")
+
+        default_renderer = JSONRenderer()
+        fast_renderer = FastJSONRenderer()
+        number = options['number']
+
+        for name, build_payload in PAYLOADS.items():
+            payload = build_payload(options['size'])
+            default_output = default_renderer.render(payload)
+            fast_output = fast_renderer.render(payload)
+            if default_output != fast_output:
+                self.stderr.write(f"{name} : the outputs of the renderers differ")
+
+            default_time = timeit.timeit(lambda: default_renderer.render(payload), number=number) / number
+            fast_time = timeit.timeit(lambda: fast_renderer.render(payload), number=number) / number
+            self.stdout.write(
+                f"{name} ({len(default_output)} bytes) : JSONRenderer {default_time * 1e6:.0f} us, "
+                f"FastJSONRenderer {fast_time * 1e6:.0f} us (x{default_time / fast_time:.1f})"
+            )
@@ -0,0 +1,182 @@
+import asyncio
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.db import connections
+from django.test import RequestFactory
+
+from account.authentication import get_access_token
+from account.models import User
+
+STACKS = ('wsgi', 'asgi')
+
+
+def summarize(label, latencies, elapsed):
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2]
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    return (
+        f"{label} : {len(latencies) / elapsed:.0f} requests/s, "
+        f"latency p50 {p50 * 1e3:.1f} ms, p95 {p95 * 1e3:.1f} ms"
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the sync (WSGI, a pool of worker threads) and async (ASGI, one event loop) stacks "
+        "serving many mobile clients polling the teacher new notifications endpoint. The requests go through "
+        "the whole stack (get_wsgi_application() / get_asgi_application(), the middlewares, the urls), each "
+        "stack is run in its own process since the urls pick the async views with ASYNC_VIEWS."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('email', help="Email of the teacher account the clients poll as.")
+        parser.add_argument('--clients', type=int, default=200, help="Number of polling clients.")
+        parser.add_argument('--polls', type=int, default=5, help="Number of polls of each client.")
+        parser.add_argument('--interval', type=float, default=0.2, help="Idle time (in seconds) of a client between two polls.")
+        parser.add_argument(
+            '--network-latency', type=float, default=0.05,
+            help="Round trip time (in seconds) of the mobile network, waited by the clients before each request of both stacks."
+        )
+        parser.add_argument('--threads', type=int, default=8, help="Worker threads of the sync stack (gunicorn workers x threads).")
+        parser.add_argument('--stack', choices=STACKS, help="Only run this stack, in this process.")
+
+    def handle(self, *args, **options):
+        if options['stack'] is None:
+            self.stdout.write(
+                f"{options['clients']} clients x {options['polls']} polls, {options['interval']} s between polls, "
+                f"{options['network_latency']} s of network latency per request"
+            )
+            for stack in STACKS:
+                self.stdout.write(self.run_in_process(stack, options))
+            return
+
+        try:
+            user = User.objects.select_related('teacher').get(email=options['email'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user with the email {options['email']}")
+        if not hasattr(user, 'teacher'):
+            raise CommandError(f"{options['email']} isn't a teacher account")
+        if (options['stack'] == 'asgi') != bool(getattr(settings, 'ASYNC_VIEWS', False)):
+            raise CommandError("Run the asgi stack with ASYNC_VIEWS=1 and the wsgi one without it")
+
+        self.path = '/api/teacher/notifications/new/'
+        self.params = {'start_from_notification_id': '0'}
+        self.authorization = f'Bearer {get_access_token(user)}'
+        self.options = options
+        self.stdout.write(self.run_wsgi() if options['stack'] == 'wsgi' else self.run_asgi())
+
+    def run_in_process(self, stack, options):
+        """Run the stack in a new process, with the environment its entry point (cidy/wsgi.py, cidy/asgi.py) sets."""
+        arguments = [options['email'], '--stack', stack]
+        for name in ('clients', 'polls', 'interval', 'network_latency', 'threads'):
+            arguments += [f"--{name.replace('_', '-')}", str(options[name])]
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'cidy.settings')}
+        env.pop('ASYNC_VIEWS', None)
+        if stack == 'asgi':
+            env['ASYNC_VIEWS'] = '1'
+        result = subprocess.run([sys.executable, '-m', 'django', 'benchmark_polling', *arguments],
+                                cwd=settings.BASE_DIR, env=env, capture_output=True, text=True)
+        if result.returncode:
+            raise CommandError(f"The {stack} stack failed : {result.stderr.strip()}")
+        return result.stdout.strip()
+
+    def check_status(self, status_codes):
+        if any(status_code != 200 for status_code in status_codes):
+            raise CommandError(f"The endpoint answered {status_codes}")
+
+    def run_wsgi(self):
+        options = self.options
+        application = get_wsgi_application()
+        factory = RequestFactory()
+        latencies = []
+        lock = threading.Lock()
+
+        def serve():
+            environ = factory.get(self.path, self.params, headers={'Authorization': self.authorization}).environ
+            status = []
+            body = application(environ, lambda status_line, headers: status.append(int(status_line.split()[0])))
+            try:
+                b''.join(body)
+            finally:
+                body.close()
+            return status[0]
+
+        def client(workers):
+            for _ in range(options['polls']):
+                started_at = time.perf_counter()
+                # the request travels on the network before it reaches a worker
+                time.sleep(options['network_latency'])
+                workers.submit(serve).result()
+                with lock:
+                    latencies.append(time.perf_counter() - started_at)
+                time.sleep(options['interval'])
+
+        with ThreadPoolExecutor(options['threads']) as workers:
+            # the first requests of the threads open their database connection
+            self.check_status(list(workers.map(lambda _: serve(), range(options['threads']))))
+            started_at = time.perf_counter()
+            clients = [threading.Thread(target=client, args=(workers,)) for _ in range(options['clients'])]
+            for thread in clients:
+                thread.start()
+            for thread in clients:
+                thread.join()
+            elapsed = time.perf_counter() - started_at
+            list(workers.map(lambda _: connections.close_all(), range(options['threads'])))
+
+        return summarize(f"wsgi, {options['threads']} threads", latencies, elapsed - options['interval'])
+
+    def run_asgi(self):
+        options = self.options
+        application = get_asgi_application()
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+            'path': self.path, 'raw_path': self.path.encode(), 'query_string': urlencode(self.params).encode(),
+            'root_path': '', 'headers': [(b'host', b'testserver'), (b'authorization', self.authorization.encode())],
+            'client': ('127.0.0.1', 0), 'server': ('testserver', 80),
+        }
+        latencies = []
+
+        async def serve():
+            messages = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+            status = []
+
+            async def receive():
+                if messages:
+                    return messages.pop()
+                # the client stays connected until the response is sent
+                await asyncio.Future()
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    status.append(message['status'])
+
+            await application(dict(scope), receive, send)
+            return status[0]
+
+        async def client():
+            for _ in range(options['polls']):
+                started_at = time.perf_counter()
+                # the request travels on the network before it reaches the event loop
+                await asyncio.sleep(options['network_latency'])
+                await serve()
+                latencies.append(time.perf_counter() - started_at)
+                await asyncio.sleep(options['interval'])
+
+        async def main():
+            self.check_status([await serve()])
+            started_at = time.perf_counter()
+            await asyncio.gather(*(client() for _ in range(options['clients'])))
+            return time.perf_counter() - started_at
+
+        elapsed = asyncio.run(main())
+        return summarize("asgi, 1 event loop", latencies, elapsed - options['interval'])
@@ -0,0 +1,44 @@
+from django.apps import apps
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import models
+
+from common.thumbnails import generate_thumbnails
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate the missing thumbnails of the pictures already stored (the defaults and the uploads made "
+        "before ThumbnailImageField) : run it after deploying new defaults or thumbnail sizes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help="Regenerate the existing thumbnails too.")
+
+    def get_image_names(self):
+        """The names of the pictures referenced by the image fields of every model (with their defaults)."""
+        names = {}
+        for model in apps.get_models():
+            for field in model._meta.concrete_fields:
+                if not isinstance(field, models.ImageField):
+                    continue
+                if isinstance(field.default, str):
+                    names.setdefault(field.default, field.storage)
+                values = model._base_manager.exclude(**{field.name: ''}).exclude(**{f'{field.name}__isnull': True})
+                for name in values.values_list(field.name, flat=True).distinct().iterator():
+                    names.setdefault(name, field.storage)
+        return names
+
+    def handle(self, *args, **options):
+        generated = missing = 0
+        for name, storage in self.get_image_names().items():
+            storage = storage or default_storage
+            if not storage.exists(name):
+                missing += 1
+                self.stderr.write(f"{name} : the picture doesn't exist")
+                continue
+            try:
+                generated += len(generate_thumbnails(storage, name, force=options['force']))
+            except OSError as exc:
+                self.stderr.write(f"{name} : {exc}")
+        self.stdout.write(f"{generated} thumbnails generated ({missing} pictures not found)")
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from common.idempotency import purge_expired_keys
+
+
+class Command(BaseCommand):
+    help = "Delete the stored responses of the idempotency keys older than IDEMPOTENCY_KEY_TTL (daily cron job)."
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{purge_expired_keys()} expired idempotency key(s) deleted")
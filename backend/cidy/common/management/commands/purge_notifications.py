@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from common.retention import expired_notifications, schedule_notifications_purge
+
+
+class Command(BaseCommand):
+    help = (
+        "Enqueue the deletion of the read notifications older than NOTIFICATION_RETENTION_DAYS "
+        "(daily cron job, the run_jobs workers delete them by chunks)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Only count the notifications to delete.")
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            for queryset in expired_notifications():
+                self.stdout.write(f"{queryset.count()} {queryset.model._meta.verbose_name}(s) to delete")
+            return
+
+        job = schedule_notifications_purge()
+        if job is None:
+            self.stdout.write("A purge of the notifications is already queued")
+        else:
+            self.stdout.write(f"The purge of the expired notifications is queued (job #{job.id})")
@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import autodiscover_modules
+
+from common.jobs import claim_next_job, requeue_stale_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = "Run the jobs of the database backed job queue (purges of the soft deleted rows, ...)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help="Run the pending jobs then exit instead of waiting for new ones.")
+        parser.add_argument('--sleep', type=float, default=2,
+                            help="Seconds to wait before polling again when the queue is empty.")
+
+    def handle(self, *args, **options):
+        # import the jobs.py module of each app to register their job handlers
+        autodiscover_modules('jobs')
+
+        requeued_jobs_count = requeue_stale_jobs()
+        if requeued_jobs_count:
+            self.stdout.write(f"{requeued_jobs_count} stale job(s) put back in the queue")
+
+        while True:
+            job = claim_next_job()
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['sleep'])
+                continue
+
+            self.stdout.write(f"Running the {job.kind} job #{job.id} (attempt {job.attempts})")
+            job = run_job(job)
+            self.stdout.write(f"The {job.kind} job #{job.id} is {job.status} ({job.processed}/{job.total})")
@@ -1,5 +1,117 @@
 from django.db import models
+from django.utils import timezone
+from account.models import User
+from .notifications import render_message
+from .search import normalize_search_text
 
-# Create your models here.
 
+class SoftDeleteQuerySet(models.QuerySet):
+    def soft_delete(self):
+        """Hide the rows right away, they are purged later by a background job."""
+        return self.update(deleted_at=timezone.now())
 
+
+class SoftDeleteManager(models.Manager.from_queryset(SoftDeleteQuerySet)):
+    """Default manager that hides the soft deleted rows."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
+class SoftDeleteModel(models.Model):
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    # objects hides the soft deleted rows, all_objects is used by the purge jobs
+    objects = SoftDeleteManager()
+    all_objects = models.Manager.from_queryset(SoftDeleteQuerySet)()
+
+    class Meta:
+        abstract = True
+
+
+class TemplatedNotification(models.Model):
+    """A notification stored as a template and its params (common/notifications.py) or as a message."""
+    template = models.CharField(max_length=50, default='', blank=True)
+    params = models.JSONField(null=True, blank=True)
+
+    @property
+    def text(self):
+        return render_message(self.message, self.template, self.params)
+
+    class Meta:
+        abstract = True
+
+
+class SearchableModel(models.Model):
+    """Keep the normalized copy of the search_source_field used by common.search.search()."""
+    search_source_field = None
+
+    search_name = models.CharField(max_length=255, default='', blank=True, editable=False, db_index=True)
+
+    def save(self, *args, **kwargs):
+        self.search_name = normalize_search_text(getattr(self, self.search_source_field))
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and self.search_source_field in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'search_name'}
+        super().save(*args, **kwargs)
+
+    class Meta:
+        abstract = True
+
+
+class Job(models.Model):
+    """A unit of background work (like purging soft deleted rows) run by the run_jobs command."""
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    )
+    kind = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    owner = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    attempts = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'id'], name='common_job_status_id_idx'),
+        ]
+
+    @property
+    def progress(self):
+        if self.status == 'done':
+            return 100
+        if not self.total:
+            return 0
+        return min(99, int(self.processed * 100 / self.total))
+
+    def __str__(self):
+        return f"{self.kind} job #{self.id} - {self.status}"
+
+
+class IdempotencyKey(models.Model):
+    """The response of a mutating request sent with an Idempotency-Key header (see common/idempotency.py)."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    key = models.CharField(max_length=255)
+    # the hash of the method, the path and the body of the request
+    fingerprint = models.CharField(max_length=64)
+    # null while the request is processed
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    content = models.BinaryField(default=b'')
+    content_type = models.CharField(max_length=100, blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='common_idempotency_user_key_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.key} of {self.user_id} - {self.status_code or 'in progress'}"
@@ -0,0 +1,83 @@
+"""
+Templates of the notifications sent to many recipients at once.
+
+The mass actions (an attendance sheet, a group deleted, students added to a
+group) used to format a near identical French message per recipient and to
+store its full text. These notifications now store the id of their template
+and its params (the names, the subject, the dates, the genders choosing the
+pronouns), and their text is rendered when it is read : by the `text` property
+of the notification models and by the NotificationMessage column of the
+projections. Each template is parsed once per process (compile_template).
+
+The notifications without a template (the older rows and the ones still sent
+with a text) keep showing their message, so nothing has to be migrated.
+"""
+import functools
+import logging
+import string
+
+logger = logging.getLogger(__name__)
+
+# the pronouns of the templates, chosen by the genders stored in the params
+PRONOUNS = {
+    'student_teacher': lambda params: "Votre professeur" if params.get('teacher_gender') == "M" else "Votre professeure",
+    'parent_teacher': lambda params: "Le professeur" if params.get('teacher_gender') == "M" else "La professeure",
+    'child': lambda params: "votre fils" if params.get('child_gender') == "M" else "votre fille",
+}
+
+_SESSION = "la séance de {subject} qui a eu lieu le {date} de {start_time} à {end_time}"
+_UNPAID = ", et le montant impayé pour cette matière est désormais de {unpaid_amount} DT."
+
+TEMPLATES = {
+    'student_group_deleted': "{student_teacher} {teacher} a supprimé le groupe {subject} dans lequel vous étiez inscrit.",
+    'parent_group_deleted': "{parent_teacher} {teacher} a supprimé le groupe du {subject} dans lequel {child} {son} était inscrit.",
+    'student_added_to_group': "{student_teacher} {teacher} a ajouté vous à un groupe de {subject}.",
+    'parent_added_to_group': "{parent_teacher} {teacher} a ajouté {child} {son} à un groupe de {subject}.",
+    'student_removed_from_group': "{student_teacher} {teacher} vous a retiré du groupe de {subject}.",
+    'parent_removed_from_group': "{parent_teacher} {teacher} a retiré {child} {son} du groupe de {subject}.",
+    'student_attendance': "{student_teacher} {teacher} a marqué votre présence dans " + _SESSION + ".",
+    'parent_attendance': "{parent_teacher} {teacher} a marqué la présence de {child} {son} dans " + _SESSION + ".",
+    'student_attendance_due': "{student_teacher} {teacher} a marqué votre présence dans " + _SESSION + _UNPAID,
+    'parent_attendance_due': "{parent_teacher} {teacher} a marqué la présence de {child} {son} dans " + _SESSION + _UNPAID,
+    'student_absence': "{student_teacher} {teacher} a marqué votre absence dans " + _SESSION + ".",
+    'parent_absence': "{parent_teacher} {teacher} a marqué l’absence de {child} {son} dans " + _SESSION + ".",
+    'student_payment': "{student_teacher} {teacher} a marqué votre paiement pour {classes} séance(s) de {subject}.",
+    'parent_payment': "{parent_teacher} {teacher} a marqué le paiement de {child} {son} pour {classes} séance(s) de {subject}.",
+}
+
+
+@functools.lru_cache(maxsize=None)
+def compile_template(template):
+    """The (literal text, param name or None) pieces of the template, parsed once."""
+    return tuple((literal, name) for literal, name, _spec, _conversion in string.Formatter().parse(TEMPLATES[template]))
+
+
+def render_template(template, params):
+    """The text of the template with its params, KeyError if the template or one of its params is unknown."""
+    parts = []
+    for literal, name in compile_template(template):
+        parts.append(literal)
+        if name is not None:
+            parts.append(str(params[name]) if name in params else PRONOUNS[name](params))
+    return ''.join(parts)
+
+
+def render_message(message, template, params):
+    """The text of a notification : its template rendered with its params, or its message when it has no template."""
+    if not template:
+        return message
+    try:
+        return render_template(template, params or {})
+    except KeyError:
+        logger.warning("Can't render the notification template %s with the params %s", template, params)
+        return message
+
+
+def teacher_params(teacher, subject, **params):
+    """The params of a notification sent by the teacher about the subject."""
+    return {'teacher': teacher.fullname, 'teacher_gender': teacher.gender, 'subject': subject, **params}
+
+
+def son_params(params, student, son):
+    """The params of the notification sent to the parent of the son attached to the student."""
+    return {**params, 'son': son.fullname, 'child_gender': student.gender}
@@ -0,0 +1,78 @@
+"""
+PDF writer for the tabular documents (the monthly statements).
+
+The tables hold the names of the students and of the teachers, often written
+in Arabic, which the standard PDF fonts can't show. The documents are laid out
+with fpdf2 in DejaVu Sans (common/fonts, embedded as a subset of the glyphs
+used) and their text is shaped by HarfBuzz (uharfbuzz) : the Arabic letters
+are joined and the right to left runs ordered. table_pdf() adds the rows page
+by page, repeating the title and the header of the table on each page.
+"""
+import os
+
+from fpdf import FPDF
+
+FONTS_DIRECTORY = os.path.join(os.path.dirname(__file__), 'fonts')
+FONT_FAMILY = 'DejaVuSans'
+FONT_SIZE = 9
+TITLE_FONT_SIZE = 13
+LINE_HEIGHT = 15
+MARGIN = 36
+
+
+class Column:
+    """A column of the table : its label, its width (in points) and its alignment ('left' or 'right')."""
+
+    def __init__(self, label, width, align='left'):
+        self.label = label
+        self.width = width
+        self.align = align
+
+
+class TablePDF(FPDF):
+    """An A4 landscape document listing rows under the columns."""
+
+    def __init__(self, title, columns):
+        super().__init__(orientation='landscape', unit='pt', format='A4')
+        self.document_title = title
+        self.columns = columns
+        self.add_font(FONT_FAMILY, '', os.path.join(FONTS_DIRECTORY, 'DejaVuSans.ttf'))
+        self.add_font(FONT_FAMILY, 'B', os.path.join(FONTS_DIRECTORY, 'DejaVuSans-Bold.ttf'))
+        self.set_text_shaping(True)
+        self.set_margins(MARGIN, MARGIN)
+        self.set_auto_page_break(True, margin=MARGIN)
+        self.set_title(title)
+
+    def header(self):
+        self.set_font(FONT_FAMILY, 'B', TITLE_FONT_SIZE)
+        self.cell(0, LINE_HEIGHT, self.fit(self.document_title, self.epw), new_x='LMARGIN', new_y='NEXT')
+        self.ln(LINE_HEIGHT)
+        self.row([column.label for column in self.columns], style='B')
+        self.line(MARGIN, self.get_y(), self.w - MARGIN, self.get_y())
+
+    def footer(self):
+        self.set_y(-MARGIN)
+        self.set_font(FONT_FAMILY, '', FONT_SIZE)
+        self.cell(0, LINE_HEIGHT, f'Page {self.page_no()}', align='R')
+
+    def row(self, values, style=''):
+        self.set_font(FONT_FAMILY, style, FONT_SIZE)
+        for column, value in zip(self.columns, values):
+            text = self.fit('' if value is None else str(value), column.width)
+            self.cell(column.width, LINE_HEIGHT, text, align='R' if column.align == 'right' else 'L')
+        self.ln(LINE_HEIGHT)
+
+    def fit(self, text, width):
+        """The text shortened with an ellipsis to fit the width (with the padding of the cell)."""
+        while text and self.get_string_width(text) > width - 2 * self.c_margin:
+            text = text[:-2] + '…' if len(text) > 1 else ''
+        return text
+
+
+def table_pdf(title, columns, rows):
+    """The bytes of the PDF listing the rows (sequences of values) under the columns."""
+    pdf = TablePDF(title, columns)
+    pdf.add_page()
+    for row in rows:
+        pdf.row(row)
+    return bytes(pdf.output())
@@ -0,0 +1,207 @@
+"""
+Read-path projections of the list endpoints.
+
+A projection declares a list payload like a read only serializer, but each
+of its columns is a lookup read with queryset.values() and converted with a
+plain function, so a page of rows is built as dicts without instantiating
+the model objects nor running the DRF fields machinery per row. The output
+is the one of the equivalent serializer (see the compatibility tests), the
+level and subject labels come from the reference data registry instead of
+joins and the image urls are built from the precomputed storage prefix.
+
+    class StudentListProjection(Projection):
+        model = Student
+
+        id = Column()
+        image = ImageUrl()
+        level = LevelName('level_id')
+
+    students = StudentListProjection.values(queryset)      # to paginate
+    data = StudentListProjection.build(page.object_list)   # list of dicts
+    data = await StudentListProjection.adata(queryset)     # in the async views
+"""
+import operator
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+
+from django.core.files.storage import FileSystemStorage
+from django.utils import timezone
+from django.utils.encoding import filepath_to_uri
+
+from .notifications import render_message
+from .reference_data import get_reference_data
+from .thumbnails import thumbnail_name
+
+
+class Column:
+    """A key of the payload read from the lookup (by default the name of the key)."""
+    # False for the columns whose prepare() can query the database (to reload the reference data)
+    async_safe = True
+
+    def __init__(self, lookup=None):
+        self.lookup = lookup
+
+    def bind(self, projection, name):
+        self.name = name
+        self.lookup = self.lookup or name
+        self.model = projection.model
+
+    def lookups(self):
+        """The lookups read for the column."""
+        return (self.lookup,)
+
+    def getter(self):
+        """Return the function reading the value of the column from the row."""
+        return operator.itemgetter(*self.lookups())
+
+    def prepare(self):
+        """Return the function converting the values of the column (called once per build)."""
+        return None
+
+
+class DecimalString(Column):
+    """The decimal as a string with a fixed number of decimal places, like serializers.DecimalField."""
+
+    def __init__(self, lookup=None, decimal_places=2):
+        super().__init__(lookup)
+        self.quantum = Decimal(1).scaleb(-decimal_places)
+
+    def prepare(self):
+        quantum = self.quantum
+
+        def to_representation(value):
+            return '{:f}'.format(Decimal(value).quantize(quantum))
+        return to_representation
+
+
+class DateTimeString(Column):
+    """The datetime in the current timezone in ISO 8601, like serializers.DateTimeField."""
+
+    def prepare(self):
+        current_timezone = timezone.get_current_timezone()
+
+        def to_representation(value):
+            if timezone.is_aware(value):
+                value = value.astimezone(current_timezone)
+            representation = value.isoformat()
+            if representation.endswith('+00:00'):
+                representation = representation[:-6] + 'Z'
+            return representation
+        return to_representation
+
+
+class TimeString(Column):
+    """The time in ISO 8601, like serializers.TimeField."""
+
+    def prepare(self):
+        return lambda value: value.isoformat()
+
+
+class ImageUrl(Column):
+    """The url of the image file, like serializers.CharField(source='image.url')."""
+
+    def prepare(self):
+        storage = self.model._meta.get_field(self.lookup).storage
+        if isinstance(storage, FileSystemStorage):
+            base_url = storage.base_url
+            return lambda name: base_url + filepath_to_uri(name).lstrip('/')
+        return storage.url
+
+
+class ThumbnailUrl(Column):
+    """The url of the thumbnail of the image file, like common.thumbnails.ThumbnailUrlField."""
+
+    def __init__(self, lookup=None, size='small'):
+        super().__init__(lookup)
+        self.size = size
+
+    def prepare(self):
+        storage = self.model._meta.get_field(self.lookup).storage
+        size = self.size
+        if isinstance(storage, FileSystemStorage):
+            base_url = storage.base_url
+            return lambda name: base_url + filepath_to_uri(thumbnail_name(name, size)).lstrip('/') if name else None
+        return lambda name: storage.url(thumbnail_name(name, size)) if name else None
+
+
+class LevelName(Column):
+    async_safe = False
+
+    def prepare(self):
+        level_by_id = get_reference_data().level_by_id
+        return lambda level_id: level_by_id[level_id].name
+
+
+class LevelSection(Column):
+    async_safe = False
+
+    def prepare(self):
+        level_by_id = get_reference_data().level_by_id
+        return lambda level_id: level_by_id[level_id].section
+
+
+class SubjectName(Column):
+    async_safe = False
+
+    def prepare(self):
+        subject_by_id = get_reference_data().subject_by_id
+        return lambda subject_id: subject_by_id[subject_id].name
+
+
+class NotificationMessage(Column):
+    """The text of the notification, its message or its template rendered with its params, like its text property."""
+
+    def lookups(self):
+        return ('message', 'template', 'params')
+
+    def prepare(self):
+        return lambda values: render_message(*values)
+
+
+class Projection:
+    model = None
+    columns = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        columns = dict(cls.columns)
+        for name, value in list(vars(cls).items()):
+            if isinstance(value, Column):
+                value.bind(cls, name)
+                columns[name] = value
+        cls.columns = columns
+
+    @classmethod
+    def lookups(cls):
+        return list(dict.fromkeys(lookup for column in cls.columns.values() for lookup in column.lookups()))
+
+    @classmethod
+    def values(cls, queryset):
+        """The values() queryset of the rows of the payload."""
+        return queryset.values(*cls.lookups())
+
+    @classmethod
+    def build(cls, rows):
+        """Build the payload of each row (read with values()) of the page."""
+        converters = [(name, column.getter(), column.prepare()) for name, column in cls.columns.items()]
+        data = []
+        for row in rows:
+            item = {}
+            for name, get_value, to_representation in converters:
+                value = get_value(row)
+                item[name] = value if to_representation is None or value is None else to_representation(value)
+            data.append(item)
+        return data
+
+    @classmethod
+    def data(cls, queryset):
+        return cls.build(cls.values(queryset))
+
+    @classmethod
+    async def adata(cls, queryset):
+        """Async version of data() : the rows are read with the async ORM."""
+        rows = [row async for row in cls.values(queryset)]
+        if all(column.async_safe for column in cls.columns.values()):
+            return cls.build(rows)
+        return await sync_to_async(cls.build)(rows)
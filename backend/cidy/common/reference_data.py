@@ -0,0 +1,138 @@
+"""
+In-process registry of the static reference data (levels and subjects).
+
+The Level and Subject tables are only written by setup_db.py, so instead of
+querying them on every request each worker loads them once and serves the
+lookups from memory. The loaded snapshot is tagged with a version made of
+settings.REFERENCE_DATA_VERSION and a counter kept in the default cache, which
+is shared by the workers in production (REDIS_URL, see cidy/settings.py) :
+bumping the counter (setup_db.py does it after reseeding) makes every worker
+reload the snapshot within REFERENCE_DATA_CHECK_INTERVAL seconds. With the
+in-memory cache of development the bump only reaches its own process, so the
+running server has to be restarted (or REFERENCE_DATA_VERSION bumped).
+"""
+import threading
+import time
+from types import MappingProxyType
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from teacher.models import Level, Subject
+
+VERSION_CACHE_KEY = 'reference_data_version'
+
+_lock = threading.Lock()
+_snapshot = None
+_checked_at = 0.0
+
+
+def _settings_version():
+    return getattr(settings, 'REFERENCE_DATA_VERSION', 1)
+
+
+def _check_interval():
+    return getattr(settings, 'REFERENCE_DATA_CHECK_INTERVAL', 60)
+
+
+def _shared_version():
+    return cache.get(VERSION_CACHE_KEY, 0)
+
+
+def _current_version():
+    return (_settings_version(), _shared_version())
+
+
+class ReferenceData:
+    """Immutable snapshot of the levels and subjects with their lookup indexes."""
+
+    def __init__(self, levels, subjects, version):
+        self.version = version
+        self.levels = tuple(levels)
+        self.subjects = tuple(subjects)
+
+        self.level_by_id = MappingProxyType({level.id: level for level in self.levels})
+        self.level_by_name_and_section = MappingProxyType({
+            (level.name, level.section): level for level in self.levels
+        })
+        self.level_id_by_name = MappingProxyType({
+            level.name: level.id for level in self.levels if not level.section
+        })
+        self.subject_by_id = MappingProxyType({subject.id: subject for subject in self.subjects})
+        self.subject_id_by_name = MappingProxyType({subject.name: subject.id for subject in self.subjects})
+        self.subject_names_by_level_id = MappingProxyType({
+            level.id: tuple(subject.name for subject in level.subjects.all()) for level in self.levels
+        })
+
+    @classmethod
+    def load(cls, version):
+        # prefetch the subjects so that level.subjects.all() never hits the database afterwards
+        levels = Level.objects.prefetch_related('subjects').order_by('order', 'id')
+        subjects = Subject.objects.order_by('id')
+        return cls(list(levels), list(subjects), version)
+
+    def get_level(self, name, section=''):
+        """Return the level with the given name and section or None."""
+        return self.level_by_name_and_section.get((name, section or ''))
+
+    def get_level_by_id(self, level_id):
+        return self.level_by_id.get(level_id)
+
+    def get_subject(self, name):
+        subject_id = self.subject_id_by_name.get(name)
+        return self.subject_by_id.get(subject_id) if subject_id is not None else None
+
+    def get_level_subject_names(self, level):
+        return self.subject_names_by_level_id.get(level.id, ())
+
+
+def get_reference_data():
+    """Return the reference data snapshot of this worker, (re)loading it if it's stale."""
+    global _snapshot, _checked_at
+
+    snapshot = _snapshot
+    now = time.monotonic()
+    if snapshot is not None and now - _checked_at < _check_interval():
+        return snapshot
+
+    version = _current_version()
+    if snapshot is not None and snapshot.version == version:
+        _checked_at = now
+        return snapshot
+
+    with _lock:
+        if _snapshot is None or _snapshot.version != version:
+            _snapshot = ReferenceData.load(version)
+        _checked_at = now
+        return _snapshot
+
+
+def invalidate_reference_data():
+    """Drop the snapshot of this worker, the next lookup will reload it."""
+    global _snapshot, _checked_at
+    with _lock:
+        _snapshot = None
+        _checked_at = 0.0
+
+
+def bump_reference_data_version():
+    """Make every worker sharing the default cache reload the reference data (this process right away)."""
+    try:
+        cache.incr(VERSION_CACHE_KEY)
+    except ValueError:
+        cache.set(VERSION_CACHE_KEY, 1, timeout=None)
+    invalidate_reference_data()
+
+
+@receiver([post_save, post_delete], sender=Level)
+@receiver([post_save, post_delete], sender=Subject)
+def reference_data_changed(sender, **kwargs):
+    bump_reference_data_version()
+
+
+@receiver(m2m_changed, sender=Level.subjects.through)
+def level_subjects_changed(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_reference_data_version()
@@ -0,0 +1,51 @@
+"""
+JSON renderer backed by orjson (when it's installed).
+
+orjson serializes the dicts, lists, strings, numbers, dates, times and
+datetimes of the responses natively, the other values (Decimal, lazy
+strings, ...) are handed to the encoder of DRF, so the output is byte for
+byte the one of rest_framework.renderers.JSONRenderer.
+Without orjson, or for the indented output of the browsable API, it falls
+back to JSONRenderer.
+"""
+from decimal import Decimal
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    # the dates, times and datetimes are encoded natively in the DRF format (isoformat, with Z for UTC),
+    # and the dict keys like the ids of the outcomes are converted to strings like json.dumps does
+    ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+_encoder = encoders.JSONEncoder()
+
+
+def encode_default(obj):
+    # Decimal (the most common value handed over) is encoded to a float like the DRF encoder does
+    if type(obj) is Decimal:
+        return float(obj)
+    return _encoder.default(obj)
+
+
+class FastJSONRenderer(JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(data, default=encode_default, option=ORJSON_OPTIONS)
+        # escape \u2028 and \u2029 like JSONRenderer so the output is a strict javascript subset
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
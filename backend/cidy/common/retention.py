@@ -0,0 +1,65 @@
+"""
+Retention of the notifications of the teachers, the students and the parents.
+
+The notifications were never deleted : a long-lived account keeps every
+message it ever received, and the tables and their (owner, id) indexes keep
+growing with them. The read notifications older than their role's TTL
+(settings.NOTIFICATION_RETENTION_DAYS, None keeps them) are now deleted by a
+background job : the purge_notifications command (a daily cron job) enqueues
+it and run_jobs deletes the rows by chunks with purge_in_chunks. The unread
+notifications are kept whatever their age, so the unread counters stay right.
+
+The ids grow with created_at, so the rows to delete are selected by an id
+bound (the last id created before the cutoff, found on the primary key)
+rather than by a scan of created_at, which has no index.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from parent.models import ParentNotification
+from student.models import StudentNotification
+from teacher.models import TeacherNotification
+from .jobs import enqueue_job, job_handler, purge_in_chunks
+from .models import Job
+
+PURGE_NOTIFICATIONS = 'purge_notifications'
+NOTIFICATION_MODELS = {
+    'teacher': TeacherNotification,
+    'student': StudentNotification,
+    'parent': ParentNotification,
+}
+
+
+def _retention_days():
+    return getattr(settings, 'NOTIFICATION_RETENTION_DAYS', {'teacher': 90, 'student': 60, 'parent': 60})
+
+
+def expired_notifications(now=None):
+    """The querysets (one per role with a TTL) of the read notifications older than the TTL of their role."""
+    now = now or timezone.now()
+    querysets = []
+    for role, model in NOTIFICATION_MODELS.items():
+        days = _retention_days().get(role)
+        if days is None:
+            continue
+        last_expired_id = (model.objects.filter(created_at__lt=now - timedelta(days=days))
+                                        .order_by('-id')
+                                        .values_list('id', flat=True)
+                                        .first())
+        if last_expired_id is not None:
+            querysets.append(model.objects.filter(id__lte=last_expired_id, is_read=True).order_by('id'))
+    return querysets
+
+
+@job_handler(PURGE_NOTIFICATIONS)
+def purge_notifications(job):
+    purge_in_chunks(job, expired_notifications())
+
+
+def schedule_notifications_purge():
+    """Enqueue the purge of the expired notifications, unless one is already waiting or running (then return None)."""
+    if Job.objects.filter(kind=PURGE_NOTIFICATIONS, status__in=('pending', 'running')).exists():
+        return None
+    return enqueue_job(PURGE_NOTIFICATIONS)
@@ -0,0 +1,145 @@
+"""
+Routing of the reads of the read-only endpoints to a replica of the database.
+
+The views decorated with @read_from_replica (the dashboard, the lists and
+the notification reads) run their queries on the settings.REPLICA_DATABASE
+alias, every other query (and every write) goes to the primary. A replica
+lags behind the primary, so after a user's own mutation his reads stay on
+the primary for REPLICA_STICKY_SECONDS (read-your-writes) : the
+ReplicaPinningMiddleware pins the users whose unsafe request succeeded. The
+pins are kept in the default cache, which the workers share in production
+(REDIS_URL, checked by `manage.py check --deploy`) : the next request of the
+user may be served by any of them.
+
+Without REPLICA_DATABASE (the default) the decorator doesn't change anything.
+"""
+import contextvars
+import functools
+import inspect
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PIN_CACHE_KEY = 'replica_pin:{}'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# (alias, depth) : the reads of the current request (or task) are routed to the alias
+# unless a transaction has been opened on the primary since (depth is the number of atomic blocks at the start)
+_read_route = contextvars.ContextVar('read_route', default=None)
+
+
+def get_replica_alias():
+    return getattr(settings, 'REPLICA_DATABASE', None)
+
+
+def _sticky_seconds():
+    return getattr(settings, 'REPLICA_STICKY_SECONDS', 10)
+
+
+def pin_to_primary(user_id):
+    """Serve the reads of the user from the primary for the sticky window (after he has written)."""
+    cache.set(PIN_CACHE_KEY.format(user_id), True, _sticky_seconds())
+
+
+async def apin_to_primary(user_id):
+    """Async version of pin_to_primary()."""
+    await cache.aset(PIN_CACHE_KEY.format(user_id), True, _sticky_seconds())
+
+
+def is_pinned_to_primary(user_id):
+    return cache.get(PIN_CACHE_KEY.format(user_id), False)
+
+
+def read_from_replica(view):
+    """
+    Run the reads of the view on the replica, unless the user has written recently.
+
+    Applied under @api_view / @permission_classes (or @async_api_view for the
+    async views) so that request.user is the authenticated user.
+    """
+    if inspect.iscoroutinefunction(view):
+        @functools.wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            alias = get_replica_alias()
+            user = request.user
+            if alias is None or (user.is_authenticated and await cache.aget(PIN_CACHE_KEY.format(user.pk), False)):
+                return await view(request, *args, **kwargs)
+
+            # the context (so the route) is copied to the threads running the queries of the async ORM
+            token = _read_route.set((alias, 0))
+            try:
+                return await view(request, *args, **kwargs)
+            finally:
+                _read_route.reset(token)
+        return async_wrapper
+
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        alias = get_replica_alias()
+        user = request.user
+        if alias is None or (user.is_authenticated and is_pinned_to_primary(user.pk)):
+            return view(request, *args, **kwargs)
+
+        token = _read_route.set((alias, len(connections[DEFAULT_DB_ALIAS].atomic_blocks)))
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _read_route.reset(token)
+    return wrapper
+
+
+class ReplicaRouter:
+    """Routes the reads to the alias set by @read_from_replica, everything else to the primary."""
+
+    def db_for_read(self, model, **hints):
+        route = _read_route.get()
+        if route is None:
+            return None
+        alias, depth = route
+        # a read inside a transaction opened by the view must see its writes
+        if len(connections[DEFAULT_DB_ALIAS].atomic_blocks) > depth:
+            return None
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # the replica holds the same rows as the primary
+        return True
+
+
+class ReplicaPinningMiddleware:
+    """Pins to the primary the users whose unsafe request succeeded."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        user = self.user_to_pin(request, response)
+        if user is not None:
+            pin_to_primary(user.pk)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        user = self.user_to_pin(request, response)
+        if user is not None:
+            await apin_to_primary(user.pk)
+        return response
+
+    def user_to_pin(self, request, response):
+        if get_replica_alias() is None or request.method in SAFE_METHODS or response.status_code >= 400:
+            return None
+        # DRF sets the user it authenticated on the django request
+        user = getattr(request, 'user', None)
+        return user if user is not None and user.is_authenticated else None
@@ -0,0 +1,129 @@
+"""
+Name search (students, groups and teachers).
+
+The searchable models keep a normalized copy of their name in a search_name
+column (accent folded, lowercased, see normalize_search_text()) which is
+maintained on save by SearchableModel. On PostgreSQL the column is covered by
+a pg_trgm GIN index, so both the substring (LIKE '%...%') and the fuzzy
+(word similarity) matches are served by the index. On the other databases
+(SQLite in development) search() falls back to plain substring matches.
+"""
+import re
+import unicodedata
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import BooleanField, Case, FloatField, Func, IntegerField, Q, Value, When
+from django.db.models.functions import Cast
+
+# arabic letters with several spellings, folded to their most common form
+ARABIC_LETTERS_FOLDING = str.maketrans({
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',
+    'ى': 'ي',
+    'ة': 'ه',
+    'ؤ': 'و',
+    'ئ': 'ي',
+    'ـ': None,  # tatweel
+})
+
+_spaces = re.compile(r'\s+')
+
+
+def normalize_search_text(text):
+    """Return the text lowercased, without accents (french) or diacritics (arabic) and with single spaces."""
+    if not text:
+        return ''
+    text = unicodedata.normalize('NFKD', str(text))
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    text = text.translate(ARABIC_LETTERS_FOLDING).casefold()
+    return _spaces.sub(' ', text).strip()
+
+
+class TrigramWordSimilar(Func):
+    """`word <% column` : true when the word is similar to a word of the column (uses the GIN index)."""
+    arg_joiner = ' <%% '
+    template = '%(expressions)s'
+    output_field = BooleanField()
+
+
+class TrigramWordSimilarity(Func):
+    function = 'WORD_SIMILARITY'
+    output_field = FloatField()
+
+
+def _uses_trigrams(queryset):
+    return connections[queryset.db].vendor == 'postgresql' and getattr(settings, 'SEARCH_FUZZY', True)
+
+
+def search(queryset, term, field='search_name'):
+    """Filter the queryset on the names matching the search term and rank them.
+
+    Every word of the term must be found in the name (as a substring, or on
+    PostgreSQL as a similar word to tolerate typos). The results are annotated
+    with search_rank (exact name > name prefix > word prefix > other matches,
+    then the trigram similarity) and ordered by it.
+    """
+    normalized_term = normalize_search_text(term)
+    if not normalized_term:
+        return queryset
+
+    fuzzy = _uses_trigrams(queryset)
+    for word in normalized_term.split(' '):
+        condition = Q(**{f'{field}__contains': word})
+        if fuzzy:
+            condition |= Q(TrigramWordSimilar(Value(word), field))
+        queryset = queryset.filter(condition)
+
+    rank = Case(
+        When(**{field: normalized_term}, then=Value(300)),
+        When(**{f'{field}__startswith': normalized_term}, then=Value(200)),
+        When(Q(**{f'{field}__contains': f' {normalized_term}'}), then=Value(100)),
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+    if fuzzy:
+        rank = Cast(rank, FloatField()) + TrigramWordSimilarity(Value(normalized_term), field)
+
+    ordering = queryset.query.order_by or queryset.model._meta.ordering
+    return queryset.annotate(search_rank=rank).order_by('-search_rank', *ordering)
+
+
+def trigram_index_operations(app_label, model_name, field='search_name'):
+    """Migration operations creating the pg_trgm GIN index of the search column (PostgreSQL only)."""
+    from django.db import migrations
+
+    def index_name(model):
+        return f'{model._meta.db_table}_{field}_trgm'
+
+    def create_index(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        model = apps.get_model(app_label, model_name)
+        column = model._meta.get_field(field).column
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {index_name(model)} '
+            f'ON {schema_editor.quote_name(model._meta.db_table)} USING gin ({schema_editor.quote_name(column)} gin_trgm_ops)'
+        )
+
+    def drop_index(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        model = apps.get_model(app_label, model_name)
+        schema_editor.execute(f'DROP INDEX IF EXISTS {index_name(model)}')
+
+    return [migrations.RunPython(create_index, drop_index)]
+
+
+def fill_search_name_operations(app_label, model_name, source_field, field='search_name'):
+    """Migration operations computing the search column of the existing rows."""
+    from django.db import migrations
+
+    def fill(apps, schema_editor):
+        model = apps.get_model(app_label, model_name)
+        objs = list(model._base_manager.only('pk', source_field))
+        for obj in objs:
+            setattr(obj, field, normalize_search_text(getattr(obj, source_field)))
+        model._base_manager.bulk_update(objs, [field], batch_size=1000)
+
+    return [migrations.RunPython(fill, migrations.RunPython.noop)]
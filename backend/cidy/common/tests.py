@@ -1,3 +1,609 @@
-from django.test import TestCase
+import datetime
+import gzip
+import inspect
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import zlib
+from decimal import Decimal
 
-# Create your tests here.
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.signals import request_started
+from django.db import connection, router, transaction
+from django.db.backends.signals import connection_created
+from django.core.handlers.asgi import ASGIHandler
+from django.test import AsyncClient, RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from account.authentication import get_access_token
+from account.models import User
+from parent.models import Parent, ParentNotification
+from student.models import Student, StudentNotification
+from teacher.models import Level, Subject, Teacher, TeacherNotification, TeacherUnreadNotification
+from common.reference_data import VERSION_CACHE_KEY, get_reference_data, invalidate_reference_data
+from common.checks import check_shared_cache
+from common.search import normalize_search_text, search
+from common.parsers import FastJSONParser
+from common.renderers import FastJSONRenderer
+from common.instrumentation import get_metrics, reset_metrics
+from common.routers import ReplicaPinningMiddleware, is_pinned_to_primary, pin_to_primary, read_from_replica
+from common.thumbnails import thumbnail_name
+from common.files import StaticFilesMiddleware
+from common.idempotency import IdempotencyMiddleware
+from common.models import IdempotencyKey, Job
+from common.jobs import claim_next_job, run_job
+from common.retention import PURGE_NOTIFICATIONS, expired_notifications
+from common.notifications import TEMPLATES, compile_template, render_template
+from common.pdf import Column, table_pdf
+from common.exports import stream_csv
+from teacher.serializers import TeacherAccountInfoSerializer
+from student.serializers import StudentNotificationProjection, StudentNotificationSerializer
+
+
+class ReferenceDataTestCase(TestCase):
+    def setUp(self):
+        invalidate_reference_data()
+        self.math = Subject.objects.create(name='Mathématiques')
+        self.physics = Subject.objects.create(name='Physique')
+        self.primary = Level.objects.create(name='Sixième année primaire', order=1)
+        self.bac_math = Level.objects.create(name='Quatrième année secondaire', section='Mathématiques', order=2)
+        self.primary.subjects.add(self.math)
+        self.bac_math.subjects.add(self.math, self.physics)
+
+    def tearDown(self):
+        invalidate_reference_data()
+
+    def test_lookups_are_served_from_memory(self):
+        get_reference_data()
+        with self.assertNumQueries(0):
+            reference_data = get_reference_data()
+            self.assertEqual(reference_data.get_level('Sixième année primaire'), self.primary)
+            self.assertEqual(reference_data.get_level('Quatrième année secondaire', 'Mathématiques'), self.bac_math)
+            self.assertIsNone(reference_data.get_level('Quatrième année secondaire', 'Sport'))
+            self.assertEqual(reference_data.level_id_by_name['Sixième année primaire'], self.primary.id)
+            self.assertEqual(reference_data.get_subject('Physique'), self.physics)
+            self.assertEqual(list(reference_data.get_level_subject_names(self.bac_math)), ['Mathématiques', 'Physique'])
+            self.assertEqual([level.id for level in reference_data.levels], [self.primary.id, self.bac_math.id])
+
+    def test_indexes_are_read_only(self):
+        reference_data = get_reference_data()
+        with self.assertRaises(TypeError):
+            reference_data.level_by_id[0] = self.primary
+
+    def test_seed_change_reloads_the_registry(self):
+        reference_data = get_reference_data()
+        level = Level.objects.create(name='Septième année de base', order=3)
+        self.assertIsNot(get_reference_data(), reference_data)
+        self.assertEqual(get_reference_data().get_level('Septième année de base'), level)
+
+    @override_settings(REFERENCE_DATA_CHECK_INTERVAL=0)
+    def test_settings_version_bump_reloads_the_registry(self):
+        reference_data = get_reference_data()
+        with override_settings(REFERENCE_DATA_VERSION=reference_data.version[0] + 1):
+            self.assertIsNot(get_reference_data(), reference_data)
+
+    @override_settings(REFERENCE_DATA_CHECK_INTERVAL=0)
+    def test_shared_version_bump_reloads_the_registry(self):
+        reference_data = get_reference_data()
+        # bumped by another process (setup_db.py) : this one only sees the shared counter change
+        cache.set(VERSION_CACHE_KEY, cache.get(VERSION_CACHE_KEY, 0) + 1, timeout=None)
+        self.assertIsNot(get_reference_data(), reference_data)
+
+
+class SharedCacheCheckTestCase(TestCase):
+    LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    REDIS = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://localhost:6379/0'}}
+
+    def test_process_local_cache_is_refused_by_the_deploy_checks(self):
+        with override_settings(CACHES=self.LOCMEM):
+            self.assertEqual([error.id for error in check_shared_cache(None)], ['common.E001'])
+        with override_settings(CACHES=self.REDIS):
+            self.assertEqual(check_shared_cache(None), [])
+
+
+class SearchTestCase(TestCase):
+    def setUp(self):
+        self.level = Level.objects.create(name='Septième année de base', order=1)
+        for fullname in ['Hélène Ben Salah', 'Ben Ali Amine', 'Amine Trabelsi', 'أحمد بن علي', 'Salah Eddine']:
+            Student.objects.create(fullname=fullname, level=self.level)
+
+    def test_normalize_search_text(self):
+        self.assertEqual(normalize_search_text('  Hélène   BEN  Ṣalah '), 'helene ben salah')
+        self.assertEqual(normalize_search_text('أَحْمَد إبراهيم مدرسة'), 'احمد ابراهيم مدرسه')
+        self.assertEqual(normalize_search_text(None), '')
+
+    def test_search_name_is_maintained_on_save(self):
+        student = Student.objects.get(fullname='Hélène Ben Salah')
+        self.assertEqual(student.search_name, 'helene ben salah')
+        student.fullname = 'Élise'
+        student.save(update_fields=['fullname'])
+        student.refresh_from_db()
+        self.assertEqual(student.search_name, 'elise')
+
+    def test_search_matches_accent_folded_words(self):
+        names = lambda term: [student.fullname for student in search(Student.objects.all(), term)]
+        self.assertEqual(names('HELENE'), ['Hélène Ben Salah'])
+        self.assertEqual(names('salah ben'), ['Hélène Ben Salah'])
+        self.assertEqual(names('احمد'), ['أحمد بن علي'])
+        self.assertEqual(names(''), [student.fullname for student in Student.objects.all()])
+
+    def test_search_ranks_prefix_matches_first(self):
+        names = [student.fullname for student in search(Student.objects.all(), 'amine')]
+        self.assertEqual(names, ['Amine Trabelsi', 'Ben Ali Amine'])
+        names = [student.fullname for student in search(Student.objects.all(), 'sal')]
+        self.assertEqual(names, ['Salah Eddine', 'Hélène Ben Salah'])
+
+
+class FastJSONTestCase(TestCase):
+    def test_renders_like_the_default_renderer(self):
+        data = {
+            'amount': Decimal('12.50'),
+            'date': datetime.date(2025, 3, 1),
+            'time': datetime.time(8, 30),
+            'naive': datetime.datetime(2025, 3, 1, 8, 30, 15, 120000),
+            'utc': datetime.datetime(2025, 3, 1, 8, 30, tzinfo=datetime.timezone.utc),
+            'offset': datetime.datetime(2025, 3, 1, 8, 30, tzinfo=datetime.timezone(datetime.timedelta(hours=1))),
+            'outcomes': {1: 'deleted', 2: 'not_found'},
+            'message': 'Élève inscrit \u2028 ligne',
+            'items': [1, 2.5, None, True],
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+    def test_parses_json(self):
+        stream = io.BytesIO('{"student_ids": [1, 2], "fullname": "Hélène"}'.encode())
+        self.assertEqual(FastJSONParser().parse(stream), {'student_ids': [1, 2], 'fullname': 'Hélène'})
+
+
+class ConnectionMetricsTestCase(TestCase):
+    def setUp(self):
+        reset_metrics()
+
+    def test_requests_and_connections_are_counted(self):
+        request_started.send(sender=self.__class__)
+        request_started.send(sender=self.__class__)
+        # a new connection is counted for its alias
+        connection_created.send(sender=connection.__class__, connection=connection)
+
+        metrics = get_metrics()
+        self.assertEqual((metrics['requests'], metrics['connections_opened']), (2, 1))
+        self.assertEqual(metrics['connections_opened_per_request'], 0.5)
+        self.assertEqual(metrics['databases']['default']['connections_opened'], 1)
+        self.assertIsNone(metrics['databases']['default']['pool_stats'])
+
+    def test_metrics_endpoint_is_restricted_to_the_staff(self):
+        client = APIClient()
+        user = User.objects.create_user('user@test.com', '11111111', 'testpass123')
+        client.force_authenticate(user)
+        self.assertEqual(client.get('/api/metrics/').status_code, 403)
+
+        user.staff = True
+        user.save()
+        response = client.get('/api/metrics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('connections_opened', response.data)
+
+
+@override_settings(REPLICA_DATABASE='replica')
+class ReplicaRoutingTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('teacher@test.com', '11111111', 'testpass123')
+        self.request = RequestFactory().get('/')
+        self.request.user = self.user
+
+    def tearDown(self):
+        # forget the pins
+        cache.clear()
+
+    @staticmethod
+    @read_from_replica
+    def read_alias_view(request):
+        return router.db_for_read(TeacherNotification)
+
+    def test_the_reads_of_the_decorated_views_go_to_the_replica(self):
+        self.assertEqual(self.read_alias_view(self.request), 'replica')
+        # the writes and the reads outside of the decorated views stay on the primary
+        self.assertEqual(router.db_for_write(TeacherNotification), 'default')
+        self.assertEqual(router.db_for_read(TeacherNotification), 'default')
+
+    def test_the_reads_inside_a_transaction_stay_on_the_primary(self):
+        @read_from_replica
+        def view(request):
+            with transaction.atomic():
+                return router.db_for_read(TeacherNotification)
+
+        self.assertEqual(view(self.request), 'default')
+
+    def test_the_reads_of_a_user_who_has_written_stay_on_the_primary(self):
+        pin_to_primary(self.user.pk)
+        self.assertEqual(self.read_alias_view(self.request), 'default')
+
+    def test_a_pin_is_seen_by_the_other_workers(self):
+        # another process sharing the cache (Redis in production, a directory here) routes the reads of the user
+        child = (
+            "import sys, django; django.setup()\n"
+            "from django.db import router\n"
+            "from django.test import RequestFactory, override_settings\n"
+            "from account.models import User\n"
+            "from common.routers import read_from_replica\n"
+            "from teacher.models import TeacherNotification\n"
+            "view = read_from_replica(lambda request: router.db_for_read(TeacherNotification))\n"
+            "request = RequestFactory().get('/')\n"
+            "request.user = User(pk=int(sys.argv[2]))\n"
+            "caches = {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': sys.argv[1]}}\n"
+            "with override_settings(CACHES=caches, REPLICA_DATABASE='replica'):\n"
+            "    print(view(request))\n"
+        )
+
+        def read_alias_in_another_worker(location):
+            result = subprocess.run([sys.executable, '-c', child, location, str(self.user.pk)], cwd=settings.BASE_DIR,
+                                    capture_output=True, text=True, check=True)
+            return result.stdout.strip()
+
+        with tempfile.TemporaryDirectory() as location:
+            shared = {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location}}
+            with override_settings(CACHES=shared):
+                self.assertEqual(read_alias_in_another_worker(location), 'replica')
+                pin_to_primary(self.user.pk)
+                self.assertEqual(read_alias_in_another_worker(location), 'default')
+
+    @override_settings(REPLICA_DATABASE=None)
+    def test_no_routing_without_replica(self):
+        self.assertEqual(self.read_alias_view(self.request), 'default')
+
+    def test_a_successful_mutation_pins_the_user(self):
+        teacher = Teacher.objects.create(user=self.user, fullname='Teacher')
+        TeacherUnreadNotification.objects.get_or_create(teacher=teacher)
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        # a failed mutation doesn't
+        response = client.put('/api/teacher/notifications/mark_as_read/', {'last_notification_id': 'x'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(is_pinned_to_primary(self.user.pk))
+
+        response = client.put('/api/teacher/notifications/mark_as_read/', {'last_notification_id': 1}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(is_pinned_to_primary(self.user.pk))
+
+
+class ThumbnailsTestCase(TestCase):
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name, THUMBNAIL_FORMAT='WEBP')
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def upload(self, size=(1200, 800), color='red'):
+        content = io.BytesIO()
+        Image.new('RGB', size, color).save(content, 'JPEG')
+        return SimpleUploadedFile('scaled_image_picker.JPG', content.getvalue(), content_type='image/jpeg')
+
+    def create_teacher(self, email, image):
+        user = User.objects.create_user(email, email[:8].rjust(8, '0'), 'testpass123')
+        return Teacher.objects.create(user=user, fullname='Teacher', image=image)
+
+    def test_uploads_are_stored_under_their_content_hash_with_their_thumbnails(self):
+        teacher = self.create_teacher('teacher1@test.com', self.upload())
+        self.assertRegex(teacher.image.name, r'^teacher_images/[0-9a-f]{16}\.jpg$')
+
+        for size, width in (('small', 96), ('medium', 256)):
+            with default_storage.open(thumbnail_name(teacher.image.name, size)) as thumbnail, Image.open(thumbnail) as image:
+                self.assertEqual((image.format, image.size), ('WEBP', (width, width)))
+
+        # the same picture is stored once, another one gets another name
+        self.assertEqual(self.create_teacher('teacher2@test.com', self.upload()).image.name, teacher.image.name)
+        self.assertNotEqual(self.create_teacher('teacher3@test.com', self.upload(color='blue')).image.name, teacher.image.name)
+
+    def test_serializers_expose_the_thumbnail_urls(self):
+        teacher = self.create_teacher('teacher1@test.com', self.upload())
+        data = TeacherAccountInfoSerializer(teacher).data
+        stem = os.path.splitext(teacher.image.name)[0]
+        self.assertEqual(data['image'], f'/media/{teacher.image.name}')
+        self.assertEqual(data['thumbnail'], f'/media/thumbnails/{stem}-256.webp')
+
+    def test_generate_thumbnails_covers_the_stored_pictures(self):
+        content = io.BytesIO()
+        Image.new('RGBA', (500, 500), (0, 0, 255, 128)).save(content, 'PNG')
+        default_storage.save('defaults/teacher.png', content)
+
+        with override_settings(THUMBNAIL_FORMAT='JPEG'):
+            call_command('generate_thumbnails', stdout=io.StringIO(), stderr=io.StringIO())
+            name = thumbnail_name('defaults/teacher.png', 'small')
+        self.assertEqual(name, 'thumbnails/defaults/teacher-96.jpg')
+        self.assertTrue(default_storage.exists(name))
+
+    def test_thumbnails_are_served_with_a_long_cache_lifetime(self):
+        teacher = self.create_teacher('teacher1@test.com', self.upload())
+        response = self.client.get(f'/media/{thumbnail_name(teacher.image.name, "small")}')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('max-age=31536000', response['Cache-Control'])
+
+
+class FileServingTestCase(TestCase):
+    """The static files are served precompressed and cached, the media files handed to the web server."""
+
+    def setUp(self):
+        static_root, sources, media_root = (tempfile.TemporaryDirectory() for _ in range(3))
+        for directory in (static_root, sources, media_root):
+            self.addCleanup(directory.cleanup)
+        self.css = b'.avatar { border-radius: 50%; }\n' * 100
+        with open(os.path.join(sources.name, 'app.css'), 'wb') as file:
+            file.write(self.css)
+        os.makedirs(os.path.join(media_root.name, 'teacher_images'))
+        with open(os.path.join(media_root.name, 'teacher_images', '3f2a9c0e5b7d1a4c.jpg'), 'wb') as file:
+            file.write(b'picture')
+        self.media_root = media_root.name
+
+        settings_override = override_settings(
+            STATIC_ROOT=static_root.name, STATICFILES_DIRS=[sources.name], MEDIA_ROOT=media_root.name,
+            STATICFILES_FINDERS=['django.contrib.staticfiles.finders.FileSystemFinder'],
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        call_command('collectstatic', interactive=False, verbosity=0)
+        with open(os.path.join(static_root.name, 'staticfiles.json')) as file:
+            self.hashed_name = json.load(file)['paths']['app.css']
+
+    def test_collectstatic_writes_the_compressed_copies(self):
+        self.assertNotEqual(self.hashed_name, 'app.css')
+        middleware = StaticFilesMiddleware(lambda request: None)
+        static_file = middleware.files[f'/static/{self.hashed_name}']
+        self.assertEqual([variant[0] for variant in static_file.variants][-2:], ['gzip', None])
+
+    def test_static_files_are_served_compressed_and_immutable(self):
+        response = self.client.get(f'/static/{self.hashed_name}', headers={'Accept-Encoding': 'gzip, deflate'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css; charset=utf-8')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), self.css)
+
+        response = self.client.get(f'/static/{self.hashed_name}', headers={'Accept-Encoding': 'gzip', 'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+    async def test_static_files_are_served_by_the_async_stack(self):
+        response = await AsyncClient().get(f'/static/{self.hashed_name}', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual((response.status_code, response['Content-Encoding']), (200, 'gzip'))
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), self.css)
+
+    def test_unhashed_static_files_are_revalidated(self):
+        response = self.client.get('/static/app.css', headers={'Accept-Encoding': 'br;q=0'})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(b''.join(response.streaming_content), self.css)
+        self.assertEqual(response['Cache-Control'], 'public, max-age=60')
+        self.assertEqual(self.client.post('/static/app.css').status_code, 405)
+
+    def test_media_files_are_handed_to_the_web_server(self):
+        with override_settings(MEDIA_SERVING='x-accel-redirect'):
+            response = self.client.get('/media/teacher_images/3f2a9c0e5b7d1a4c.jpg')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['X-Accel-Redirect'], '/protected-media/teacher_images/3f2a9c0e5b7d1a4c.jpg')
+            self.assertEqual(response['Content-Type'], 'image/jpeg')
+            self.assertEqual(response.content, b'')
+            self.assertIn('immutable', response['Cache-Control'])
+            self.assertEqual(self.client.get('/media/teacher_images/missing.jpg').status_code, 404)
+            self.assertEqual(self.client.get('/media/../manage.py').status_code, 404)
+
+        with override_settings(MEDIA_SERVING='x-sendfile'):
+            response = self.client.get('/media/teacher_images/3f2a9c0e5b7d1a4c.jpg')
+            self.assertEqual(response['X-Sendfile'], os.path.join(self.media_root, 'teacher_images', '3f2a9c0e5b7d1a4c.jpg'))
+
+        response = self.client.get('/media/teacher_images/3f2a9c0e5b7d1a4c.jpg')
+        self.assertEqual(b''.join(response.streaming_content), b'picture')
+
+
+class IdempotencyTestCase(TestCase):
+    """The mutating requests sent again with the same Idempotency-Key are replayed."""
+
+    def setUp(self):
+        self.level = Level.objects.create(name='Septième année de base', order=1)
+        invalidate_reference_data()
+        self.user = User.objects.create_user('teacher@test.com', '11111111', 'testpass123')
+        Teacher.objects.create(user=self.user, fullname='Teacher')
+        self.authorization = f'Bearer {get_access_token(self.user)}'
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=self.authorization)
+
+    def student_data(self, fullname='Amine'):
+        return {'fullname': fullname, 'phone_number': '22222222', 'gender': 'M', 'level': self.level.name, 'section': ''}
+
+    def create_student(self, key, fullname='Amine'):
+        return self.client.post('/api/teacher/students/create/', self.student_data(fullname), format='json',
+                                HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_replay(self):
+        response = self.create_student('key-1')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Idempotent-Replayed', response)
+
+        replayed = self.create_student('key-1')
+        self.assertEqual((replayed.status_code, replayed['Idempotent-Replayed']), (200, 'true'))
+        self.assertEqual(replayed.content, response.content)
+        self.assertEqual(Student.objects.count(), 1)
+
+        # another key runs the view (and fails on the phone number), the same key for another request is refused
+        self.assertEqual(self.create_student('key-2').status_code, 400)
+        self.assertEqual(self.create_student('key-1', fullname='Yasmine').status_code, 422)
+        self.assertEqual(IdempotencyKey.objects.filter(user=self.user).count(), 2)
+
+    def test_in_progress_and_expired_keys(self):
+        record = IdempotencyKey.objects.create(user=self.user, key='key-1', fingerprint='')
+        self.assertEqual(self.create_student('key-1').status_code, 409)
+
+        # a request left in progress by a dead worker frees its key
+        IdempotencyKey.objects.filter(pk=record.pk).update(created_at=timezone.now() - datetime.timedelta(minutes=5))
+        self.assertEqual(self.create_student('key-1').status_code, 200)
+        self.assertEqual(IdempotencyKey.objects.get(key='key-1').status_code, 200)
+
+        IdempotencyKey.objects.update(created_at=timezone.now() - datetime.timedelta(days=2))
+        call_command('purge_idempotency_keys', stdout=io.StringIO())
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    @override_settings(REPLICA_DATABASE='replica')
+    async def test_replay_through_the_async_stack(self):
+        client = AsyncClient()
+
+        async def create_student():
+            return await client.post('/api/teacher/students/create/', self.student_data(), content_type='application/json',
+                                     headers={'Authorization': self.authorization, 'Idempotency-Key': 'key-1'})
+
+        response = await create_student()
+        self.assertEqual(response.status_code, 200)
+        replayed = await create_student()
+        self.assertEqual((replayed.status_code, replayed['Idempotent-Replayed']), (200, 'true'))
+        self.assertEqual(await Student.objects.acount(), 1)
+        # and the ReplicaPinningMiddleware pinned the teacher who created the student
+        self.assertTrue(await cache.aget(f'replica_pin:{self.user.pk}'))
+        await cache.aclear()
+
+    def test_the_middlewares_run_in_the_event_loop(self):
+        # the ASGI handler would wrap a sync only middleware in sync_to_async (a thread per request)
+        middlewares, handler = [], ASGIHandler()._middleware_chain
+        while hasattr(handler, 'get_response'):
+            middleware = inspect.unwrap(handler)
+            middlewares.append(middleware)
+            handler = middleware.get_response
+        self.assertTrue(all(iscoroutinefunction(middleware) for middleware in middlewares))
+        self.assertLessEqual({ReplicaPinningMiddleware, IdempotencyMiddleware}, {type(middleware) for middleware in middlewares})
+
+    def test_ignored_requests(self):
+        # without a key, or a safe method, or without a valid token, the middleware lets the request through
+        self.assertEqual(self.create_student('').status_code, 200)
+        self.assertEqual(self.client.get('/api/teacher/students/', HTTP_IDEMPOTENCY_KEY='key-1').status_code, 200)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer invalid')
+        self.assertEqual(self.create_student('key-1').status_code, 401)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+
+class NotificationRetentionTestCase(TestCase):
+    """The read notifications deleted once older than the TTL of their role."""
+
+    def setUp(self):
+        self.teacher = Teacher.objects.create(user=User.objects.create_user('teacher@test.com', '11111111', 'testpass123'),
+                                              fullname='Teacher')
+        self.student = Student.objects.create(fullname='Student', level=Level.objects.create(name='Level', order=1))
+        self.parent = Parent.objects.create(user=User.objects.create_user('parent@test.com', '22222222', 'testpass123'),
+                                            fullname='Parent')
+        now = timezone.now()
+        for model, owner in ((TeacherNotification, {'teacher': self.teacher}), (StudentNotification, {'student': self.student}),
+                             (ParentNotification, {'parent': self.parent})):
+            for age, is_read in ((200, True), (200, False), (100, True), (10, True)):
+                notification = model.objects.create(message='message', is_read=is_read, **owner)
+                model.objects.filter(id=notification.id).update(created_at=now - datetime.timedelta(days=age))
+
+    @override_settings(NOTIFICATION_RETENTION_DAYS={'teacher': 150, 'student': 60, 'parent': None}, JOBS_PURGE_CHUNK_SIZE=1)
+    def test_purge(self):
+        self.assertEqual([queryset.count() for queryset in expired_notifications()], [1, 2])
+
+        call_command('purge_notifications', stdout=io.StringIO())
+        # not queued twice
+        call_command('purge_notifications', stdout=io.StringIO())
+        self.assertEqual(Job.objects.filter(kind=PURGE_NOTIFICATIONS).count(), 1)
+        job = run_job(claim_next_job())
+        self.assertEqual((job.status, job.processed, job.total), ('done', 3, 3))
+
+        # the unread notifications and the recent ones stay, the parents keep everything
+        self.assertEqual(TeacherNotification.objects.filter(is_read=False).count(), 1)
+        self.assertEqual(TeacherNotification.objects.count(), 3)
+        self.assertEqual(sorted(StudentNotification.objects.values_list('is_read', flat=True)), [False, True])
+        self.assertEqual(ParentNotification.objects.count(), 4)
+        self.assertEqual([queryset.count() for queryset in expired_notifications()], [0, 0])
+
+
+class NotificationTemplatesTestCase(TestCase):
+    """The notifications stored as a template and its params, rendered when read."""
+    params = {'teacher': 'Teacher', 'teacher_gender': 'M', 'subject': 'Physique', 'son': 'Fils', 'child_gender': 'M',
+              'date': '13/10/2025', 'start_time': '10:00', 'end_time': '12:00', 'unpaid_amount': '40.00', 'classes': 2}
+
+    def test_render(self):
+        for template in TEMPLATES:
+            self.assertNotIn('{', render_template(template, self.params))
+        self.assertEqual(
+            render_template('student_attendance_due', self.params),
+            "Votre professeur Teacher a marqué votre présence dans la séance de Physique qui a eu lieu le 13/10/2025 "
+            "de 10:00 à 12:00, et le montant impayé pour cette matière est désormais de 40.00 DT."
+        )
+        self.assertEqual(render_template('parent_payment', {**self.params, 'teacher_gender': 'F', 'child_gender': 'F'}),
+                         "La professeure Teacher a marqué le paiement de votre fille Fils pour 2 séance(s) de Physique.")
+        # parsed once
+        compile_template.cache_clear()
+        render_template('student_absence', self.params)
+        render_template('student_absence', self.params)
+        self.assertEqual(compile_template.cache_info().hits, 1)
+
+    def test_read_paths(self):
+        student = Student.objects.create(fullname='Student', level=Level.objects.create(name='Level', order=1))
+        StudentNotification.objects.create(student=student, message='Ancien message')
+        StudentNotification.objects.create(student=student, template='student_payment', params=self.params)
+        # a template removed since : the message stays shown
+        with self.assertLogs('common.notifications', 'WARNING'):
+            StudentNotification.objects.create(student=student, message='Message', template='unknown', params={}).text
+
+        notifications = StudentNotification.objects.order_by('id')
+        self.assertEqual([notification.text for notification in notifications], [
+            'Ancien message', 'Votre professeur Teacher a marqué votre paiement pour 2 séance(s) de Physique.', 'Message'
+        ])
+        with self.assertLogs('common.notifications', 'WARNING'):
+            data = StudentNotificationProjection.data(notifications)
+            serialized = json.loads(json.dumps(StudentNotificationSerializer(notifications, many=True).data))
+        self.assertEqual(data, serialized)
+
+
+class StreamCSVTestCase(TestCase):
+    def test_formulas_are_written_as_text(self):
+        rows = [('=HYPERLINK("http://evil.test","x")', Decimal('-10.00')), ('+21622222222', -3), ('@SUM(A1)', None),
+                ('-1+1', ''), ('\tcmd', 'Amine'), ('Amine=1', 'a-b')]
+        lines = ''.join(stream_csv(['name', 'amount'], rows)).lstrip('\ufeff').splitlines()
+        self.assertEqual(lines[1:], [
+            '"\'=HYPERLINK(""http://evil.test"",""x"")",-10.00', "'+21622222222,-3", "'@SUM(A1),", "'-1+1,",
+            "'\tcmd,Amine", 'Amine=1,a-b',
+        ])
+
+
+class TablePDFTestCase(TestCase):
+    def unicode_maps(self, pdf):
+        """The text of the ToUnicode maps of the embedded fonts (the glyphs used -> their characters)."""
+        maps = []
+        for part in pdf.split(b'stream\n')[1:]:
+            data = part.split(b'\nendstream')[0]
+            try:
+                data = zlib.decompress(data)
+            except zlib.error:
+                pass
+            if b'beginbfchar' in data:
+                maps.append(data.decode('latin-1'))
+        return '\n'.join(maps)
+
+    def test_arabic_names_are_written_with_the_embedded_font(self):
+        columns = [Column('Nom', 200), Column('Montant', 80, 'right')]
+        pdf = table_pdf('Relevé mensuel 10/2025 - أستاذ', columns, [('محمد علي', '10.00'), ('Amine', '25.00')])
+
+        self.assertTrue(pdf.startswith(b'%PDF-'))
+        self.assertIn(b'/FontFile2', pdf)
+        unicode_maps = self.unicode_maps(pdf)
+        for char in 'محمد علي' + 'é':
+            if char != ' ':
+                self.assertIn('<%04X>' % ord(char), unicode_maps)
+        # the meem is drawn with two glyphs : the letters are joined (its initial and medial forms)
+        self.assertEqual(unicode_maps.count('<0645>'), 2)
+
+    def test_long_tables_continue_on_the_next_pages(self):
+        pdf = table_pdf('Relevé', [Column('Nom', 200)], [('Élève %d' % i,) for i in range(100)])
+        # 31 rows per page under the title and the header
+        self.assertEqual(pdf.count(b'/Type /Page\n'), 4)
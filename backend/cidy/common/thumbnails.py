@@ -0,0 +1,148 @@
+"""
+Thumbnails of the profile pictures.
+
+The pictures are stored at their upload resolution (some are several
+megabytes) but the lists and the notifications only show them as small
+avatars, so each picture gets square thumbnails in the fixed
+settings.THUMBNAIL_SIZES, encoded in WebP (JPEG when Pillow is built
+without WebP) :
+
+    teacher_images/3f2a9c0e5b7d1a4c.jpg  ->  thumbnails/teacher_images/3f2a9c0e5b7d1a4c-96.webp
+
+ThumbnailImageField stores the uploads under the hash of their content and
+generates their thumbnails when the instance is saved. The name of a
+thumbnail is derived from the name of its picture, so it changes with the
+content and can be cached forever, and the notifications, which copy the
+name of the picture of the teacher or the son, get the thumbnails for free.
+The defaults and the pictures uploaded before are covered by the
+generate_thumbnails command (a default picture must get a new name when it
+changes, since its thumbnails are cached forever too).
+
+The serializers expose the urls with ThumbnailUrlField, the projections with
+common.projections.ThumbnailUrl.
+"""
+import hashlib
+import io
+import os
+import posixpath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import models
+from PIL import Image, ImageOps, features
+from rest_framework import serializers
+
+THUMBNAILS_DIRECTORY = 'thumbnails'
+DIGEST_LENGTH = 16
+
+
+def get_thumbnail_sizes():
+    return getattr(settings, 'THUMBNAIL_SIZES', {'small': 96, 'medium': 256})
+
+
+def get_thumbnail_format():
+    """The (Pillow format, extension) of the thumbnails."""
+    if getattr(settings, 'THUMBNAIL_FORMAT', 'WEBP') == 'WEBP' and features.check('webp'):
+        return 'WEBP', 'webp'
+    return 'JPEG', 'jpg'
+
+
+def thumbnail_name(name, size):
+    """The name of the thumbnail of the picture in the size ('small', 'medium' ...)."""
+    width = get_thumbnail_sizes()[size]
+    _format, extension = get_thumbnail_format()
+    return posixpath.join(THUMBNAILS_DIRECTORY, f'{os.path.splitext(name)[0]}-{width}.{extension}')
+
+
+def thumbnail_url(image, size):
+    """The url of the thumbnail of the image (a FieldFile) in the size."""
+    if not image:
+        return None
+    return image.storage.url(thumbnail_name(image.name, size))
+
+
+def hashed_name(content, name):
+    """The name of the uploaded file made of the hash of its content (keeping its extension)."""
+    digest = hashlib.sha256()
+    content.seek(0)
+    for chunk in iter(lambda: content.read(64 * 1024), b''):
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()[:DIGEST_LENGTH] + os.path.splitext(name)[1].lower()
+
+
+def render_thumbnail(image, width, image_format):
+    """The square thumbnail (cropped in the center) of the Pillow image, encoded in the format."""
+    thumbnail = ImageOps.fit(image, (width, width), Image.LANCZOS)
+    if image_format == 'JPEG' and thumbnail.mode != 'RGB':
+        # JPEG has no transparency, flatten it on white
+        background = Image.new('RGB', thumbnail.size, 'white')
+        background.paste(thumbnail, mask=thumbnail.getchannel('A') if 'A' in thumbnail.getbands() else None)
+        thumbnail = background
+    output = io.BytesIO()
+    if image_format == 'WEBP':
+        thumbnail.save(output, image_format, quality=80, method=4)
+    else:
+        thumbnail.save(output, image_format, quality=80, optimize=True, progressive=True)
+    return output.getvalue()
+
+
+def generate_thumbnails(storage, name, content=None, force=False):
+    """Generate the missing thumbnails of the picture stored under the name, return the names of the generated ones."""
+    sizes = get_thumbnail_sizes()
+    missing = {size: thumbnail_name(name, size) for size in sizes}
+    if not force:
+        missing = {size: path for size, path in missing.items() if not storage.exists(path)}
+    if not missing:
+        return []
+
+    if content is None:
+        with storage.open(name, 'rb') as content:
+            return _save_thumbnails(storage, missing, content, force)
+    return _save_thumbnails(storage, missing, content, force)
+
+
+def _save_thumbnails(storage, paths, content, force):
+    sizes = get_thumbnail_sizes()
+    image_format, _extension = get_thumbnail_format()
+    content.seek(0)
+    with Image.open(content) as image:
+        # the phones store the orientation in the EXIF data
+        image = ImageOps.exif_transpose(image)
+        image = image.convert('RGBA' if image.mode in ('RGBA', 'LA', 'P') else 'RGB')
+        generated = []
+        for size, path in paths.items():
+            if force and storage.exists(path):
+                storage.delete(path)
+            generated.append(storage.save(path, ContentFile(render_thumbnail(image, sizes[size], image_format))))
+    content.seek(0)
+    return generated
+
+
+class ThumbnailImageField(models.ImageField):
+    """ImageField storing the uploads under the hash of their content and generating their thumbnails."""
+
+    def pre_save(self, model_instance, add):
+        file = getattr(model_instance, self.attname)
+        if file and not file._committed:
+            content = file.file
+            name = self.generate_filename(model_instance, hashed_name(content, file.name))
+            # the same picture uploaded again is already stored
+            if not file.storage.exists(name):
+                name = file.storage.save(name, content, max_length=self.max_length)
+            generate_thumbnails(file.storage, name, content)
+            file.name = name
+            file._committed = True
+        return file
+
+
+class ThumbnailUrlField(serializers.Field):
+    """Read only url of the thumbnail of an image field : ThumbnailUrlField(source='image', size='small')."""
+
+    def __init__(self, size='small', **kwargs):
+        self.size = size
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return thumbnail_url(value, self.size)
@@ -1,6 +1,9 @@
-from student.models import  StudentUnreadNotification
-from parent.models import  ParentUnreadNotification
+from collections import Counter, defaultdict
+from django.db.models import F
+from student.models import  StudentUnreadNotification, StudentNotification
+from parent.models import  ParentUnreadNotification, ParentNotification, Son
 from teacher.models import TeacherUnreadNotification
+from .notifications import son_params
 
 def increment_student_unread_notifications(student):
     """Helper function to increment student unread notifications count"""
@@ -18,4 +21,97 @@ def increment_teacher_unread_notifications(teacher):
     """Helper function to increment teacher unread notifications count"""
     unread_obj, created = TeacherUnreadNotification.objects.get_or_create(teacher=teacher)
     unread_obj.unread_notifications += 1
-    unread_obj.save()
\ No newline at end of file
+    unread_obj.save()
+
+def bulk_increment_unread_notifications(unread_model, owner_field, counts):
+    """Increment the unread notifications counters of many owners with a few queries.
+
+    counts maps the id of each owner (student, parent or teacher) to the number of
+    notifications to add to his counter.
+    """
+    counts = {owner_id: count for owner_id, count in counts.items() if count}
+    if not counts:
+        return
+
+    owner_id_field = f"{owner_field}_id"
+    existing_owner_ids = set(
+        unread_model.objects.filter(**{f"{owner_id_field}__in": counts.keys()}).values_list(owner_id_field, flat=True)
+    )
+    unread_model.objects.bulk_create([
+        unread_model(**{owner_id_field: owner_id}) for owner_id in counts if owner_id not in existing_owner_ids
+    ])
+
+    # one update per distinct increment instead of one per owner
+    owner_ids_by_count = defaultdict(list)
+    for owner_id, count in counts.items():
+        owner_ids_by_count[count].append(owner_id)
+    for count, owner_ids in owner_ids_by_count.items():
+        unread_model.objects.filter(**{f"{owner_id_field}__in": owner_ids}).update(
+            unread_notifications=F('unread_notifications') + count
+        )
+
+
+def get_sons_by_student_id(student_ids):
+    """Return the sons attached to each student as {student_id: [son, ...]} with one query."""
+    sons = (Son.objects.filter(student_teacher_enrollments__student_id__in=student_ids)
+                       .select_related('parent')
+                       .annotate(attached_student_id=F('student_teacher_enrollments__student_id')))
+    sons_by_student_id = defaultdict(list)
+    for son in sons:
+        sons_by_student_id[son.attached_student_id].append(son)
+    return sons_by_student_id
+
+
+def bulk_notify_students_and_parents(students, student_image, student_template, parent_template, params,
+                                     student_meta_data=None, build_parent_meta_data=None):
+    """Notify many students (with an independent account) and the parents of their sons.
+
+    The notifications are inserted with bulk_create and the unread counters are
+    incremented in bulk, instead of 3 to 4 queries per recipient. They store the
+    templates (see common/notifications.py) and the params shared by the
+    recipients, the params of the parents get the name and the gender of the son.
+    build_parent_meta_data(student, son) returns the meta data of each parent notification.
+    """
+    students = list(students)
+    if not students:
+        return
+
+    student_notifications = []
+    for student in students:
+        if student.user_id:
+            student_notifications.append(StudentNotification(
+                student=student,
+                image=student_image,
+                template=student_template,
+                params=params,
+                meta_data=student_meta_data if student_meta_data is not None else {}
+            ))
+
+    parent_notifications = []
+    sons_by_student_id = get_sons_by_student_id([student.id for student in students])
+    for student in students:
+        for son in sons_by_student_id.get(student.id, []):
+            parent_notifications.append(ParentNotification(
+                parent=son.parent,
+                image=son.image,
+                template=parent_template,
+                params=son_params(params, student, son),
+                meta_data=build_parent_meta_data(student, son) if build_parent_meta_data else {"son_id": son.id}
+            ))
+
+    bulk_save_notifications(student_notifications, parent_notifications)
+
+
+def bulk_save_notifications(student_notifications, parent_notifications):
+    """Insert the (unsaved) notifications and increment the unread counters of their recipients in bulk."""
+    StudentNotification.objects.bulk_create(student_notifications)
+    ParentNotification.objects.bulk_create(parent_notifications)
+
+    bulk_increment_unread_notifications(
+        StudentUnreadNotification, 'student',
+        Counter(notification.student_id for notification in student_notifications)
+    )
+    bulk_increment_unread_notifications(
+        ParentUnreadNotification, 'parent',
+        Counter(notification.parent_id for notification in parent_notifications)
+    )
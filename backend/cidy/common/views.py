@@ -1,3 +1,13 @@
-from django.shortcuts import render
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+from .instrumentation import get_metrics
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def get_worker_metrics(request):
+    """The database connections metrics of the worker serving the request."""
+    return Response(get_metrics())
 
-# Create your views here.
@@ -0,0 +1,24 @@
+# Generated by Django 5.2 on 2026-10-19 19:09
+
+import common.thumbnails
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parent', '0005_remove_son_section'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='parent',
+            name='image',
+            field=common.thumbnails.ThumbnailImageField(blank=True, default='defaults/parent.png', null=True, upload_to='parent_images/'),
+        ),
+        migrations.AlterField(
+            model_name='son',
+            name='image',
+            field=common.thumbnails.ThumbnailImageField(blank=True, default='defaults/son.jpg', null=True, upload_to='son_images/'),
+        ),
+    ]
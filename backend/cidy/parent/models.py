@@ -4,9 +4,11 @@ from teacher.models import TeacherEnrollment
 from teacher.models import Level
 from django.db.models.signals import post_save
 from django.dispatch import receiver
+from common.models import TemplatedNotification
+from common.thumbnails import ThumbnailImageField
 
 class Parent(models.Model):
-    image = models.ImageField(default='defaults/parent.png', upload_to='parent_images/', null=True, blank=True)
+    image = ThumbnailImageField(default='defaults/parent.png', upload_to='parent_images/', null=True, blank=True)
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     fullname = models.CharField(max_length=255)
     gender = models.CharField(max_length=10, choices=(('M', 'Male'), ('F', 'Female')), default='M')
@@ -16,7 +18,7 @@ class Parent(models.Model):
         return f"{self.fullname} -- {self.user.email}"
     
 class Son(models.Model):
-    image = models.ImageField(default='defaults/son.jpg', upload_to='son_images/', null=True, blank=True)
+    image = ThumbnailImageField(default='defaults/son.jpg', upload_to='son_images/', null=True, blank=True)
     parent = models.ForeignKey(Parent, on_delete=models.CASCADE)
     student_teacher_enrollments = models.ManyToManyField(TeacherEnrollment)
     fullname = models.CharField(max_length=255)
@@ -32,14 +34,22 @@ class ParentUnreadNotification(models.Model):
     parent = models.ForeignKey(Parent, on_delete=models.CASCADE)
     unread_notifications = models.PositiveIntegerField(default=0)
 
-class ParentNotification(models.Model):
-    parent = models.ForeignKey(Parent, on_delete=models.CASCADE)
+class ParentNotification(TemplatedNotification):
+    # indexed first by the (parent, id) index below
+    parent = models.ForeignKey(Parent, on_delete=models.CASCADE, db_index=False)
     image = models.ImageField(default='defaults/due_payment_notification.png')
-    message = models.TextField()
+    # empty for the notifications rendered from their template
+    message = models.TextField(default='', blank=True)
     is_read = models.BooleanField(default=False)
     meta_data = models.JSONField(default=dict)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # the pages of notifications of a parent, newest first, and the marks as read (id <= last id)
+            models.Index(fields=['parent', 'id'], name='parent_notification_idx'),
+        ]
+
     def __str__(self):
         return f"Notification for {self.teacher.fullname} - {self.created_at}"
     
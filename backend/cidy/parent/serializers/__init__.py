@@ -1,4 +1,5 @@
 from .teacher_serializers import TesLevelsSectionsSubjectsSerializer,TeacherListSerializer
 from .son_serializers import SonListSerializer,SonDetailSerializer,SonSubjectDetailSerializer,SonCreateEditSerializer,SonSubjectListSerializer 
 from .notification_serializers import ParentNotificationSerializer
+from .projections import ParentNotificationProjection
 from .account_serializers import ParentAccountInfoSerializer,UpdateParentAccountInfoSerializer,ChangeParentPasswordSerializer
\ No newline at end of file
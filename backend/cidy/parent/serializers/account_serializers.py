@@ -1,15 +1,17 @@
 from rest_framework import serializers
+from common.thumbnails import ThumbnailUrlField
 from ..models import Parent
 
 class ParentAccountInfoSerializer(serializers.ModelSerializer):
     """Serializer for retrieving parent account information."""
     image = serializers.ImageField(source='image.url', read_only=True)
+    thumbnail = ThumbnailUrlField(source='image', size='medium')
     email = serializers.EmailField(source='user.email', read_only=True)
     phone_number = serializers.CharField(source='user.phone_number', read_only=True)
 
     class Meta:
         model = Parent
-        fields = ['image', 'fullname', 'email', 'phone_number', 'gender']
+        fields = ['image', 'thumbnail', 'fullname', 'email', 'phone_number', 'gender']
 
 
 class UpdateParentAccountInfoSerializer(serializers.ModelSerializer):
@@ -0,0 +1,15 @@
+from common.projections import Column, DateTimeString, ImageUrl, NotificationMessage, Projection, ThumbnailUrl
+from ..models import ParentNotification
+
+
+class ParentNotificationProjection(Projection):
+    """The payload of ParentNotificationSerializer."""
+    model = ParentNotification
+
+    id = Column()
+    image = ImageUrl()
+    thumbnail = ThumbnailUrl('image')
+    message = NotificationMessage()
+    meta_data = Column()
+    is_read = Column()
+    created_at = DateTimeString()
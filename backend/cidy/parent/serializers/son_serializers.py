@@ -1,21 +1,26 @@
-from datetime import datetime 
 from rest_framework import serializers
+from common.thumbnails import ThumbnailUrlField
 from teacher.models import GroupEnrollment,Level
+from teacher.schedule import schedule_payload
 from teacher.serializers import TeacherClassListSerializer
 from ..models import Son
 
 class SonListSerializer(serializers.ModelSerializer):
     image = serializers.CharField(source='image.url', read_only=True)
+    thumbnail = ThumbnailUrlField(source='image')
     level = serializers.CharField(source='level.name', read_only=True)
-    section = serializers.CharField(source='section.name', read_only=True)
+    section = serializers.CharField(source='level.section', read_only=True)
     has_student = serializers.SerializerMethodField()
 
     class Meta:
         model = Son
-        fields = ['id', 'image', 'fullname', 'level','gender', 'section', 'has_student']
+        fields = ['id', 'image', 'thumbnail', 'fullname', 'level','gender', 'section', 'has_student']
 
     def get_has_student(self, obj):
-        return obj.student.exists()
+        # annotated by the views listing the sons
+        if hasattr(obj, 'has_student'):
+            return obj.has_student
+        return obj.student_teacher_enrollments.exists()
     
 
 class SonSubjectListSerializer(serializers.ModelSerializer):
@@ -30,19 +35,7 @@ class SonSubjectListSerializer(serializers.ModelSerializer):
         fields = ['id','image','name', 'teacher_name', 'schedule', 'monthly_price','paid_amount','unpaid_amount']
 
     def get_schedule(self, group_enrollment):
-        schedule = {}
-        if group_enrollment.clear_temporary_schedule_at and group_enrollment.clear_temporary_schedule_at > datetime.now():
-            schedule['temporary'] = {
-                "week_day": group_enrollment.group.temporary_week_day,
-                "start_time": group_enrollment.group.temporary_start_time,
-                "end_time": group_enrollment.group.temporary_end_time,
-            }
-        schedule['permanent'] = {
-            "week_day": group_enrollment.group.week_day,
-            "start_time": group_enrollment.group.start_time,
-            "end_time": group_enrollment.group.end_time,
-        }
-        return schedule
+        return schedule_payload(group_enrollment.group)
 
     def get_monthly_price(self, group_enrollment):
         return group_enrollment.group.teacher_subject.price_per_class * 4  # Assuming 4 classes a month
@@ -89,19 +82,7 @@ class SonSubjectDetailSerializer(serializers.ModelSerializer):
         fields = ['id','image','name', 'teacher_name', 'schedule', 'monthly_price','paid_amount','unpaid_amount']
 
     def get_schedule(self, group_enrollment):
-        schedule = {}
-        if group_enrollment.clear_temporary_schedule_at and group_enrollment.clear_temporary_schedule_at > datetime.now():
-            schedule['temporary'] = {
-                "week_day": group_enrollment.group.temporary_week_day,
-                "start_time": group_enrollment.group.temporary_start_time,
-                "end_time": group_enrollment.group.temporary_end_time,
-            }
-        schedule['permanent'] = {
-            "week_day": group_enrollment.group.week_day,
-            "start_time": group_enrollment.group.start_time,
-            "end_time": group_enrollment.group.end_time,
-        }
-        return schedule
+        return schedule_payload(group_enrollment.group)
 
     def get_monthly_price(self, group_enrollment):
         return group_enrollment.group.teacher_subject.price_per_class * 4  # Assuming 4 classes a month
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from common.thumbnails import ThumbnailUrlField
 from teacher.models import Level
 from teacher.serializers import SubjectSerializer
 from teacher.models import Teacher, TeacherSubject
@@ -25,31 +26,34 @@ class TeacherSubjectListSerializer(serializers.ModelSerializer):
 
 class TeacherListSerializer(serializers.ModelSerializer):
     image = serializers.ImageField(source='image.url', read_only=True)
+    thumbnail = ThumbnailUrlField(source='image')
     phone_number = serializers.CharField(source='user.phone_number',read_only=True)
     subjects = serializers.SerializerMethodField()
     levels_and_sections = serializers.SerializerMethodField()
 
     class Meta:
         model = Teacher
-        fields = ['id','phone_number','fullname', 'image', 'subjects', 'levels_and_sections']
+        fields = ['id','phone_number','fullname', 'image', 'thumbnail', 'subjects', 'levels_and_sections']
+
+    def get_offerings(self, teacher):
+        # the offerings are prefetched by teacher.discovery.get_teachers_page()
+        if not hasattr(teacher, 'offerings'):
+            teacher.offerings = list(TeacherSubject.objects.filter(teacher=teacher).select_related('level', 'subject'))
+        return teacher.offerings
 
     def get_subjects(self, teacher):
-        # Get the teacher's subjects for the specific student level and section
-        teacher_subjects = TeacherSubject.objects.filter(teacher=teacher).distinct('subject')
-        serializer = TeacherSubjectListSerializer(teacher_subjects, many=True)
-        return serializer.data
+        # Get the distinct subjects taught by the teacher
+        subject_names = []
+        for offering in self.get_offerings(teacher):
+            if offering.subject.name not in subject_names:
+                subject_names.append(offering.subject.name)
+        return [{'name': subject_name} for subject_name in subject_names]
 
     def get_levels_and_sections(self, teacher):
-        teacher_subjects = TeacherSubject.objects.filter(teacher=teacher).select_related('level', 'section')
         unique_combinations_of_levels_and_sections = {}
 
-        for ts in teacher_subjects:
-            level_id = ts.level.id
-            section_id = ts.section.id if ts.section else None
-
-            unique_key = str(level_id) + '_' + str(section_id)
-            if unique_key not in unique_combinations_of_levels_and_sections:
-                unique_combinations_of_levels_and_sections[unique_key] = ts.level.name + (f"_{ts.section.name}" if ts.section else '')
-
+        for ts in self.get_offerings(teacher):
+            if ts.level_id not in unique_combinations_of_levels_and_sections:
+                unique_combinations_of_levels_and_sections[ts.level_id] = ts.level.name + (f"_{ts.level.section}" if ts.level.section else '')
 
-        return list(unique_combinations_of_levels_and_sections.values())
\ No newline at end of file
+        return list(unique_combinations_of_levels_and_sections.values())
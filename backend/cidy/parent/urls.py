@@ -1,4 +1,5 @@
 from django.urls import path
+from common.async_views import sync_or_async
 from . import views
 
 urlpatterns = [
@@ -9,17 +10,17 @@ urlpatterns = [
     path('teachers/send_parenting_request/<int:teacher_id>', views.send_parenting_request, name='parent_send_parenting_request'),
     
     # son endpoints
-    path('sons/', views.get_parent_sons, name='parent_get_parent_sons'),
+    path('sons/', sync_or_async(views.get_parent_sons, views.aget_parent_sons), name='parent_get_parent_sons'),
     path('sons/<int:son_id>/', views.get_son_detail, name='parent_get_son_detail'),
     path('sons/<int:son_id>/subjects/<int:subject_id>/', views.get_son_subject_detail, name='parent_get_son_subject_detail'),
     path('sons/<int:son_id>/edit/', views.edit_a_son, name='parent_edit_a_son'),
     path('sons/create/', views.create_a_son, name='parent_create_a_son'),
 
     # notification endpoints
-    path('notifications/unread_count/', views.get_unread_notifications_count, name='parent_get_unread_notifications_count'),
+    path('notifications/unread_count/', sync_or_async(views.get_unread_notifications_count, views.aget_unread_notifications_count), name='parent_get_unread_notifications_count'),
     path('notifications/mark_as_read/', views.mark_notifications_as_read, name='parent_mark_notifications_as_read'),
     path('notifications/', views.get_notifications, name='parent_get_notifications'),
-    path('notifications/new/', views.get_new_notifications, name='parent_get_new_notifications'),
+    path('notifications/new/', sync_or_async(views.get_new_notifications, views.aget_new_notifications), name='parent_get_new_notifications'),
 
     # account endpoints
     path('account/info/', views.get_account_info, name='parent_get_account_info'),
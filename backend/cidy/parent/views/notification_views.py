@@ -3,15 +3,27 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django.core.paginator import Paginator
 from ..models import ParentNotification,ParentUnreadNotification
-from ..serializers import ParentNotificationSerializer
+from ..serializers import ParentNotificationProjection
+from common.routers import read_from_replica
+from common.async_views import async_api_view, json_response
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@read_from_replica
 def get_unread_notifications_count(request):
     parent = request.user.parent
     parent_unread_notifications = ParentUnreadNotification.objects.get(parent=parent)
     return Response({'unread_count': parent_unread_notifications.unread_notifications})
 
+
+@async_api_view
+@read_from_replica
+async def aget_unread_notifications_count(request):
+    """Async variant of get_unread_notifications_count (ASGI)"""
+    parent = request.user.parent
+    parent_unread_notifications = await ParentUnreadNotification.objects.aget(parent=parent)
+    return json_response({'unread_count': parent_unread_notifications.unread_notifications})
+
 # this will be used to mark the notifications as read after leaving the notification screen
 # starting from the last notification ID loaded in the screen and going backward 
 @api_view(['PUT'])
@@ -33,6 +45,7 @@ def mark_notifications_as_read(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@read_from_replica
 def get_notifications(request):
     """Get paginated notifications for the parent"""
     parent = request.user.parent
@@ -48,8 +61,8 @@ def get_notifications(request):
     notifications = ParentNotification.objects.filter(parent=parent
                                                       ).exclude(id__gte=int(start_from_notification_id)
                                                       ).order_by('-id')
-    # Paginate results
-    paginator = Paginator(notifications, 30)
+    # Paginate results (the rows are read with values() and built as dicts by the projection)
+    paginator = Paginator(ParentNotificationProjection.values(notifications), 30)
     try:
         paginated_notifications = paginator.page(page)
     except Exception:
@@ -58,10 +71,10 @@ def get_notifications(request):
         page = paginator.num_pages
 
     # Serialize the data
-    serializer = ParentNotificationSerializer(paginated_notifications, many=True)
+    notifications_data = ParentNotificationProjection.build(paginated_notifications)
     
     return Response({
-        'notifications': serializer.data,
+        'notifications': notifications_data,
         'unread_count': parent.parentunreadnotifications.unread_notifications,
         'total_count': paginator.count,
         'total_pages': paginator.num_pages,
@@ -72,6 +85,7 @@ def get_notifications(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@read_from_replica
 def get_new_notifications(request):
     """Get new notifications for the parent"""
     parent = request.user.parent
@@ -87,8 +101,25 @@ def get_new_notifications(request):
 
 
     # Serialize the data
-    serializer = ParentNotificationSerializer(notifications, many=True)
+    notifications_data = ParentNotificationProjection.data(notifications)
     
     return Response({
-        'new_notifications': serializer.data,
+        'new_notifications': notifications_data,
+    })
+
+
+@async_api_view
+@read_from_replica
+async def aget_new_notifications(request):
+    """Async variant of get_new_notifications (ASGI)"""
+    parent = request.user.parent
+
+    start_from_notification_id = request.GET.get('start_from_notification_id')
+    if not start_from_notification_id or not start_from_notification_id.isdigit():
+        return json_response({'status': 'error', 'message': 'Invalid start_from_notification_id'}, status=400)
+
+    notifications = ParentNotification.objects.filter(parent=parent, id__gte=int(start_from_notification_id)).order_by('-id')
+
+    return json_response({
+        'new_notifications': await ParentNotificationProjection.adata(notifications),
     })
@@ -1,21 +1,43 @@
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from django.db.models import Exists, OuterRef
 from teacher.models import GroupEnrollment
 from ..models import Son
 from ..serializers import SonListSerializer,SonDetailSerializer,SonSubjectDetailSerializer,SonCreateEditSerializer
+from common.routers import read_from_replica
+from common.async_views import async_api_view, json_response
+
+
+def get_sons_queryset(parent):
+    """The sons of the parent with their level and whether they have a student"""
+    return parent.son_set.select_related('level').annotate(
+        has_student=Exists(Son.student_teacher_enrollments.through.objects.filter(son=OuterRef('pk')))
+    )
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@read_from_replica
 def get_parent_sons(request):
     """Get all sons of the logged-in parent."""
     parent = request.user.parent
-    sons = parent.son_set.all()
+    sons = get_sons_queryset(parent)
     serializer = SonListSerializer(sons, many=True)
     return Response({'sons': serializer.data})
 
 
+@async_api_view
+@read_from_replica
+async def aget_parent_sons(request):
+    """Async variant of get_parent_sons (ASGI)"""
+    parent = request.user.parent
+    sons = [son async for son in get_sons_queryset(parent)]
+    # the relations are loaded, the serialization doesn't query
+    serializer = SonListSerializer(sons, many=True)
+    return json_response({'sons': serializer.data})
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_son_detail(request, son_id):
@@ -1,10 +1,12 @@
-from django.core.paginator import Paginator
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from common.tools import increment_parent_unread_notifications
 from teacher.models import Teacher,Level,TeacherNotification
+from common.reference_data import get_reference_data
+from teacher import discovery, enrollments
 from ..serializers import TesLevelsSectionsSubjectsSerializer,TeacherListSerializer
+from common.routers import read_from_replica
 
 # this one will be user in the filter of the teacher list
 @api_view(['GET'])
@@ -12,63 +14,49 @@ from ..serializers import TesLevelsSectionsSubjectsSerializer,TeacherListSeriali
 def get_tes_levels_sections_subjects(request):
     """Get all of the subjects that the student can study for his level and section."""
    
-    levels_qs  = Level.objects.all()
-    serializer = TesLevelsSectionsSubjectsSerializer(levels_qs, many=True)
+    # the levels of the registry have their subjects prefetched
+    levels  = get_reference_data().levels
+    serializer = TesLevelsSectionsSubjectsSerializer(levels, many=True)
 
     return Response({'tes': serializer.data})
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@read_from_replica
 def get_teachers(request):
-    """Get a filtered and paginated list of teachers for the logged student"""
+    """Get a filtered and keyset paginated list of teachers for the logged parent"""
 
-    parent = request.user.parent
-
-    fullname_filter = request.GET.get('fullname', None)
+    fullname_filter = request.GET.get('fullname', '')
     level_id = request.GET.get('level_id', None)
-    section_id = request.GET.get('section_id', None)
-    subject_ids = request.GET.getlist('subject_ids', None)
+    subject_ids = enrollments.clean_ids(request.GET.getlist('subject_ids', []))
+    cursor = request.GET.get('cursor')
 
+    # the level (with its section) to filter on
+    level = None
+    if level_id:
+        level = get_reference_data().get_level_by_id(int(level_id)) if level_id.isdigit() else None
+        if level is None:
+            return Response({'error': 'Level not found'}, status=404)
 
-    # Apply fullname filter
-    if fullname_filter:
-        teachers = Teacher.objects.filter(fullname__icontains=fullname_filter)
-    
-    # Apply level,section and subject filters 
-    if level_id : 
-        teachers = teachers.filter(
-            teachersubject_set__level__id=int(level_id),
-        ).distinct()
-        if section_id :
-            teachers = teachers.filter(
-                teachersubject_set__section__id=int(section_id)
-            ).distinct()
-        else :
-            teachers = teachers.filter(
-                teachersubject_set__section__isnull=True
-            ).distinct()
-
-        if subject_ids:
-            teachers = teachers.filter(teachersubject_set__subject__id__in=subject_ids).distinct()
-
-    # Pagination
-    page = request.GET.get('page', 1)
-    page_size = 30
-    paginator = Paginator(teachers, page_size)
     try:
-        paginated_teachers = paginator.page(page)
-    except Exception:
-        paginated_teachers = paginator.page(paginator.num_pages)
-        page = paginator.num_pages
+        teachers, next_cursor = discovery.get_teachers_page(
+            level=level, subject_ids=subject_ids, search_term=fullname_filter, cursor=cursor
+        )
+    except discovery.InvalidCursor:
+        return Response({'error': 'Invalid cursor'}, status=400)
 
     # Serialize the teachers
-    serializer = TeacherListSerializer(paginated_teachers, many=True)
+    serializer = TeacherListSerializer(teachers, many=True)
 
-    return Response({
+    response = {
         'teachers': serializer.data,
-        'total_count': paginator.count,
-        'current_page': page
-    })
+        'next_cursor': next_cursor,
+    }
+    # the counts are only needed to build the first page (and the subject filter) of the screen
+    if not cursor:
+        response['total_count'] = discovery.get_teachers_queryset(level, subject_ids, fullname_filter).count()
+        response['subjects_facets'] = discovery.get_subject_facets(level, fullname_filter)
+    return Response(response)
 
 
 
@@ -480,6 +480,11 @@ for level_name, level_data in levels_sections_subjects.items():
             level.subjects.add(subject)
     order += 1
 
+# make the workers reload the levels and subjects from the new seed (through the shared cache of REDIS_URL,
+# restart the development server which keeps its own in-memory cache)
+from common.reference_data import bump_reference_data_version
+bump_reference_data_version()
+
 
 import datetime
 from account.models import User 
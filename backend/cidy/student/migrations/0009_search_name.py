@@ -0,0 +1,22 @@
+# Generated by Django 5.2 on 2026-10-19 18:45
+
+from django.db import migrations, models
+
+from common.search import fill_search_name_operations, trigram_index_operations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student', '0008_student_deleted_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='student',
+            name='search_name',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=255),
+        ),
+        *fill_search_name_operations('student', 'Student', 'fullname'),
+        *trigram_index_operations('student', 'Student'),
+    ]
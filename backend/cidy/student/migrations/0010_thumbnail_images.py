@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-19 19:09
+
+import common.thumbnails
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student', '0009_search_name'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='student',
+            name='image',
+            field=common.thumbnails.ThumbnailImageField(default='defaults/student.png', upload_to='student_images/'),
+        ),
+    ]
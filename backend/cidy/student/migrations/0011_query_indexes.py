@@ -0,0 +1,24 @@
+# Generated by Django 5.2 on 2026-10-19 19:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student', '0010_thumbnail_images'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='studentnotification',
+            index=models.Index(fields=['student', 'id'], name='student_notification_idx'),
+        ),
+        # the composite indexes are created before the single column indexes they start with are dropped
+        migrations.AlterField(
+            model_name='studentnotification',
+            name='student',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, to='student.student'),
+        ),
+    ]
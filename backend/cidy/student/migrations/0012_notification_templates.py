@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-19 19:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student', '0011_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentnotification',
+            name='params',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='studentnotification',
+            name='template',
+            field=models.CharField(blank=True, default='', max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='studentnotification',
+            name='message',
+            field=models.TextField(blank=True, default=''),
+        ),
+    ]
@@ -1,11 +1,15 @@
 from django.db import models
 from account.models import User
 from teacher.models import Level
+from common.models import SearchableModel, SoftDeleteModel, TemplatedNotification
 from django.db.models.signals import post_save
 from django.dispatch import receiver
+from common.thumbnails import ThumbnailImageField
 
-class Student(models.Model):
-    image = models.ImageField(default='defaults/student.png',upload_to='student_images/')
+class Student(SearchableModel, SoftDeleteModel):
+    search_source_field = 'fullname'
+
+    image = ThumbnailImageField(default='defaults/student.png',upload_to='student_images/')
     user = models.OneToOneField(User, on_delete=models.CASCADE,null=True)
     fullname = models.CharField(max_length=255)
     phone_number = models.CharField(max_length=8,default='00000000')
@@ -23,14 +27,22 @@ class StudentUnreadNotification(models.Model):
     student = models.OneToOneField(Student, on_delete=models.CASCADE,null=True)
     unread_notifications = models.PositiveIntegerField(default=0)
 
-class StudentNotification(models.Model):
-    student = models.ForeignKey(Student, on_delete=models.CASCADE,null=True)
+class StudentNotification(TemplatedNotification):
+    # indexed first by the (student, id) index below
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, null=True, db_index=False)
     image = models.ImageField(default='defaults/due_payment_notification.png')
-    message = models.TextField()
+    # empty for the notifications rendered from their template
+    message = models.TextField(default='', blank=True)
     is_read = models.BooleanField(default=False)
     meta_data = models.JSONField(default=dict)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # the pages of notifications of a student, newest first, and the marks as read (id <= last id)
+            models.Index(fields=['student', 'id'], name='student_notification_idx'),
+        ]
+
     def __str__(self):
         return f"Notification for {self.student.fullname} - {self.created_at}"
     
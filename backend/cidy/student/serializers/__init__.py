@@ -2,6 +2,7 @@ from .teacher_serializers import TeacherListSerializer
 from .subject_serializers import StudentSubjectListSerializer,StudentSubjectDetailSerializer
 from .parent_serializers import ParentListSerializer
 from .notification_serializers import StudentNotificationSerializer
+from .projections import StudentNotificationProjection
 from .account_serializers import (
     StudentAccountInfoSerializer,
     UpdateStudentAccountInfoSerializer,
@@ -1,6 +1,8 @@
 from rest_framework import serializers
+from common.thumbnails import ThumbnailUrlField
 from teacher.serializers import LevelSerializer
 from teacher.models import Level 
+from common.reference_data import get_reference_data
 from ..models import Student
 
 
@@ -16,6 +18,7 @@ class LevelsAndSectionsSerializer(serializers.ModelSerializer):
 class StudentAccountInfoSerializer(serializers.ModelSerializer):
     """Serializer for retrieving student account information."""
     image = serializers.ImageField(source='image.url', read_only=True)
+    thumbnail = ThumbnailUrlField(source='image', size='medium')
     email = serializers.EmailField(source='user.email', read_only=True)
     phone_number = serializers.CharField(source='user.phone_number', read_only=True)
     level = LevelSerializer()
@@ -23,10 +26,10 @@ class StudentAccountInfoSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Student
-        fields = ['image', 'fullname', 'email', 'phone_number', 'gender', 'level', 'section', 'level_options']
+        fields = ['image', 'thumbnail', 'fullname', 'email', 'phone_number', 'gender', 'level', 'section', 'level_options']
 
     def get_level_options(self, student):
-        levels = Level.objects.all()
+        levels = get_reference_data().levels
         return LevelSerializer(levels, many=True).data
 
 class UpdateStudentAccountInfoSerializer(serializers.ModelSerializer):
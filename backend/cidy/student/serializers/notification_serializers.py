@@ -1,8 +1,11 @@
 from rest_framework import serializers
+from common.thumbnails import ThumbnailUrlField
 from ..models import StudentNotification
 
 class StudentNotificationSerializer(serializers.ModelSerializer):
     image = serializers.CharField(source="image.url")
+    thumbnail = ThumbnailUrlField(source='image')
+    message = serializers.CharField(source='text', read_only=True)
     class Meta : 
         model = StudentNotification
-        fields = ['id', 'image', 'message', 'meta_data', 'is_read', 'created_at']
+        fields = ['id', 'image', 'thumbnail', 'message', 'meta_data', 'is_read', 'created_at']
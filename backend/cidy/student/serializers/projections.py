@@ -0,0 +1,15 @@
+from common.projections import Column, DateTimeString, ImageUrl, NotificationMessage, Projection, ThumbnailUrl
+from ..models import StudentNotification
+
+
+class StudentNotificationProjection(Projection):
+    """The payload of StudentNotificationSerializer."""
+    model = StudentNotification
+
+    id = Column()
+    image = ImageUrl()
+    thumbnail = ThumbnailUrl('image')
+    message = NotificationMessage()
+    meta_data = Column()
+    is_read = Column()
+    created_at = DateTimeString()
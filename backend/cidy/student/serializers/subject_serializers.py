@@ -1,6 +1,7 @@
-from datetime import datetime
 from rest_framework import serializers
 from teacher.models import GroupEnrollment
+from teacher.archive import enrollment_classes
+from teacher.schedule import schedule_payload
 from teacher.serializers import TeacherClassListSerializer
 
 class StudentSubjectListSerializer(serializers.ModelSerializer):
@@ -15,19 +16,7 @@ class StudentSubjectListSerializer(serializers.ModelSerializer):
         fields = ['id','name', 'teacher_name', 'schedule', 'monthly_price','paid_amount','unpaid_amount']
 
     def get_schedule(self, group_enrollment):
-        schedule = {}
-        if group_enrollment.clear_temporary_schedule_at and group_enrollment.clear_temporary_schedule_at > datetime.now():
-            schedule['temporary'] = {
-                "week_day": group_enrollment.group.temporary_week_day,
-                "start_time": group_enrollment.group.temporary_start_time,
-                "end_time": group_enrollment.group.temporary_end_time,
-            }
-        schedule['permanent'] = {
-            "week_day": group_enrollment.group.week_day,
-            "start_time": group_enrollment.group.start_time,
-            "end_time": group_enrollment.group.end_time,
-        }
-        return schedule
+        return schedule_payload(group_enrollment.group)
 
     def get_monthly_price(self, group_enrollment):
         return group_enrollment.group.teacher_subject.price_per_class * 4  # Assuming 4 classes a month
@@ -45,23 +34,11 @@ class StudentSubjectDetailSerializer(serializers.ModelSerializer):
         fields = ['name', 'teacher_name', 'schedule', 'monthly_price','paid_amount','unpaid_amount','classes']
 
     def get_schedule(self, group_enrollment):
-        schedule = {}
-        if group_enrollment.clear_temporary_schedule_at and group_enrollment.clear_temporary_schedule_at > datetime.now():
-            schedule['temporary'] = {
-                "week_day": group_enrollment.group.temporary_week_day,
-                "start_time": group_enrollment.group.temporary_start_time,
-                "end_time": group_enrollment.group.temporary_end_time,
-            }
-        schedule['permanent'] = {
-            "week_day": group_enrollment.group.week_day,
-            "start_time": group_enrollment.group.start_time,
-            "end_time": group_enrollment.group.end_time,
-        }
-        return schedule
+        return schedule_payload(group_enrollment.group)
 
     def get_monthly_price(self, group_enrollment):
         return group_enrollment.group.teacher_subject.price_per_class * 4  # Assuming 4 classes a month
 
     def get_classes(self, group_enrollment):
-        classes_qs = group_enrollment.class_set.all()
-        return TeacherClassListSerializer(classes_qs, many=True).data
\ No newline at end of file
+        classes = enrollment_classes(group_enrollment, self.context.get('include_archived', False))
+        return TeacherClassListSerializer(classes, many=True).data
\ No newline at end of file
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from common.thumbnails import ThumbnailUrlField
 from teacher.models import Teacher, TeacherSubject
 
 
@@ -12,18 +13,21 @@ class TeacherSubjectListSerializer(serializers.ModelSerializer):
 
 class TeacherListSerializer(serializers.ModelSerializer):
     image = serializers.ImageField(source='image.url', read_only=True)
+    thumbnail = ThumbnailUrlField(source='image')
     phone_number = serializers.CharField(source='user.phone_number',read_only=True)
     subjects = serializers.SerializerMethodField()
 
     class Meta:
         model = Teacher
-        fields = ['id', 'fullname', 'image', 'subjects']
+        fields = ['id', 'phone_number', 'fullname', 'image', 'thumbnail', 'subjects']
 
     def get_subjects(self, teacher):
-        student = self.context.get('student')
-        # Get the teacher's subjects for the specific student level and section
-        teacher_subjects = TeacherSubject.objects.filter(teacher=teacher,
-                                                         level=student.level,
-                                                         section=student.section if student.section else None)
+        # the subjects of the level of the student are prefetched by teacher.discovery.get_teachers_page()
+        if hasattr(teacher, 'matching_offerings'):
+            teacher_subjects = teacher.matching_offerings
+        else:
+            student = self.context.get('student')
+            # Get the teacher's subjects for the level (and section) of the student
+            teacher_subjects = TeacherSubject.objects.filter(teacher=teacher, level=student.level).select_related('subject')
         serializer = TeacherSubjectListSerializer(teacher_subjects, many=True)
         return serializer.data
\ No newline at end of file
@@ -6,9 +6,13 @@ from parent.models import ParentNotification,Son
 from common.tools import increment_parent_unread_notifications,increment_teacher_unread_notifications
 from django.db.models import Sum
 from ..serializers import StudentSubjectListSerializer,StudentSubjectDetailSerializer
+from common.routers import read_from_replica
+from common.async_views import async_api_view, json_response
+from teacher.archive import wants_archived
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@read_from_replica
 def get_student_subject_list(request):
     """
     API view to retrieve the subjects data for the student subjects screen.
@@ -27,7 +31,7 @@ def get_student_subject_list(request):
 
     # Get the list of subjects the student is studying
     group_enrollments = groups_enrolled_in_qs.select_related(
-        'group', 'group__subject', 'group__teacher'
+        'group__teacher_subject__subject', 'group__teacher'
     )
 
     serializer = StudentSubjectListSerializer(group_enrollments, many=True)
@@ -38,6 +42,30 @@ def get_student_subject_list(request):
         'subjects': serializer.data
     })
 
+
+@async_api_view
+@read_from_replica
+async def aget_student_subject_list(request):
+    """Async variant of get_student_subject_list (ASGI)"""
+    student = request.user.student
+    groups_enrolled_in_qs = GroupEnrollment.objects.filter(student=student)
+
+    totals = await groups_enrolled_in_qs.aaggregate(total_paid=Sum('paid_amount'), total_unpaid=Sum('unpaid_amount'))
+
+    group_enrollments = [
+        group_enrollment async for group_enrollment in groups_enrolled_in_qs.select_related(
+            'group__teacher_subject__subject', 'group__teacher'
+        )
+    ]
+    # the relations are loaded, the serialization doesn't query
+    serializer = StudentSubjectListSerializer(group_enrollments, many=True)
+
+    return json_response({
+        'total_paid_amount': totals['total_paid'] or 0,
+        'total_unpaid_amount': totals['total_unpaid'] or 0,
+        'subjects': serializer.data
+    })
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_subject_detail(request, group_enrollment_id):
@@ -50,7 +78,7 @@ def get_subject_detail(request, group_enrollment_id):
     except GroupEnrollment.DoesNotExist:
         return Response({'error': 'Subject not found'}, status=404)
 
-    serializer = StudentSubjectDetailSerializer(group_enrollment)
+    serializer = StudentSubjectDetailSerializer(group_enrollment, context={'include_archived': wants_archived(request)})
 
     return Response(serializer.data)
 
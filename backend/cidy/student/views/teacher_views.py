@@ -1,11 +1,12 @@
-from django.core.paginator import Paginator
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from teacher.models import Teacher,Subject,TeacherNotification
 from teacher.serializers import SubjectSerializer
 from common.tools import increment_teacher_unread_notifications
+from teacher import discovery, enrollments
 from ..serializers import TeacherListSerializer
+from common.routers import read_from_replica
 
 
 
@@ -29,54 +30,34 @@ def get_student_possible_subjects(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@read_from_replica
 def get_teachers(request):
-    """Get a filtered and paginated list of teachers for the logged student"""
+    """Get a filtered and keyset paginated list of the teachers of the level of the logged student"""
     student = request.user.student
     fullname_filter = request.GET.get('fullname', '')
-    subject_ids = request.GET.getlist('subject_ids', [])
-    
-    # Get the level and section of the student
-    student_level = student.level
-    student_section = student.section
-
-    # Filter teachers based on level and section of the student 
-    if not student_section : 
-        teachers = Teacher.objects.filter(
-            teachersubject_set__level=student_level,
-            teachersubject_set__section__isnull=True
-        ).distinct()
-    else :
-        teachers = Teacher.objects.filter(
-            teachersubject_set__level=student_level,
-            teachersubject_set__section=student_section
-        ).distinct()    
-
-    # Apply fullname filter
-    if fullname_filter:
-        teachers = teachers.filter(fullname__icontains=fullname_filter)
-
-    # Apply subject filter
-    if subject_ids:
-        teachers = teachers.filter(teachersubject_set__subject__id__in=subject_ids).distinct()
+    subject_ids = enrollments.clean_ids(request.GET.getlist('subject_ids', []))
+    cursor = request.GET.get('cursor')
 
-    # Pagination
-    page = request.GET.get('page', 1)
-    page_size = 30
-    paginator = Paginator(teachers, page_size)
+    # the teachers of the level (and section) of the student with their subjects of this level
     try:
-        paginated_teachers = paginator.page(page)
-    except Exception:
-        paginated_teachers = paginator.page(paginator.num_pages)
-        page = paginator.num_pages
+        teachers, next_cursor = discovery.get_teachers_page(
+            level=student.level, subject_ids=subject_ids, search_term=fullname_filter, cursor=cursor
+        )
+    except discovery.InvalidCursor:
+        return Response({'error': 'Invalid cursor'}, status=400)
 
     # Serialize the teachers
-    serializer = TeacherListSerializer(paginated_teachers, many=True, context={'student':student} )
+    serializer = TeacherListSerializer(teachers, many=True, context={'student': student})
 
-    return Response({
+    response = {
         'teachers': serializer.data,
-        'total_count': paginator.count,
-        'current_page': page
-    })
+        'next_cursor': next_cursor,
+    }
+    # the counts are only needed to build the first page (and the subject filter) of the screen
+    if not cursor:
+        response['total_count'] = discovery.get_teachers_queryset(student.level, subject_ids, fullname_filter).count()
+        response['subjects_facets'] = discovery.get_subject_facets(student.level, fullname_filter)
+    return Response(response)
 
 
 @api_view(['POST'])
@@ -1,8 +1,8 @@
 from django.contrib import admin
 from .models import (Level,Subject,Teacher,
                      TeacherSubject,TeacherEnrollment,Group,
-                     GroupEnrollment,Class,TeacherUnreadNotification,
-                     TeacherNotification)
+                     GroupEnrollment,Class,ArchivedClass,TeacherUnreadNotification,
+                     TeacherNotification,MonthlyStatement,StatementLine)
 # Register your models here.
 
 admin.site.register(Level)
@@ -13,5 +13,8 @@ admin.site.register(TeacherEnrollment)
 admin.site.register(Group)
 admin.site.register(GroupEnrollment)
 admin.site.register(Class)
+admin.site.register(ArchivedClass)
 admin.site.register(TeacherUnreadNotification)
 admin.site.register(TeacherNotification)
+admin.site.register(MonthlyStatement)
+admin.site.register(StatementLine)
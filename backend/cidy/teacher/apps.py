@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class TeacherConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'teacher'
+
+    def ready(self):
+        # register the signal receivers that drop the cached week schedules
+        from . import schedule  # noqa: F401
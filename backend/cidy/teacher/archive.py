@@ -0,0 +1,80 @@
+"""
+Archive of the classes of the closed school years.
+
+The Class table grows by a row per student and per session, and the overlap
+checks, the payments and the dashboard all read it. Once a school year is
+closed (it starts in settings.SCHOOL_YEAR_START_MONTH), its settled classes
+(attended and paid before the new year started, or missed) are never changed
+again : the archive_classes command moves them to the ArchivedClass table (same
+columns, same ids) in batches, so the hot queries only see the current year.
+
+The history reads (the classes of an enrollment, the CSV export of the classes
+and of the groups, the statements of the past months, the paid amounts of the
+dashboard) union the archive : always for the statements and the dashboard
+ranges starting before the current year, on ?include_archived=true for the
+endpoints. The unpaid and not due classes are never archived, whatever their
+date, so the balances and the payments are unchanged.
+"""
+import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import ArchivedClass, Class
+
+ARCHIVE_BATCH_SIZE = 1000
+# the columns copied from the Class table (with the id)
+ARCHIVED_FIELDS = tuple(field.attname for field in Class._meta.concrete_fields)
+
+
+def school_year_start(today=None):
+    """The first day of the school year of the date (today by default)."""
+    today = today or datetime.date.today()
+    month = getattr(settings, 'SCHOOL_YEAR_START_MONTH', 9)
+    year = today.year if today.month >= month else today.year - 1
+    return datetime.date(year, month, 1)
+
+
+def wants_archived(request):
+    """Whether the request asks for the archived classes too (?include_archived=true)."""
+    return request.query_params.get('include_archived', 'false').lower() == 'true'
+
+
+def archivable_classes(before):
+    """The settled classes held (and paid) before the date, including those of the deleted enrollments."""
+    # a class paid after the date still counts in the collected amounts of the current year
+    paid_before = timezone.make_aware(datetime.datetime.combine(before, datetime.time.min))
+    return Class.objects.filter(
+        Q(status='attended_and_paid', attendance_date__lt=before, paid_at__lt=paid_before)
+        | Q(status='absent', absence_date__lt=before)
+    )
+
+
+def archive_classes(before=None, batch_size=ARCHIVE_BATCH_SIZE, dry_run=False):
+    """Move the settled classes held before the date (the start of the school year by default) to the archive.
+
+    Each batch is copied and deleted in its own transaction. Returns the number of classes archived (or to archive).
+    """
+    before = before or school_year_start()
+    if dry_run:
+        return archivable_classes(before).count()
+
+    archived = 0
+    while True:
+        with transaction.atomic():
+            batch = list(archivable_classes(before).select_for_update().order_by('id').values(*ARCHIVED_FIELDS)[:batch_size])
+            if not batch:
+                return archived
+            ArchivedClass.objects.bulk_create([ArchivedClass(**values) for values in batch])
+            Class.objects.filter(id__in=[values['id'] for values in batch]).delete()
+        archived += len(batch)
+
+
+def enrollment_classes(group_enrollment, include_archived=False):
+    """The classes of the enrollment, preceded by its archived ones when asked."""
+    classes = list(group_enrollment.class_set.all())
+    if include_archived:
+        classes = list(group_enrollment.archivedclass_set.order_by('id')) + classes
+    return classes
@@ -0,0 +1,322 @@
+"""
+Attendance sheet : the attendances, absences and payments of a teaching day
+(several groups and dates) marked with one request.
+
+mark_attendance, mark_absence and mark_payment handle one group at a time and
+run a few queries per student (its enrollments, its overlapping classes, its
+unpaid classes, its notifications). The sheet loads everything its entries
+need once : the groups, the group and teacher enrollments of the students, the
+classes of the students on the dates of the sheet (the overlap checks) and
+their attended classes not paid yet. Then it applies the entries in order in
+memory, with the same rules as the per-group endpoints (every 4th attended
+class makes the payment of the batch due, a payment pays the oldest attended
+classes first), and writes the result with bulk_create / bulk_update in one
+transaction. Each entry gets its own result.
+
+An entry is a dict with a type and the ids of the group and the student :
+    {"type": "attendance" | "absence", "group_id", "student_id", "date": "DD/MM/YYYY", "start_time": "HH:MM", "end_time": "HH:MM"}
+    {"type": "payment", "group_id", "student_id", "number_of_classes", "payment_datetime": "HH:MM:SS-DD/MM/YYYY"}
+"""
+import datetime
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from common.notifications import son_params, teacher_params
+from common.tools import bulk_save_notifications, get_sons_by_student_id
+from parent.models import ParentNotification
+from student.models import StudentNotification
+from .models import Class, Group, GroupEnrollment, TeacherEnrollment
+
+ATTENDANCE, ABSENCE, PAYMENT = 'attendance', 'absence', 'payment'
+MAX_ENTRIES = 500
+
+# results
+MARKED = 'marked'
+INVALID = 'invalid'
+NOT_FOUND = 'not_found'
+OVERLAPPING_CLASS = 'overlapping_class'
+NOT_ENOUGH_CLASSES = 'not_enough_classes'
+
+PAID = 'attended_and_paid'
+DUE = 'attended_and_the_payment_due'
+NOT_DUE = 'attended_and_the_payment_not_due'
+
+
+class Entry:
+    """A validated entry of the sheet."""
+
+    def __init__(self, index, data):
+        self.index = index
+        if not isinstance(data, dict):
+            raise ValueError("An entry must be an object")
+        self.type = data.get('type')
+        if self.type not in (ATTENDANCE, ABSENCE, PAYMENT):
+            raise ValueError("The type must be attendance, absence or payment")
+        try:
+            self.group_id = int(data.get('group_id'))
+            self.student_id = int(data.get('student_id'))
+        except (TypeError, ValueError):
+            raise ValueError("The group_id and the student_id are required")
+
+        if self.type == PAYMENT:
+            self.number_of_classes = data.get('number_of_classes')
+            if not isinstance(self.number_of_classes, int) or self.number_of_classes < 1:
+                raise ValueError("Invalid number of classes to mark as paid")
+            try:
+                self.payment_datetime = timezone.make_aware(
+                    datetime.datetime.strptime(data.get('payment_datetime') or '', "%H:%M:%S-%d/%m/%Y")
+                )
+            except ValueError:
+                raise ValueError("The payment datetime is required (HH:MM:SS-DD/MM/YYYY)")
+        else:
+            try:
+                self.date = datetime.datetime.strptime(data.get('date') or '', "%d/%m/%Y").date()
+                self.start_time = datetime.datetime.strptime(data.get('start_time') or '', "%H:%M").time()
+                self.end_time = datetime.datetime.strptime(data.get('end_time') or '', "%H:%M").time()
+            except ValueError:
+                raise ValueError("The date (DD/MM/YYYY), start time and end time (HH:MM) are required")
+            if self.start_time >= self.end_time:
+                raise ValueError("The start time must be before the end time")
+
+    def result(self, status, **extra):
+        return {'index': self.index, 'type': self.type, 'group_id': self.group_id, 'student_id': self.student_id,
+                'status': status, **extra}
+
+
+def _pending_order(class_):
+    # the classes created by the sheet don't have an id yet and come after the others of their time
+    return class_.attendance_date, class_.attendance_start_time, class_.id if class_.id is not None else float('inf')
+
+
+class AttendanceSheet:
+    """Apply the entries of a sheet for the teacher : load once, apply in memory, save in bulk."""
+
+    def __init__(self, teacher, entries):
+        self.teacher = teacher
+        self.entries = entries
+        self.results = {}
+        self.new_classes = []
+        self.changed_classes = {}
+        self.changed_group_enrollments = {}
+        self.changed_teacher_enrollments = {}
+        self.changed_groups = {}
+        # (student, group, student template, parent template, params) of the notifications to send
+        self.notifications = []
+
+    def load(self):
+        group_ids = {entry.group_id for entry in self.entries}
+        student_ids = {entry.student_id for entry in self.entries}
+        self.groups = {
+            group.id: group for group in Group.objects.filter(id__in=group_ids, teacher=self.teacher)
+                                                      .select_related('teacher_subject__subject')
+                                                      .select_for_update(of=('self',))
+        }
+        self.group_enrollments = {
+            (enrollment.group_id, enrollment.student_id): enrollment
+            for enrollment in GroupEnrollment.objects.filter(group_id__in=self.groups, student_id__in=student_ids)
+                                                     .select_related('student')
+                                                     .select_for_update(of=('self',))
+        }
+        self.teacher_enrollments = {
+            enrollment.student_id: enrollment
+            for enrollment in TeacherEnrollment.objects.filter(teacher=self.teacher, student_id__in=student_ids)
+                                                       .select_for_update()
+        }
+
+        # the time ranges of the classes of the students with the teacher on the dates of the sheet
+        dates = {entry.date for entry in self.entries if entry.type != PAYMENT}
+        self.time_ranges = defaultdict(list)
+        if dates:
+            classes = (Class.objects.of_active_enrollments()
+                                    .filter(group_enrollment__student_id__in=student_ids,
+                                            group_enrollment__group__teacher=self.teacher)
+                                    .filter(Q(attendance_date__in=dates) | Q(absence_date__in=dates))
+                                    .values_list('group_enrollment__student_id', 'attendance_date', 'attendance_start_time',
+                                                 'attendance_end_time', 'absence_date', 'absence_start_time', 'absence_end_time'))
+            for student_id, *times in classes:
+                for date, start_time, end_time in (times[:3], times[3:]):
+                    if date is not None:
+                        self.time_ranges[student_id, date].append((start_time, end_time))
+
+        # the attended classes not paid yet of the enrollments of the sheet
+        self.pending_classes = defaultdict(list)
+        for class_ in Class.objects.filter(group_enrollment__in=self.group_enrollments.values(), status__in=(DUE, NOT_DUE)) \
+                                   .order_by('attendance_date', 'attendance_start_time', 'id'):
+            self.pending_classes[class_.group_enrollment_id].append(class_)
+
+    def apply(self):
+        for entry in self.entries:
+            group = self.groups.get(entry.group_id)
+            group_enrollment = self.group_enrollments.get((entry.group_id, entry.student_id))
+            teacher_enrollment = self.teacher_enrollments.get(entry.student_id)
+            if group is None or group_enrollment is None or teacher_enrollment is None:
+                self.results[entry.index] = entry.result(NOT_FOUND)
+                continue
+            apply_entry = {ATTENDANCE: self.mark_attendance, ABSENCE: self.mark_absence, PAYMENT: self.mark_payment}[entry.type]
+            self.results[entry.index] = apply_entry(entry, group, group_enrollment, teacher_enrollment)
+
+    def overlaps(self, entry):
+        return any(start_time < entry.end_time and end_time > entry.start_time
+                   for start_time, end_time in self.time_ranges[entry.student_id, entry.date])
+
+    def add_class(self, entry, group_enrollment, **fields):
+        class_ = Class(group_enrollment=group_enrollment, **fields)
+        self.new_classes.append(class_)
+        self.time_ranges[entry.student_id, entry.date].append((entry.start_time, entry.end_time))
+        return class_
+
+    def change_amounts(self, group, group_enrollment, teacher_enrollment, paid=0, unpaid=0):
+        group_enrollment.paid_amount += paid
+        group_enrollment.unpaid_amount += unpaid
+        teacher_enrollment.paid_amount += paid
+        teacher_enrollment.unpaid_amount += unpaid
+        group.total_paid += paid
+        group.total_unpaid += unpaid
+        self.changed_group_enrollments[group_enrollment.id] = group_enrollment
+        self.changed_teacher_enrollments[teacher_enrollment.id] = teacher_enrollment
+        self.changed_groups[group.id] = group
+
+    def set_status(self, class_, status):
+        class_.status = status
+        if class_.id is not None:
+            self.changed_classes[class_.id] = class_
+
+    def mark_attendance(self, entry, group, group_enrollment, teacher_enrollment):
+        if self.overlaps(entry):
+            return entry.result(OVERLAPPING_CLASS)
+
+        price = group.teacher_subject.price_per_class
+        pending_classes = self.pending_classes[group_enrollment.id]
+        # the class of this attendance completes the next batch of 4 classes : their payment is due
+        if (group_enrollment.attended_non_paid_classes + 1) % 4 == 0:
+            for class_ in pending_classes:
+                if class_.status == NOT_DUE:
+                    self.set_status(class_, DUE)
+            status = DUE
+            self.change_amounts(group, group_enrollment, teacher_enrollment, unpaid=price * 4)
+        else:
+            status = NOT_DUE
+        pending_classes.append(self.add_class(
+            entry, group_enrollment, status=status, attendance_date=entry.date,
+            attendance_start_time=entry.start_time, attendance_end_time=entry.end_time
+        ))
+        group_enrollment.attended_non_paid_classes += 1
+        self.changed_group_enrollments[group_enrollment.id] = group_enrollment
+
+        params = self.session_params(entry, group)
+        if status == DUE:
+            params['unpaid_amount'] = str(group_enrollment.unpaid_amount)
+            self.notify(group_enrollment.student, group, 'student_attendance_due', 'parent_attendance_due', params)
+        else:
+            self.notify(group_enrollment.student, group, 'student_attendance', 'parent_attendance', params)
+        return entry.result(MARKED)
+
+    def mark_absence(self, entry, group, group_enrollment, teacher_enrollment):
+        if self.overlaps(entry):
+            return entry.result(OVERLAPPING_CLASS)
+
+        self.add_class(entry, group_enrollment, status='absent', absence_date=entry.date,
+                       absence_start_time=entry.start_time, absence_end_time=entry.end_time)
+
+        self.notify(group_enrollment.student, group, 'student_absence', 'parent_absence', self.session_params(entry, group))
+        return entry.result(MARKED)
+
+    def mark_payment(self, entry, group, group_enrollment, teacher_enrollment):
+        price = group.teacher_subject.price_per_class
+        pending_classes = sorted(self.pending_classes[group_enrollment.id], key=_pending_order)
+        paid_classes, remaining_classes = pending_classes[:entry.number_of_classes], pending_classes[entry.number_of_classes:]
+
+        for class_ in paid_classes:
+            self.change_amounts(group, group_enrollment, teacher_enrollment, paid=price,
+                                unpaid=-price if class_.status == DUE else 0)
+            self.set_status(class_, PAID)
+            class_.paid_at = entry.payment_datetime
+            group_enrollment.attended_non_paid_classes -= 1
+
+        # the remaining attended classes : the complete batches of 4 are due, the rest isn't
+        due_classes_count = len(remaining_classes) - len(remaining_classes) % 4
+        for position, class_ in enumerate(remaining_classes):
+            if position < due_classes_count and class_.status == NOT_DUE:
+                self.set_status(class_, DUE)
+                self.change_amounts(group, group_enrollment, teacher_enrollment, unpaid=price)
+            elif position >= due_classes_count and class_.status == DUE:
+                self.set_status(class_, NOT_DUE)
+                self.change_amounts(group, group_enrollment, teacher_enrollment, unpaid=-price)
+        self.pending_classes[group_enrollment.id] = remaining_classes
+        self.changed_group_enrollments[group_enrollment.id] = group_enrollment
+
+        if paid_classes:
+            self.notify(group_enrollment.student, group, 'student_payment', 'parent_payment',
+                        teacher_params(self.teacher, group.teacher_subject.subject.name, classes=len(paid_classes)))
+        missing_number_of_classes = entry.number_of_classes - len(paid_classes)
+        if missing_number_of_classes:
+            return entry.result(NOT_ENOUGH_CLASSES, paid_classes=len(paid_classes),
+                                missing_number_of_classes=missing_number_of_classes)
+        return entry.result(MARKED, paid_classes=len(paid_classes))
+
+    def session_params(self, entry, group):
+        """The params of the notification of an attendance or an absence."""
+        return teacher_params(self.teacher, group.teacher_subject.subject.name, date=f"{entry.date:%d/%m/%Y}",
+                              start_time=f"{entry.start_time:%H:%M}", end_time=f"{entry.end_time:%H:%M}")
+
+    def notify(self, student, group, student_template, parent_template, params):
+        self.notifications.append((student, group, student_template, parent_template, params))
+
+    def save(self):
+        Class.objects.bulk_create(self.new_classes)
+        if self.changed_classes:
+            Class.objects.bulk_update(self.changed_classes.values(), ['status', 'paid_at'])
+        if self.changed_group_enrollments:
+            GroupEnrollment.objects.bulk_update(
+                self.changed_group_enrollments.values(), ['paid_amount', 'unpaid_amount', 'attended_non_paid_classes']
+            )
+        if self.changed_teacher_enrollments:
+            TeacherEnrollment.objects.bulk_update(self.changed_teacher_enrollments.values(), ['paid_amount', 'unpaid_amount'])
+        if self.changed_groups:
+            Group.objects.bulk_update(self.changed_groups.values(), ['total_paid', 'total_unpaid'])
+
+        sons_by_student_id = get_sons_by_student_id({student.id for student, *_rest in self.notifications})
+        student_notifications, parent_notifications = [], []
+        for student, group, student_template, parent_template, params in self.notifications:
+            if student.user_id:
+                student_notifications.append(StudentNotification(
+                    student=student, image=self.teacher.image, template=student_template, params=params,
+                    meta_data={"group_id": group.id}
+                ))
+            for son in sons_by_student_id.get(student.id, []):
+                parent_notifications.append(ParentNotification(
+                    parent=son.parent, image=son.image, template=parent_template, params=son_params(params, student, son),
+                    meta_data={"son_id": son.id, "group_id": group.id}
+                ))
+        bulk_save_notifications(student_notifications, parent_notifications)
+
+
+def mark_attendance_sheet(teacher, entries):
+    """Apply the entries (dicts, see the module docstring) for the teacher and return the result of each entry, in order.
+
+    Raises ValueError when the sheet itself is invalid (not a list, too many entries).
+    """
+    if not isinstance(entries, list) or not entries:
+        raise ValueError("No entries provided")
+    if len(entries) > MAX_ENTRIES:
+        raise ValueError(f"Too many entries, {MAX_ENTRIES} at most")
+
+    results = {}
+    valid_entries = []
+    for index, data in enumerate(entries):
+        try:
+            valid_entries.append(Entry(index, data))
+        except ValueError as error:
+            results[index] = {'index': index, 'status': INVALID, 'error': str(error)}
+
+    if valid_entries:
+        with transaction.atomic():
+            sheet = AttendanceSheet(teacher, valid_entries)
+            sheet.load()
+            sheet.apply()
+            sheet.save()
+        results.update(sheet.results)
+    return [results[index] for index in range(len(entries))]
@@ -0,0 +1,114 @@
+"""
+Teacher discovery (the teachers lists of the students and parents).
+
+Each teacher subject row is an offering of a teacher : (teacher, level, subject,
+price), indexed by (level, subject, teacher) and (teacher, level, subject). A
+page of teachers is read with one query (the teachers having a matching
+offering, through an EXISTS on the first index) and their offerings with a
+second one (prefetched in teacher.offerings, through the second index), so the
+serializers never query per teacher.
+
+The pages are keyset paginated : the cursor is the position of the last teacher
+of the page (its id, preceded by its search rank when searching by name).
+"""
+import base64
+import json
+
+from django.db.models import Count, Exists, OuterRef, Prefetch, Q
+
+from common.search import search
+from .models import Teacher, TeacherSubject
+
+DEFAULT_PAGE_SIZE = 30
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(position):
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+
+def decode_cursor(cursor):
+    if not cursor:
+        return None
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise InvalidCursor(cursor)
+    if not isinstance(position, list) or not position:
+        raise InvalidCursor(cursor)
+    return position
+
+
+def get_offerings(level=None, subject_ids=None):
+    offerings = TeacherSubject.objects.all()
+    if level is not None:
+        offerings = offerings.filter(level=level)
+    if subject_ids:
+        offerings = offerings.filter(subject_id__in=subject_ids)
+    return offerings
+
+
+def get_teachers_queryset(level=None, subject_ids=None, search_term=''):
+    """The teachers having an offering of the level (and one of the subjects), ordered by their position."""
+    matching_offerings = get_offerings(level, subject_ids).filter(teacher=OuterRef('pk'))
+    teachers = Teacher.objects.filter(Exists(matching_offerings))
+    if search_term:
+        return search(teachers, search_term).order_by('-search_rank', 'id')
+    return teachers.order_by('id')
+
+
+def get_teachers_page(level=None, subject_ids=None, search_term='', cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """Return (teachers, next_cursor) : the page of teachers after the cursor with their offerings.
+
+    teacher.offerings holds all of the offerings of the teacher and teacher.matching_offerings
+    the ones of the level (all of them if no level is given). next_cursor is None on the last page.
+    Raises InvalidCursor if the cursor wasn't returned by a previous call.
+    """
+    teachers = get_teachers_queryset(level, subject_ids, search_term)
+
+    position = decode_cursor(cursor)
+    if position is not None:
+        if search_term:
+            if len(position) != 2:
+                raise InvalidCursor(cursor)
+            rank, last_id = position
+            teachers = teachers.filter(Q(search_rank__lt=rank) | Q(search_rank=rank, id__gt=last_id))
+        else:
+            teachers = teachers.filter(id__gt=position[-1])
+
+    teachers = teachers.select_related('user').prefetch_related(Prefetch(
+        'teachersubject_set',
+        queryset=TeacherSubject.objects.select_related('level', 'subject').order_by('level__order', 'subject__name'),
+        to_attr='offerings'
+    ))
+    page = list(teachers[:page_size + 1])
+    has_next_page = len(page) > page_size
+    page = page[:page_size]
+
+    for teacher in page:
+        teacher.matching_offerings = [
+            offering for offering in teacher.offerings if level is None or offering.level_id == level.id
+        ]
+
+    next_cursor = None
+    if has_next_page:
+        last_teacher = page[-1]
+        next_cursor = encode_cursor(
+            [last_teacher.search_rank, last_teacher.id] if search_term else [last_teacher.id]
+        )
+    return page, next_cursor
+
+
+def get_subject_facets(level=None, search_term=''):
+    """Count the teachers offering each subject of the level (to build the subject filter)."""
+    offerings = get_offerings(level)
+    if search_term:
+        offerings = offerings.filter(teacher__in=search(Teacher.objects.all(), search_term).values('pk'))
+    return list(
+        offerings.values('subject_id', 'subject__name')
+                 .annotate(teachers_count=Count('teacher_id', distinct=True))
+                 .order_by('subject__name')
+    )
@@ -0,0 +1,159 @@
+"""
+Set based enrollment operations.
+
+Each operation runs a constant number of queries whatever the number of students
+(one INSERT with ignore_conflicts on the (student, group) unique constraint, or one
+DELETE/UPDATE ... WHERE id IN) and returns the outcome of each requested student id.
+
+The heavy deletes (groups, students and teacher subjects with their whole class
+history) only soft delete the rows, which hides them right away, and enqueue a
+job that purges them in the background.
+"""
+from django.db import transaction
+
+from common.jobs import enqueue_job
+from student.models import Student
+from .models import Group, GroupEnrollment, TeacherEnrollment
+from .jobs import PURGE_GROUPS, PURGE_STUDENTS, PURGE_TEACHER_SUBJECTS
+from .schedule import bump_schedule_version
+
+# outcomes
+ENROLLED = 'enrolled'
+ALREADY_ENROLLED = 'already_enrolled'
+REMOVED = 'removed'
+NOT_ENROLLED = 'not_enrolled'
+DELETED = 'deleted'
+NOT_FOUND = 'not_found'
+
+
+def clean_ids(ids):
+    """Return the distinct integer ids of the list, ignoring the invalid ones."""
+    cleaned_ids = []
+    for id_ in ids or []:
+        try:
+            id_ = int(id_)
+        except (TypeError, ValueError):
+            continue
+        if id_ not in cleaned_ids:
+            cleaned_ids.append(id_)
+    return cleaned_ids
+
+
+def enroll_students_in_group(group, student_ids):
+    """Enroll the students of the teacher of the group in the group.
+
+    Returns (outcomes, enrolled_students) where outcomes maps each requested student id
+    to ENROLLED, ALREADY_ENROLLED or NOT_FOUND (not a student of the teacher) and
+    enrolled_students are the students that were newly enrolled.
+    """
+    student_ids = clean_ids(student_ids)
+    students = list(Student.objects.filter(id__in=student_ids, teacherenrollment__teacher_id=group.teacher_id))
+    already_enrolled_ids = set(
+        GroupEnrollment.objects.filter(group=group, student_id__in=[student.id for student in students])
+                               .values_list('student_id', flat=True)
+    )
+    enrolled_students = [student for student in students if student.id not in already_enrolled_ids]
+
+    # a soft deleted enrollment waiting for its purge would make the insert below be ignored
+    GroupEnrollment.all_objects.filter(
+        group=group, student__in=enrolled_students, deleted_at__isnull=False
+    ).delete()
+    GroupEnrollment.objects.bulk_create(
+        [GroupEnrollment(group=group, student=student) for student in enrolled_students],
+        ignore_conflicts=True
+    )
+
+    outcomes = {student_id: NOT_FOUND for student_id in student_ids}
+    for student in students:
+        outcomes[student.id] = ALREADY_ENROLLED if student.id in already_enrolled_ids else ENROLLED
+    return outcomes, enrolled_students
+
+
+def unenroll_students_from_group(group, student_ids):
+    """Remove the students from the group (their classes of the group are deleted too).
+
+    Returns (outcomes, removed_students) where outcomes maps each requested student id
+    to REMOVED or NOT_ENROLLED.
+    """
+    student_ids = clean_ids(student_ids)
+    enrollments = GroupEnrollment.objects.filter(group=group, student_id__in=student_ids).select_related('student')
+    removed_students = [enrollment.student for enrollment in enrollments]
+    enrollment_ids = [enrollment.id for enrollment in enrollments]
+
+    GroupEnrollment.objects.filter(id__in=enrollment_ids).delete()
+
+    outcomes = {student_id: NOT_ENROLLED for student_id in student_ids}
+    for student in removed_students:
+        outcomes[student.id] = REMOVED
+    return outcomes, removed_students
+
+
+def remove_students_from_teacher(teacher, students, owner=None):
+    """End the relation between the teacher and the students.
+
+    The students with an independent account only lose their enrollments with the teacher
+    and in his groups, the others are soft deleted. The group enrollments of both are soft
+    deleted too. Returns (outcomes, job) where outcomes maps each student id to DELETED and
+    job purges the soft deleted students and group enrollments with their classes (None if
+    nothing was soft deleted).
+    """
+    students = list(students)
+    student_ids = [student.id for student in students]
+    independent_student_ids = [student.id for student in students if student.user_id]
+    dependent_student_ids = [student.id for student in students if not student.user_id]
+
+    job = None
+    with transaction.atomic():
+        TeacherEnrollment.objects.filter(teacher=teacher, student_id__in=student_ids).delete()
+        group_enrollment_ids = list(
+            GroupEnrollment.objects.filter(group__teacher=teacher, student_id__in=independent_student_ids)
+                                   .values_list('id', flat=True)
+        )
+        GroupEnrollment.objects.filter(id__in=group_enrollment_ids).soft_delete()
+
+        GroupEnrollment.objects.filter(student_id__in=dependent_student_ids).soft_delete()
+        Student.objects.filter(id__in=dependent_student_ids).soft_delete()
+
+        if dependent_student_ids or group_enrollment_ids:
+            job = enqueue_job(PURGE_STUDENTS, owner=owner, student_ids=dependent_student_ids,
+                              group_enrollment_ids=group_enrollment_ids)
+
+    return {student_id: DELETED for student_id in student_ids}, job
+
+
+def delete_groups(teacher, group_ids, owner=None):
+    """Delete the groups of the teacher with their enrollments and classes.
+
+    Returns (outcomes, job) where outcomes maps each requested group id to DELETED or
+    NOT_FOUND and job purges the soft deleted rows (None if no group was deleted).
+    """
+    group_ids = clean_ids(group_ids)
+    existing_group_ids = list(Group.objects.filter(teacher=teacher, id__in=group_ids).values_list('id', flat=True))
+
+    job = None
+    if existing_group_ids:
+        with transaction.atomic():
+            GroupEnrollment.objects.filter(group_id__in=existing_group_ids).soft_delete()
+            Group.objects.filter(id__in=existing_group_ids).soft_delete()
+            job = enqueue_job(PURGE_GROUPS, owner=owner, group_ids=existing_group_ids)
+        # the soft delete is a bulk update, no signal drops the cached weeks
+        bump_schedule_version(teacher.id)
+
+    outcomes = {group_id: NOT_FOUND for group_id in group_ids}
+    for group_id in existing_group_ids:
+        outcomes[group_id] = DELETED
+    return outcomes, job
+
+
+def delete_teacher_subject(teacher_subject, owner=None):
+    """Delete the teacher subject with its groups, their enrollments and classes.
+
+    Returns the job that purges the soft deleted rows.
+    """
+    with transaction.atomic():
+        GroupEnrollment.objects.filter(group__teacher_subject=teacher_subject).soft_delete()
+        Group.objects.filter(teacher_subject=teacher_subject).soft_delete()
+        type(teacher_subject).objects.filter(id=teacher_subject.id).soft_delete()
+        job = enqueue_job(PURGE_TEACHER_SUBJECTS, owner=owner, teacher_subject_ids=[teacher_subject.id])
+    bump_schedule_version(teacher_subject.teacher_id)
+    return job
@@ -0,0 +1,142 @@
+"""
+CSV exports of the data of a teacher : his students with their balances, his
+groups with their totals and the history of their classes.
+
+Each export is a values_list() query read with a server side cursor
+(.iterator(chunk_size=EXPORT_CHUNK_SIZE)) and streamed by
+common.exports.csv_response, so the memory of the worker stays flat whatever
+the number of rows. The optional date range (from / to, included) selects the
+students enrolled, and the classes held (attended or missed), in the range.
+The classes of the closed school years moved to the archive (see archive.py)
+are counted and listed when include_archived is set.
+"""
+import datetime
+
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import ArchivedClass, Class, Group, TeacherEnrollment
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+def parse_date_range(params):
+    """The (from, to) dates of the query params (YYYY-MM-DD, optional), ValueError if they're invalid."""
+    date_from, date_to = (
+        datetime.date.fromisoformat(params[name]) if params.get(name) else None for name in ('from', 'to')
+    )
+    if date_from and date_to and date_from > date_to:
+        raise ValueError("from is after to")
+    return date_from, date_to
+
+
+def _range_filter(field, date_from, date_to):
+    condition = Q()
+    if date_from:
+        condition &= Q(**{f'{field}__gte': date_from})
+    if date_to:
+        condition &= Q(**{f'{field}__lte': date_to})
+    return condition
+
+
+def _format_time(value):
+    return value.strftime('%H:%M') if value else ''
+
+
+STUDENTS_HEADER = ['id', 'fullname', 'phone_number', 'gender', 'level', 'section', 'enrollment_date',
+                   'paid_amount', 'unpaid_amount']
+
+
+def student_rows(teacher, date_from=None, date_to=None):
+    enrollments = (TeacherEnrollment.objects
+                   .filter(teacher=teacher, student__deleted_at__isnull=True)
+                   .filter(_range_filter('date', date_from, date_to))
+                   .order_by('student__fullname', 'student_id')
+                   .values_list('student_id', 'student__fullname', 'student__phone_number', 'student__gender',
+                                'student__level__name', 'student__level__section', 'date', 'paid_amount', 'unpaid_amount'))
+    return enrollments.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+GROUPS_HEADER = ['id', 'name', 'level', 'section', 'subject', 'week_day', 'start_time', 'end_time', 'students',
+                 'attended_classes', 'absences', 'total_paid', 'total_unpaid']
+
+
+def _archived_count(condition):
+    """The number of archived classes of the group matching the condition."""
+    archived = (ArchivedClass.objects
+                .of_active_enrollments()
+                .filter(condition, group_enrollment__group=OuterRef('pk'))
+                .order_by()
+                .values('group_enrollment__group')
+                .annotate(count=Count('id'))
+                .values('count'))
+    return Coalesce(Subquery(archived), 0)
+
+
+def group_rows(teacher, date_from=None, date_to=None, include_archived=False):
+    held = _range_filter('groupenrollment__class__attendance_date', date_from, date_to)
+    missed = _range_filter('groupenrollment__class__absence_date', date_from, date_to)
+    groups = (Group.objects
+              .filter(teacher=teacher)
+              .annotate(
+                  students_count=Count('groupenrollment', filter=Q(groupenrollment__deleted_at__isnull=True), distinct=True),
+                  attended_classes=Count('groupenrollment__class', filter=held & Q(
+                      groupenrollment__deleted_at__isnull=True, groupenrollment__class__attendance_date__isnull=False
+                  )),
+                  absences=Count('groupenrollment__class', filter=missed & Q(
+                      groupenrollment__deleted_at__isnull=True, groupenrollment__class__status='absent'
+                  )),
+              ))
+    if include_archived:
+        groups = groups.annotate(
+            attended_classes=F('attended_classes') + _archived_count(
+                _range_filter('attendance_date', date_from, date_to) & Q(attendance_date__isnull=False)
+            ),
+            absences=F('absences') + _archived_count(_range_filter('absence_date', date_from, date_to) & Q(status='absent')),
+        )
+    groups = (groups
+              .order_by('name', 'id')
+              .values_list('id', 'name', 'teacher_subject__level__name', 'teacher_subject__level__section',
+                           'teacher_subject__subject__name', 'week_day', 'start_time', 'end_time', 'students_count',
+                           'attended_classes', 'absences', 'total_paid', 'total_unpaid'))
+    for row in groups.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield row[:6] + (_format_time(row[6]), _format_time(row[7])) + row[8:]
+
+
+CLASSES_HEADER = ['date', 'start_time', 'end_time', 'status', 'student_id', 'student', 'group', 'subject',
+                  'price', 'paid_at']
+
+
+def _class_values(model, teacher, date_from, date_to):
+    return (model.objects
+            .of_active_enrollments()
+            .filter(group_enrollment__group__teacher=teacher)
+            .annotate(held_on=Coalesce('attendance_date', 'absence_date'),
+                      start_time=Coalesce('attendance_start_time', 'absence_start_time'),
+                      end_time=Coalesce('attendance_end_time', 'absence_end_time'))
+            .filter(_range_filter('held_on', date_from, date_to))
+            .values_list('held_on', 'start_time', 'end_time', 'status', 'group_enrollment__student_id',
+                         'group_enrollment__student__fullname', 'group_enrollment__group__name',
+                         'group_enrollment__group__teacher_subject__subject__name',
+                         'group_enrollment__group__teacher_subject__price_per_class', 'paid_at', 'id'))
+
+
+def class_rows(teacher, date_from=None, date_to=None, include_archived=False):
+    classes = _class_values(Class, teacher, date_from, date_to)
+    if include_archived:
+        # the archived classes kept their ids, the order is the same
+        classes = classes.union(_class_values(ArchivedClass, teacher, date_from, date_to), all=True)
+    classes = classes.order_by('held_on', 'start_time', 'id')
+    for row in classes.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        paid_at = row[-2]
+        yield (row[0], _format_time(row[1]), _format_time(row[2])) + row[3:-2] + (
+            timezone.localtime(paid_at).isoformat(timespec='minutes') if paid_at else '',
+        )
+
+
+EXPORTS = {
+    'students': (STUDENTS_HEADER, student_rows),
+    'groups': (GROUPS_HEADER, group_rows),
+    'classes': (CLASSES_HEADER, class_rows),
+}
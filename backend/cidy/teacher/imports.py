@@ -0,0 +1,182 @@
+"""
+Bulk import of the students of a teacher (and their groups) from a CSV file.
+
+create_student / create_group_student validate each student with a serializer
+(a level lookup and a phone number query per student), so onboarding a whole
+tutoring center that way takes thousands of requests. import_students() reads
+the CSV row by row, validates every row against what is loaded once : the
+levels of the reference data, the groups of the teacher and the phone numbers
+of his students. Then it creates the Student, StudentUnreadNotification,
+TeacherEnrollment and GroupEnrollment rows of the valid rows with bulk_create
+in one transaction. The invalid rows are skipped and reported with their line
+number and their errors.
+
+The columns (the order doesn't matter, comma or semicolon separated, UTF-8) :
+fullname, phone_number, gender (M / F), level, section, group (the name of a
+group of the teacher). The level can be left empty when the group is given,
+the student then takes the level of the group.
+"""
+import csv
+import itertools
+import re
+
+from django.conf import settings
+from django.db import transaction
+
+from common.reference_data import get_reference_data
+from common.search import normalize_search_text
+from student.models import Student, StudentUnreadNotification
+from .models import Group, GroupEnrollment, TeacherEnrollment
+
+COLUMNS = ('fullname', 'phone_number', 'gender', 'level', 'section', 'group')
+REQUIRED_COLUMNS = ('fullname',)
+PHONE_NUMBER_RE = re.compile(r'^\d{8}$')
+DEFAULT_PHONE_NUMBER = '00000000'
+BATCH_SIZE = 500
+
+
+class StudentsImportError(ValueError):
+    """The file can't be imported at all (not a row error) : its message is the error code."""
+
+
+def _max_rows():
+    return getattr(settings, 'STUDENTS_IMPORT_MAX_ROWS', 5000)
+
+
+def read_rows(lines):
+    """Yield (line number, row dict) for each row of the CSV lines, read lazily."""
+    lines = iter(lines)
+    try:
+        header_line = next(lines)
+    except StopIteration:
+        raise StudentsImportError("EMPTY_FILE")
+    delimiter = ';' if header_line.count(';') > header_line.count(',') else ','
+    reader = csv.reader(itertools.chain([header_line], lines), delimiter=delimiter)
+
+    header = [name.strip().lstrip('\ufeff').lower() for name in next(reader)]
+    missing = [name for name in REQUIRED_COLUMNS if name not in header]
+    if missing:
+        raise StudentsImportError("MISSING_COLUMNS: " + ", ".join(missing))
+
+    for values in reader:
+        if not any(value.strip() for value in values):
+            continue
+        yield reader.line_num, {name: value.strip() for name, value in zip(header, values) if name in COLUMNS}
+
+
+class StudentsImport:
+    """The state of an import : what's loaded once and the rows validated so far."""
+
+    def __init__(self, teacher):
+        self.teacher = teacher
+        self.reference_data = get_reference_data()
+        self.phone_numbers = set(
+            Student.objects.filter(teacherenrollment__teacher=teacher).order_by().values_list('phone_number', flat=True)
+        )
+        self.groups_by_name = {}
+        for group in Group.objects.filter(teacher=teacher).select_related('teacher_subject'):
+            self.groups_by_name.setdefault(group.name.strip().casefold(), []).append(group)
+        # (student, group or None) of the valid rows
+        self.students = []
+        self.errors = []
+
+    def validate(self, line, row):
+        errors = []
+        fullname = row.get('fullname', '')
+        if not fullname:
+            errors.append("FULLNAME_REQUIRED")
+        elif len(fullname) > Student._meta.get_field('fullname').max_length:
+            errors.append("FULLNAME_TOO_LONG")
+
+        phone_number = row.get('phone_number', '')
+        if phone_number:
+            if not PHONE_NUMBER_RE.match(phone_number):
+                errors.append("INVALID_PHONE_NUMBER")
+            elif phone_number in self.phone_numbers:
+                errors.append("PHONE_NUMBER_ALREADY_EXISTS")
+
+        gender = (row.get('gender') or 'M').upper()
+        if gender not in ('M', 'F'):
+            errors.append("INVALID_GENDER")
+
+        group = None
+        if row.get('group'):
+            groups = self.groups_by_name.get(row['group'].casefold(), [])
+            if not groups:
+                errors.append("GROUP_NOT_FOUND")
+            elif len(groups) > 1:
+                errors.append("GROUP_NAME_AMBIGUOUS")
+            else:
+                group = groups[0]
+
+        level = None
+        if row.get('level'):
+            level = self.reference_data.get_level(row['level'], row.get('section', ''))
+            if level is None:
+                errors.append("LEVEL_NOT_FOUND")
+            elif group is not None and group.teacher_subject.level_id != level.id:
+                errors.append("GROUP_LEVEL_MISMATCH")
+        elif group is not None:
+            level = self.reference_data.get_level_by_id(group.teacher_subject.level_id)
+        elif not row.get('group'):
+            errors.append("LEVEL_REQUIRED")
+
+        if errors:
+            self.errors.append({'line': line, 'fullname': fullname, 'errors': errors})
+            return
+
+        if phone_number:
+            # the next rows can't reuse it either
+            self.phone_numbers.add(phone_number)
+        student = Student(
+            fullname=fullname, phone_number=phone_number or DEFAULT_PHONE_NUMBER, gender=gender, level=level,
+            search_name=normalize_search_text(fullname),
+        )
+        self.students.append((student, group))
+
+    def save(self):
+        """Create the rows of the valid students (bulk_create skips Student.save() and its post_save receiver)."""
+        students = [student for student, _group in self.students]
+        with transaction.atomic():
+            Student.objects.bulk_create(students, batch_size=BATCH_SIZE)
+            StudentUnreadNotification.objects.bulk_create(
+                [StudentUnreadNotification(student=student) for student in students], batch_size=BATCH_SIZE
+            )
+            TeacherEnrollment.objects.bulk_create(
+                [TeacherEnrollment(teacher=self.teacher, student=student) for student in students], batch_size=BATCH_SIZE
+            )
+            GroupEnrollment.objects.bulk_create(
+                [GroupEnrollment(group=group, student=student) for student, group in self.students if group is not None],
+                batch_size=BATCH_SIZE
+            )
+
+    def report(self, dry_run):
+        return {
+            'dry_run': dry_run,
+            'created_students': len(self.students),
+            'enrolled_in_groups': sum(1 for _student, group in self.students if group is not None),
+            'invalid_rows': len(self.errors),
+            'errors': self.errors,
+        }
+
+
+def import_students(teacher, lines, dry_run=False):
+    """Import the students of the CSV lines (an iterable of str) for the teacher and return the report of the import.
+
+    Raises StudentsImportError when the file itself is invalid (empty, not UTF-8, missing columns, too many rows).
+    With dry_run the rows are only validated.
+    """
+    students_import = StudentsImport(teacher)
+    max_rows = _max_rows()
+    try:
+        for count, (line, row) in enumerate(read_rows(lines), start=1):
+            if count > max_rows:
+                raise StudentsImportError(f"TOO_MANY_ROWS: {max_rows} at most")
+            students_import.validate(line, row)
+    except UnicodeDecodeError:
+        raise StudentsImportError("INVALID_ENCODING: the file must be encoded in UTF-8")
+    except csv.Error as error:
+        raise StudentsImportError(f"INVALID_CSV: {error}")
+    if not dry_run and students_import.students:
+        students_import.save()
+    return students_import.report(dry_run)
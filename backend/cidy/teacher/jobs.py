@@ -0,0 +1,48 @@
+"""
+Background purges of the rows soft deleted by the teacher endpoints.
+
+The classes are purged first (they are the bulk of the rows), then the group
+enrollments and finally the soft deleted rows themselves.
+"""
+from common.jobs import job_handler, purge_in_chunks
+from student.models import Student
+from .models import Class, Group, GroupEnrollment, TeacherSubject
+
+PURGE_GROUPS = 'purge_groups'
+PURGE_STUDENTS = 'purge_students'
+PURGE_TEACHER_SUBJECTS = 'purge_teacher_subjects'
+
+
+@job_handler(PURGE_GROUPS)
+def purge_groups(job):
+    group_ids = job.payload['group_ids']
+    purge_in_chunks(job, [
+        Class.objects.filter(group_enrollment__group_id__in=group_ids),
+        GroupEnrollment.all_objects.filter(group_id__in=group_ids),
+        Group.all_objects.filter(id__in=group_ids, deleted_at__isnull=False),
+    ])
+
+
+@job_handler(PURGE_STUDENTS)
+def purge_students(job):
+    student_ids = job.payload['student_ids']
+    # the enrollments of the students with an independent account in the groups of the teacher who removed them
+    group_enrollment_ids = job.payload.get('group_enrollment_ids', [])
+    purge_in_chunks(job, [
+        Class.objects.filter(group_enrollment__student_id__in=student_ids),
+        Class.objects.filter(group_enrollment_id__in=group_enrollment_ids),
+        GroupEnrollment.all_objects.filter(student_id__in=student_ids),
+        GroupEnrollment.all_objects.filter(id__in=group_enrollment_ids, deleted_at__isnull=False),
+        Student.all_objects.filter(id__in=student_ids, deleted_at__isnull=False),
+    ])
+
+
+@job_handler(PURGE_TEACHER_SUBJECTS)
+def purge_teacher_subjects(job):
+    teacher_subject_ids = job.payload['teacher_subject_ids']
+    purge_in_chunks(job, [
+        Class.objects.filter(group_enrollment__group__teacher_subject_id__in=teacher_subject_ids),
+        GroupEnrollment.all_objects.filter(group__teacher_subject_id__in=teacher_subject_ids),
+        Group.all_objects.filter(teacher_subject_id__in=teacher_subject_ids),
+        TeacherSubject.all_objects.filter(id__in=teacher_subject_ids, deleted_at__isnull=False),
+    ])
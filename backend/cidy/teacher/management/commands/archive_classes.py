@@ -0,0 +1,36 @@
+import datetime
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from teacher.archive import ARCHIVE_BATCH_SIZE, archive_classes, school_year_start
+
+
+class Command(BaseCommand):
+    help = (
+        "Move the settled classes (paid or missed) of the closed school years to the archive table : "
+        "run it once the school year is over (or from a monthly cron job)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--before', help="Archive the classes held before this date (YYYY-MM-DD), "
+                                             "the start of the current school year by default.")
+        parser.add_argument('--batch-size', type=int, default=ARCHIVE_BATCH_SIZE, help="Classes moved per transaction.")
+        parser.add_argument('--dry-run', action='store_true', help="Only count the classes to archive.")
+
+    def handle(self, *args, **options):
+        current_year_start = school_year_start()
+        try:
+            before = datetime.date.fromisoformat(options['before']) if options['before'] else current_year_start
+        except ValueError:
+            raise CommandError(f"Invalid date {options['before']}, expected YYYY-MM-DD")
+        if before > current_year_start:
+            raise CommandError(f"The school year started on {current_year_start} isn't closed, "
+                               f"only the classes held before it can be archived")
+
+        started_at = time.perf_counter()
+        count = archive_classes(before, batch_size=options['batch_size'], dry_run=options['dry_run'])
+        self.stdout.write(
+            f"{count} class(es) held before {before} {'to archive' if options['dry_run'] else 'archived'} "
+            f"in {time.perf_counter() - started_at:.2f} s"
+        )
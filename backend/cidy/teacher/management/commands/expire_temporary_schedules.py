@@ -0,0 +1,25 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from teacher.schedule import expire_temporary_schedules
+
+
+class Command(BaseCommand):
+    help = (
+        "Clear the temporary schedules of the groups whose week is over and drop the cached week schedules "
+        "of their teachers : run it daily (cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--today', help="Expire as of this date (YYYY-MM-DD) instead of today.")
+
+    def handle(self, *args, **options):
+        today = None
+        if options['today']:
+            try:
+                today = date.fromisoformat(options['today'])
+            except ValueError:
+                raise CommandError(f"Invalid date {options['today']}, expected YYYY-MM-DD")
+        count = expire_temporary_schedules(today)
+        self.stdout.write(f"{count} temporary schedule(s) expired")
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from teacher.models import Teacher, TeacherEnrollment
+from teacher.statements import generate_statement, parse_month, previous_month
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate the monthly statements of the teachers (what their students attended, paid and owe) : "
+        "run it on the first day of each month (cron) for the month that ended."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--month', help="The month (YYYY-MM), the previous month by default.")
+        parser.add_argument('--teacher', help="Email of the teacher, every teacher with students by default.")
+
+    def handle(self, *args, **options):
+        try:
+            month = parse_month(options['month']) if options['month'] else previous_month()
+        except ValueError:
+            raise CommandError(f"Invalid month {options['month']}, expected YYYY-MM")
+
+        teachers = Teacher.objects.select_related('user')
+        if options['teacher']:
+            teachers = teachers.filter(user__email=options['teacher'])
+            if not teachers.exists():
+                raise CommandError(f"No teacher with the email {options['teacher']}")
+        else:
+            teachers = teachers.filter(id__in=TeacherEnrollment.objects.values('teacher_id'))
+
+        started_at = time.perf_counter()
+        statements_count = lines_count = 0
+        for teacher in teachers.iterator():
+            statement = generate_statement(teacher, month)
+            statements_count += 1
+            lines_count += statement.students_count
+        self.stdout.write(
+            f"{statements_count} statement(s) of {month:%Y-%m} generated ({lines_count} students) "
+            f"in {time.perf_counter() - started_at:.2f} s"
+        )
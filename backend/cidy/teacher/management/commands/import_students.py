@@ -0,0 +1,39 @@
+import codecs
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from teacher.imports import StudentsImportError, import_students
+from teacher.models import Teacher
+
+
+class Command(BaseCommand):
+    help = (
+        "Import the students of a teacher (and add them to his groups) from a CSV file with the columns "
+        "fullname, phone_number, gender, level, section, group (see teacher/imports.py)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="The CSV file (UTF-8).")
+        parser.add_argument('--teacher', required=True, help="Email of the teacher.")
+        parser.add_argument('--dry-run', action='store_true', help="Only validate the rows.")
+
+    def handle(self, *args, **options):
+        teacher = Teacher.objects.filter(user__email=options['teacher']).first()
+        if teacher is None:
+            raise CommandError(f"No teacher with the email {options['teacher']}")
+
+        started_at = time.perf_counter()
+        try:
+            with open(options['path'], 'rb') as file:
+                report = import_students(teacher, codecs.iterdecode(file, 'utf-8-sig'), dry_run=options['dry_run'])
+        except (OSError, StudentsImportError) as error:
+            raise CommandError(str(error))
+
+        for row in report['errors']:
+            self.stderr.write(f"line {row['line']} ({row['fullname']}) : {', '.join(row['errors'])}")
+        self.stdout.write(
+            f"{'Validated' if report['dry_run'] else 'Imported'} {report['created_students']} student(s) "
+            f"({report['enrolled_in_groups']} added to a group), {report['invalid_rows']} invalid row(s) "
+            f"in {time.perf_counter() - started_at:.2f} s"
+        )
@@ -0,0 +1,29 @@
+# Generated by Django 5.2 on 2026-10-19 18:45
+
+from django.db import migrations, models
+
+from common.search import fill_search_name_operations, trigram_index_operations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teacher', '0014_group_deleted_at_groupenrollment_deleted_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='search_name',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='teacher',
+            name='search_name',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=255),
+        ),
+        *fill_search_name_operations('teacher', 'Group', 'name'),
+        *fill_search_name_operations('teacher', 'Teacher', 'fullname'),
+        *trigram_index_operations('teacher', 'Group'),
+        *trigram_index_operations('teacher', 'Teacher'),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2 on 2026-10-19 18:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teacher', '0015_search_name'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='teachersubject',
+            index=models.Index(fields=['level', 'subject', 'teacher'], name='teacher_offering_level_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='teachersubject',
+            index=models.Index(fields=['teacher', 'level', 'subject'], name='teacher_offering_teacher_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-19 19:09
+
+import common.thumbnails
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teacher', '0016_teacher_offering_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='teacher',
+            name='image',
+            field=common.thumbnails.ThumbnailImageField(default='defaults/teacher.png', upload_to='teacher_images/'),
+        ),
+    ]
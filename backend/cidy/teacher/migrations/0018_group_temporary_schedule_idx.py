@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-19 19:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student', '0010_thumbnail_images'),
+        ('teacher', '0017_thumbnail_images'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='group',
+            index=models.Index(condition=models.Q(('clear_temporary_schedule_at__isnull', False)), fields=['clear_temporary_schedule_at'], name='group_temporary_schedule_idx'),
+        ),
+    ]
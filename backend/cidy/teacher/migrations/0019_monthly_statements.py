@@ -0,0 +1,51 @@
+# Generated by Django 5.2 on 2026-10-19 19:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student', '0010_thumbnail_images'),
+        ('teacher', '0018_group_temporary_schedule_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyStatement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('generated_at', models.DateTimeField(auto_now=True)),
+                ('students_count', models.PositiveIntegerField(default=0)),
+                ('attended_classes', models.PositiveIntegerField(default=0)),
+                ('paid_amount', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('due_amount', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('collected_amount', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('balance', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('teacher', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='teacher.teacher')),
+            ],
+            options={
+                'unique_together': {('teacher', 'month')},
+            },
+        ),
+        migrations.CreateModel(
+            name='StatementLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fullname', models.CharField(max_length=255)),
+                ('attended_classes', models.PositiveIntegerField(default=0)),
+                ('paid_classes', models.PositiveIntegerField(default=0)),
+                ('due_classes', models.PositiveIntegerField(default=0)),
+                ('not_due_classes', models.PositiveIntegerField(default=0)),
+                ('absences', models.PositiveIntegerField(default=0)),
+                ('paid_amount', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('due_amount', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('collected_amount', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('balance', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('statement', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='teacher.monthlystatement')),
+                ('student', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to='student.student')),
+            ],
+        ),
+    ]
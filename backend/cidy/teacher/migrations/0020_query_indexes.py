@@ -0,0 +1,47 @@
+# Generated by Django 5.2 on 2026-10-19 19:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student', '0011_query_indexes'),
+        ('teacher', '0019_monthly_statements'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='class',
+            index=models.Index(fields=['group_enrollment', 'status', 'attendance_date', 'attendance_start_time', 'id'], name='class_enrollment_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='class',
+            index=models.Index(fields=['group_enrollment', 'paid_at'], name='class_enrollment_paid_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='groupenrollment',
+            index=models.Index(fields=['group', 'date'], name='groupenrollment_group_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='teachernotification',
+            index=models.Index(fields=['teacher', 'id'], name='teacher_notification_idx'),
+        ),
+        # the composite indexes are created before the single column indexes they start with are dropped
+        migrations.AlterField(
+            model_name='class',
+            name='group_enrollment',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='teacher.groupenrollment'),
+        ),
+        migrations.AlterField(
+            model_name='groupenrollment',
+            name='group',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='teacher.group'),
+        ),
+        migrations.AlterField(
+            model_name='teachernotification',
+            name='teacher',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='teacher.teacher'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2 on 2026-10-19 19:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teacher', '0020_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedClass',
+            fields=[
+                ('status', models.CharField(choices=[('attended_and_paid', 'Attended & paid'), ('attended_and_the_payment_not_due', 'Attended & the payment not due'), ('attended_and_the_payment_due', 'Attended & the payment due'), ('absent', 'Absent')], max_length=50)),
+                ('attendance_date', models.DateField(blank=True, null=True)),
+                ('attendance_start_time', models.TimeField(blank=True, null=True)),
+                ('attendance_end_time', models.TimeField(blank=True, null=True)),
+                ('absence_date', models.DateField(blank=True, null=True)),
+                ('absence_start_time', models.TimeField(blank=True, null=True)),
+                ('absence_end_time', models.TimeField(blank=True, null=True)),
+                ('paid_at', models.DateTimeField(blank=True, null=True)),
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('group_enrollment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='teacher.groupenrollment')),
+            ],
+            options={
+                'verbose_name_plural': 'archived classes',
+            },
+        ),
+    ]
@@ -1,8 +1,10 @@
 from django.utils import timezone
 from django.db import models
 from account.models import User
+from common.models import SearchableModel, SoftDeleteManager, SoftDeleteModel, SoftDeleteQuerySet, TemplatedNotification
 from django.db.models.signals import post_save
 from django.dispatch import receiver
+from common.thumbnails import ThumbnailImageField
 
 class Level(models.Model):
     name = models.CharField(max_length=100)
@@ -19,8 +21,10 @@ class Subject(models.Model):
     def __str__(self):
         return self.name
 
-class Teacher(models.Model):
-    image = models.ImageField(default='defaults/teacher.png',upload_to='teacher_images/')
+class Teacher(SearchableModel):
+    search_source_field = 'fullname'
+
+    image = ThumbnailImageField(default='defaults/teacher.png',upload_to='teacher_images/')
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     fullname = models.CharField(max_length=255)
     gender = models.CharField(max_length=10, choices=(('M', 'Male'), ('F', 'Female')), default='M')
@@ -30,12 +34,20 @@ class Teacher(models.Model):
         return f"{self.fullname} -- {self.user.email}"
     
 
-class TeacherSubject(models.Model): 
+class TeacherSubject(SoftDeleteModel): 
     teacher = models.ForeignKey(Teacher, on_delete=models.CASCADE)
     level = models.ForeignKey(Level, on_delete=models.CASCADE)
     subject = models.ForeignKey(Subject, on_delete=models.CASCADE)
     price_per_class = models.DecimalField(max_digits=10, decimal_places=2, default=0)
 
+    class Meta:
+        # a teacher subject is an offering of the teacher (teacher, level, subject, price),
+        # these indexes serve the teacher discovery of the students and parents (see discovery.py)
+        indexes = [
+            models.Index(fields=['level', 'subject', 'teacher'], name='teacher_offering_level_idx'),
+            models.Index(fields=['teacher', 'level', 'subject'], name='teacher_offering_teacher_idx'),
+        ]
+
     def __str__(self):
         return f"{self.teacher.fullname} teaches {self.level.name}{' '+self.level.section if self.level.section else ''} {self.subject.name}"
     
@@ -50,7 +62,21 @@ class TeacherEnrollment(models.Model):
     class Meta:
         unique_together = ('teacher', 'student')
 
-class Group(models.Model):
+class GroupQuerySet(SoftDeleteQuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        """Create the groups and drop the cached schedules of their teachers (bulk_create sends no post_save)."""
+        from .schedule import bump_schedule_version
+        groups = super().bulk_create(objs, *args, **kwargs)
+        bump_schedule_version(*{group.teacher_id for group in groups})
+        return groups
+
+
+class Group(SearchableModel, SoftDeleteModel):
+    search_source_field = 'name'
+
+    objects = SoftDeleteManager.from_queryset(GroupQuerySet)()
+    all_objects = models.Manager.from_queryset(GroupQuerySet)()
+
     teacher = models.ForeignKey(Teacher, on_delete=models.CASCADE)
     name = models.CharField(max_length=100)
     teacher_subject = models.ForeignKey(TeacherSubject, on_delete=models.CASCADE)
@@ -86,12 +112,31 @@ class Group(models.Model):
     total_paid = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     total_unpaid = models.DecimalField(max_digits=10, decimal_places=2, default=0)
 
+    class Meta:
+        indexes = [
+            # only the few groups with a temporary schedule, scanned by the expire_temporary_schedules command
+            models.Index(
+                fields=['clear_temporary_schedule_at'], name='group_temporary_schedule_idx',
+                condition=models.Q(clear_temporary_schedule_at__isnull=False),
+            ),
+        ]
+
     def __str__(self):
         return f"{self.teacher_subject.subject.name} group : {self.name}"
+
+    def enrolled_students(self):
+        """The students of the group, read through its enrollments.
+
+        The students relation joins the enrollments without hiding the soft deleted ones (the students removed from
+        the teacher keep theirs until the purge job deletes them), so the group students are read from here.
+        """
+        from student.models import Student
+        return Student.objects.filter(groupenrollment__group=self, groupenrollment__deleted_at__isnull=True)
     
-class GroupEnrollment(models.Model):
+class GroupEnrollment(SoftDeleteModel):
     student = models.ForeignKey('student.Student', on_delete=models.CASCADE)
-    group = models.ForeignKey(Group, on_delete=models.CASCADE)
+    # indexed first by the (group, date) index below
+    group = models.ForeignKey(Group, on_delete=models.CASCADE, db_index=False)
     date = models.DateField(default=timezone.now)
     paid_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     unpaid_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
@@ -101,9 +146,26 @@ class GroupEnrollment(models.Model):
     
     class Meta:
         unique_together = ('student', 'group')
+        indexes = [
+            # the enrollments of the groups of a teacher in a date range (the dashboard)
+            models.Index(fields=['group', 'date'], name='groupenrollment_group_date_idx'),
+        ]
 
 
-class Class(models.Model):
+class ClassQuerySet(models.QuerySet):
+    """The classes aren't soft deleted themselves : their group enrollment is, until the purge job deletes both.
+
+    The queries of a single enrollment (read from GroupEnrollment.objects) never see a deleted one, so only the queries
+    spanning the enrollments of a teacher or of a student hide the classes of the deleted enrollments, with
+    of_active_enrollments() (they already join GroupEnrollment to filter by teacher).
+    """
+
+    def of_active_enrollments(self):
+        return self.filter(group_enrollment__deleted_at__isnull=True)
+
+
+class AbstractClass(models.Model):
+    """The fields of a class, shared by the classes and their archive (see archive.py)."""
     group_enrollment = models.ForeignKey(GroupEnrollment, on_delete=models.CASCADE)
     status = models.CharField(
         max_length=50,
@@ -122,9 +184,77 @@ class Class(models.Model):
     absence_end_time = models.TimeField(null=True, blank=True)
     paid_at = models.DateTimeField(null=True, blank=True)
 
+    objects = ClassQuerySet.as_manager()
+
+    class Meta:
+        abstract = True
+
     def __str__(self):
         return f"Class for {self.group_enrollment.group.name} - {self.status}"
 
+
+class Class(AbstractClass):
+    # indexed first by the indexes below
+    group_enrollment = models.ForeignKey(GroupEnrollment, on_delete=models.CASCADE, db_index=False)
+
+    class Meta:
+        indexes = [
+            # the classes of an enrollment by status, in the order they are paid (the marks, the payments, the dashboard)
+            models.Index(fields=['group_enrollment', 'status', 'attendance_date', 'attendance_start_time', 'id'],
+                         name='class_enrollment_status_idx'),
+            # the classes of an enrollment paid in a date range (the dashboard, the statements)
+            models.Index(fields=['group_enrollment', 'paid_at'], name='class_enrollment_paid_at_idx'),
+        ]
+
+
+class ArchivedClass(AbstractClass):
+    """A settled class of a closed school year, moved out of the Class table by the archive_classes command."""
+    # the id it had in the Class table
+    id = models.BigIntegerField(primary_key=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name_plural = 'archived classes'
+
+class MonthlyStatement(models.Model):
+    """What the students of a teacher attended, paid and owe over a month (see statements.py)."""
+    teacher = models.ForeignKey(Teacher, on_delete=models.CASCADE)
+    # the first day of the month
+    month = models.DateField()
+    generated_at = models.DateTimeField(auto_now=True)
+    students_count = models.PositiveIntegerField(default=0)
+    attended_classes = models.PositiveIntegerField(default=0)
+    paid_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    due_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    collected_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    balance = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = ('teacher', 'month')
+
+    def __str__(self):
+        return f"Statement of {self.teacher.fullname} for {self.month:%Y-%m}"
+
+
+class StatementLine(models.Model):
+    statement = models.ForeignKey(MonthlyStatement, on_delete=models.CASCADE, related_name='lines')
+    student = models.ForeignKey('student.Student', on_delete=models.SET_NULL, null=True)
+    # copied, the statement stays readable once the student is deleted
+    fullname = models.CharField(max_length=255)
+    attended_classes = models.PositiveIntegerField(default=0)
+    paid_classes = models.PositiveIntegerField(default=0)
+    due_classes = models.PositiveIntegerField(default=0)
+    not_due_classes = models.PositiveIntegerField(default=0)
+    absences = models.PositiveIntegerField(default=0)
+    paid_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    due_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    collected_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    # what the student owes the teacher when the statement is generated
+    balance = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"{self.fullname} in {self.statement}"
+
 class TeacherUnreadNotification(models.Model):
     teacher = models.OneToOneField(Teacher, on_delete=models.CASCADE)
     unread_notifications = models.PositiveIntegerField(default=0)
@@ -132,14 +262,22 @@ class TeacherUnreadNotification(models.Model):
     def __str__(self):
         return f"{self.teacher.fullname} - Unread Notifications: {self.unread_notifications}"
 
-class TeacherNotification(models.Model):
-    teacher = models.ForeignKey(Teacher, on_delete=models.CASCADE)
+class TeacherNotification(TemplatedNotification):
+    # indexed first by the (teacher, id) index below
+    teacher = models.ForeignKey(Teacher, on_delete=models.CASCADE, db_index=False)
     image = models.ImageField(default='defaults/due_payment_notification.png')
-    message = models.TextField()
+    # empty for the notifications rendered from their template
+    message = models.TextField(default='', blank=True)
     meta_data = models.JSONField(null=True, blank=True)
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # the pages of notifications of a teacher, newest first, and the marks as read (id <= last id)
+            models.Index(fields=['teacher', 'id'], name='teacher_notification_idx'),
+        ]
+
     def __str__(self):
         return f"Notification for {self.teacher.fullname} - {self.created_at}"
     
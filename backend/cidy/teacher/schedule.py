@@ -0,0 +1,226 @@
+"""
+Weekly schedule of the groups.
+
+A group meets once a week on its permanent slot (week_day, start_time,
+end_time) unless its temporary slot (temporary_week_day, temporary_start_time,
+temporary_end_time) overrides it. The temporary schedule is set for the week
+ending on clear_temporary_schedule_at (the Sunday), so it replaces the
+permanent slot in that week, and in the weeks between the current one and that
+one when it's set further ahead :
+
+    group_occurrence(group, monday)     the dated occurrence of the group in the week
+    expand(groups, start, end)          the occurrences of the groups between two dates
+
+The serializers already hold the rows of their groups, they expand them
+directly. The week schedule screen of a teacher lists all of his groups, so
+its entries are cached per (teacher, week) under a version of the teacher's
+schedule, bumped when one of his groups is saved, deleted or expired
+(bump_schedule_version), instead of loading his groups on every poll. The
+versions and the weeks live in the default cache, which must be shared by the
+workers (REDIS_URL) : a worker keeping its own copies would serve a stale week
+for SCHEDULE_CACHE_TIMEOUT after a change made through another one.
+
+The temporary schedules are cleared once their week is over by the
+expire_temporary_schedules command (a daily cron job), the groups then only
+carry the overrides still in effect.
+"""
+import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Group
+
+WEEK_DAYS = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+VERSION_CACHE_KEY = 'schedule_version:{}'
+WEEK_CACHE_KEY = 'schedule_week:{}:{}:{}:{}'
+
+
+def week_start(day):
+    """The Monday of the week of the day."""
+    return day - datetime.timedelta(days=day.weekday())
+
+
+def override_applies(group, monday, today):
+    """Whether the temporary schedule of the group replaces its permanent one in the week starting on monday."""
+    clear_at = group.clear_temporary_schedule_at
+    if clear_at is None or not (group.temporary_week_day and group.temporary_start_time and group.temporary_end_time):
+        return False
+    # from the current week (the week of clear_at once it's past) to the week of clear_at
+    return week_start(min(today, clear_at)) <= monday <= clear_at
+
+
+class Occurrence:
+    """A class of a group on a date."""
+
+    __slots__ = ('group_id', 'date', 'start_time', 'end_time', 'temporary')
+
+    def __init__(self, group_id, date, start_time, end_time, temporary):
+        self.group_id = group_id
+        self.date = date
+        self.start_time = start_time
+        self.end_time = end_time
+        self.temporary = temporary
+
+    @property
+    def week_day(self):
+        return WEEK_DAYS[self.date.weekday()]
+
+    def __repr__(self):
+        return f"<Occurrence group={self.group_id} {self.date} {self.start_time}-{self.end_time}{' temporary' if self.temporary else ''}>"
+
+
+def group_occurrence(group, monday=None, today=None):
+    """The occurrence of the group in the week starting on monday (the current week by default)."""
+    today = today or datetime.date.today()
+    monday = week_start(monday or today)
+    if override_applies(group, monday, today):
+        week_day, start_time, end_time = group.temporary_week_day, group.temporary_start_time, group.temporary_end_time
+        temporary = True
+    else:
+        week_day, start_time, end_time = group.week_day, group.start_time, group.end_time
+        temporary = False
+    date = monday + datetime.timedelta(days=WEEK_DAYS.index(week_day))
+    return Occurrence(group.id, date, start_time, end_time, temporary)
+
+
+def expand(groups, start, end, today=None):
+    """The occurrences of the groups between start and end (included), sorted by date and time."""
+    today = today or datetime.date.today()
+    occurrences = []
+    monday = week_start(start)
+    while monday <= end:
+        for group in groups:
+            occurrence = group_occurrence(group, monday, today)
+            if start <= occurrence.date <= end:
+                occurrences.append(occurrence)
+        monday += datetime.timedelta(days=7)
+    occurrences.sort(key=lambda occurrence: (occurrence.date, occurrence.start_time, occurrence.group_id))
+    return occurrences
+
+
+def schedule_payload(group, today=None):
+    """The schedule of the group shown to the students and the parents : its temporary slot (this week) and its permanent one."""
+    occurrence = group_occurrence(group, today=today)
+    payload = {}
+    if occurrence.temporary:
+        payload['temporary'] = {
+            "week_day": occurrence.week_day,
+            "start_time": occurrence.start_time,
+            "end_time": occurrence.end_time,
+        }
+    payload['permanent'] = {
+        "week_day": group.week_day,
+        "start_time": group.start_time,
+        "end_time": group.end_time,
+    }
+    return payload
+
+
+# --- the week schedule of the teachers
+
+
+def get_schedule_version(teacher_id):
+    return cache.get(VERSION_CACHE_KEY.format(teacher_id), 0)
+
+
+def _bump(teacher_ids):
+    for teacher_id in teacher_ids:
+        key = VERSION_CACHE_KEY.format(teacher_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+
+def bump_schedule_version(*teacher_ids):
+    """Drop the cached weeks of the teachers (their groups changed).
+
+    Inside a transaction the versions are bumped again once it's committed : another worker may have cached the weeks
+    it read before the commit under the first bump.
+    """
+    teacher_ids = set(teacher_ids)
+    _bump(teacher_ids)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: _bump(teacher_ids))
+
+
+def expire_temporary_schedules(today=None):
+    """Clear the temporary schedules whose week is over, return the number of groups updated."""
+    today = today or datetime.date.today()
+    with transaction.atomic():
+        expired_groups = Group.all_objects.select_for_update().filter(clear_temporary_schedule_at__lt=week_start(today))
+        teacher_ids = set(expired_groups.values_list('teacher_id', flat=True))
+        count = expired_groups.update(
+            temporary_week_day=None, temporary_start_time=None, temporary_end_time=None, clear_temporary_schedule_at=None
+        )
+    # a bulk update, no signal drops the cached weeks
+    bump_schedule_version(*teacher_ids)
+    return count
+
+
+def get_teacher_groups(teacher_id):
+    return Group.objects.filter(teacher_id=teacher_id).select_related('teacher_subject__level', 'teacher_subject__subject')
+
+
+def week_entry(group, occurrence):
+    """The entry of the occurrence in the week schedule screen."""
+    level = group.teacher_subject.level
+    return {
+        'id': group.id,
+        'name': group.name,
+        'level': level.name + (f" {level.section}" if level.section else ""),
+        'subject': group.teacher_subject.subject.name,
+        'temporary_schedule': occurrence.temporary,
+        'week_day': occurrence.week_day,
+        'date': occurrence.date.isoformat(),
+        'start_time': occurrence.start_time.strftime("%H:%M"),
+        'end_time': occurrence.end_time.strftime("%H:%M"),
+    }
+
+
+def build_week(groups, monday, today):
+    groups_by_id = {group.id: group for group in groups}
+    occurrences = expand(groups, monday, monday + datetime.timedelta(days=6), today)
+    return [week_entry(groups_by_id[occurrence.group_id], occurrence) for occurrence in occurrences]
+
+
+def _week_cache_key(teacher_id, version, monday, today):
+    # the weeks before the current one don't show the overrides anymore, the current week is part of the key
+    return WEEK_CACHE_KEY.format(teacher_id, version, monday.isoformat(), week_start(today).isoformat())
+
+
+def _week_args(day, today):
+    today = today or datetime.date.today()
+    return week_start(day or today), today
+
+
+def get_teacher_week(teacher_id, day=None, today=None):
+    """The week schedule entries of the teacher for the week of the day (the current week by default)."""
+    monday, today = _week_args(day, today)
+    key = _week_cache_key(teacher_id, get_schedule_version(teacher_id), monday, today)
+    entries = cache.get(key)
+    if entries is None:
+        entries = build_week(list(get_teacher_groups(teacher_id)), monday, today)
+        cache.set(key, entries, getattr(settings, 'SCHEDULE_CACHE_TIMEOUT', 24 * 3600))
+    return entries
+
+
+async def aget_teacher_week(teacher_id, day=None, today=None):
+    """Async variant of get_teacher_week (ASGI)"""
+    monday, today = _week_args(day, today)
+    version = await cache.aget(VERSION_CACHE_KEY.format(teacher_id), 0)
+    key = _week_cache_key(teacher_id, version, monday, today)
+    entries = await cache.aget(key)
+    if entries is None:
+        entries = build_week([group async for group in get_teacher_groups(teacher_id)], monday, today)
+        await cache.aset(key, entries, getattr(settings, 'SCHEDULE_CACHE_TIMEOUT', 24 * 3600))
+    return entries
+
+
+@receiver([post_save, post_delete], sender=Group)
+def group_changed(sender, instance, **kwargs):
+    bump_schedule_version(instance.teacher_id)
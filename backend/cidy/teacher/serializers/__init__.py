@@ -13,8 +13,11 @@ from .student_serializers import (TeacherStudentListSerializer,
                                   TeacherStudentDetailSerializer,
                                   TeacherClassListSerializer,TeacherStudentUpdateSerializer)
 from .notification_serializers import TeacherNotificationSerializer
+from .projections import (GroupListProjection, GroupStudentListProjection, GroupPossibleStudentListProjection,
+                          TeacherStudentListProjection, TeacherNotificationProjection)
 from .account_serializers import (
     TeacherAccountInfoSerializer,
     UpdateTeacherAccountInfoSerializer,
     ChangeTeacherPasswordSerializer,
-)
\ No newline at end of file
+)
+from .statement_serializers import MonthlyStatementSerializer, StatementLineSerializer
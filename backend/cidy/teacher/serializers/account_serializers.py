@@ -1,16 +1,18 @@
 from rest_framework import serializers
+from common.thumbnails import ThumbnailUrlField
 from account.models import User
 from teacher.models import Teacher
 
 class TeacherAccountInfoSerializer(serializers.ModelSerializer):
     """Serializer for retrieving teacher account information."""
     image = serializers.CharField(source='image.url', read_only=True)
+    thumbnail = ThumbnailUrlField(source='image', size='medium')
     email = serializers.EmailField(source='user.email', read_only=True)
     phone_number = serializers.CharField(source='user.phone_number', read_only=True)
 
     class Meta:
         model = Teacher
-        fields = ['image', 'fullname', 'email', 'phone_number', 'gender']
+        fields = ['image', 'thumbnail', 'fullname', 'email', 'phone_number', 'gender']
 
 
 class UpdateTeacherAccountInfoSerializer(serializers.ModelSerializer):
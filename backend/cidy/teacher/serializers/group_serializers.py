@@ -1,9 +1,12 @@
 from datetime import datetime, timedelta
 from rest_framework import serializers
+from common.thumbnails import ThumbnailUrlField
 from django.db.models import Sum, Q,Value,DecimalField
 from django.db.models.functions import Coalesce
 
 from ..models import Group, TeacherSubject
+from ..schedule import group_occurrence
+from ..timetable import get_timetable
 from student.models import Student
 from .subject_serializers import LevelSerializer, SubjectSerializer
 from django.core.paginator import Paginator
@@ -29,18 +32,20 @@ class StudentsWithOverlappingClasses(serializers.ModelSerializer):
 class GroupStudentListSerializer(serializers.Serializer):
     id = serializers.IntegerField()
     image = serializers.CharField(source='image.url')
+    thumbnail = ThumbnailUrlField(source='image')
     fullname = serializers.CharField()
     paid_amount = serializers.DecimalField(max_digits=10, decimal_places=2)
     unpaid_amount = serializers.DecimalField(max_digits=10, decimal_places=2)
     
     class Meta : 
-        fields = ['id','image','fullname','paid_amount','unpaid_amount']
+        fields = ['id','image','thumbnail','fullname','paid_amount','unpaid_amount']
 
 class GroupPossibleStudentListSerializer(serializers.ModelSerializer):
     image = serializers.CharField(source='image.url',read_only=True)
+    thumbnail = ThumbnailUrlField(source='image')
     class Meta : 
         model = Student 
-        fields = ['id','image','fullname']
+        fields = ['id','image','thumbnail','fullname']
 
 class GroupDetailsSerializer(serializers.ModelSerializer):
     level = serializers.CharField(source='teacher_subject.level.name', read_only=True)
@@ -61,31 +66,22 @@ class GroupDetailsSerializer(serializers.ModelSerializer):
             'total_paid', 'total_unpaid','students'
         ]
 
+    def to_representation(self, group):
+        # the schedule fields show the occurrence of the group in the current week
+        self._occurrence = group_occurrence(group)
+        return super().to_representation(group)
+
     def get_start_time(self, group):
-        today = datetime.now().date()
-        if group.clear_temporary_schedule_at and group.clear_temporary_schedule_at >= today:
-            return group.temporary_start_time.strftime("%H:%M")
-        else : 
-            return group.start_time.strftime("%H:%M")
-    
+        return self._occurrence.start_time.strftime("%H:%M")
 
     def get_end_time(self, group):
-        today = datetime.now().date()
-        if group.clear_temporary_schedule_at and group.clear_temporary_schedule_at >= today:
-            return group.temporary_end_time.strftime("%H:%M")
-        else : 
-            return group.end_time.strftime("%H:%M")
-        
+        return self._occurrence.end_time.strftime("%H:%M")
+
     def get_week_day(self, group):
-        today = datetime.now().date()
-        if group.clear_temporary_schedule_at and group.clear_temporary_schedule_at >= today:
-            return group.temporary_week_day
-        else : 
-            return group.week_day
+        return self._occurrence.week_day
 
     def get_is_temporary_schedule(self, group):
-        today = datetime.now().date()
-        return bool(group.clear_temporary_schedule_at and group.clear_temporary_schedule_at >= today)
+        return self._occurrence.temporary
 
     
     def get_students(self, group_obj):
@@ -94,7 +90,7 @@ class GroupDetailsSerializer(serializers.ModelSerializer):
         search_term = request.GET.get('search', '')
         sort_by = request.GET.get('sort_by', '')
 
-        students = group_obj.students.all()
+        students = group_obj.enrolled_students()
 
         if not students.exists():
             return {
@@ -177,7 +173,6 @@ class GroupCreateUpdateSerializer(serializers.ModelSerializer):
         ]
 
     def validate(self, data):
-        print("Validating data:", data)
         # Check for schedule conflicts
         # for the edit and create case bring the name and the teacher from the request 
         name = data.get('name')
@@ -207,29 +202,19 @@ class GroupCreateUpdateSerializer(serializers.ModelSerializer):
         if duplicate_query.exists():
             raise serializers.ValidationError("ALREADY_EXISTING_GROUP_NAME_DETECTED")
         
-        # check for schdule conflict 
-        week_day = data.get('week_day')
-        start_time = data.get('start_time')
-        end_time = data.get('end_time')
-        
-        conflicting_groups = Group.objects.filter(
-            teacher=teacher,
-            week_day=week_day
-        ).filter(
-           Q(start_time__lt=end_time) & Q(end_time__gt=start_time)
-        )
-        # in the case of the edit, exclude the group 
-        if self.instance : 
-            conflicting_groups = conflicting_groups.exclude(id=self.instance.id)
-        
-        if conflicting_groups.exists():
-            print("Conflict detected with groups:")
-            for group in conflicting_groups:
-                print(f"- {group.name} {group.teacher_subject.level} {group.teacher_subject.level.section} ({group.start_time} - {group.end_time})")
-            raise serializers.ValidationError("SCHEDULE_CONFLICT_DETECTED")
-        
+        # check for schedule conflicts with the other groups of the teacher (their temporary slots included),
+        # the fields not sent by a partial edit keep the values of the group
+        week_day = data.get('week_day', getattr(self.instance, 'week_day', None))
+        start_time = data.get('start_time', getattr(self.instance, 'start_time', None))
+        end_time = data.get('end_time', getattr(self.instance, 'end_time', None))
+        if week_day and start_time and end_time:
+            conflicts = get_timetable(teacher.id).overlapping(
+                week_day, start_time, end_time, exclude_group_id=self.instance.id if self.instance else None
+            )
+            if conflicts:
+                raise serializers.ValidationError("SCHEDULE_CONFLICT_DETECTED")
+
         data['teacher_subject'] = teacher_subject
-        print("=========== validated data:", data)
         return data
     
     """
@@ -0,0 +1,69 @@
+from common.projections import (Column, DateTimeString, DecimalString, ImageUrl, LevelName, LevelSection,
+                                NotificationMessage, Projection, SubjectName, ThumbnailUrl, TimeString)
+from student.models import Student
+from ..models import Group, TeacherNotification
+
+
+class GroupListProjection(Projection):
+    """The payload of GroupListSerializer."""
+    model = Group
+
+    id = Column()
+    name = Column()
+    level = LevelName('teacher_subject__level_id')
+    section = LevelSection('teacher_subject__level_id')
+    subject = SubjectName('teacher_subject__subject_id')
+    week_day = Column()
+    start_time = TimeString()
+    end_time = TimeString()
+    total_paid = DecimalString()
+    total_unpaid = DecimalString()
+
+
+class GroupStudentListProjection(Projection):
+    """The payload of GroupStudentListSerializer (the students annotated with their paid and unpaid amounts)."""
+    model = Student
+
+    id = Column()
+    image = ImageUrl()
+    thumbnail = ThumbnailUrl('image')
+    fullname = Column()
+    paid_amount = DecimalString()
+    unpaid_amount = DecimalString()
+
+
+class GroupPossibleStudentListProjection(Projection):
+    """The payload of GroupPossibleStudentListSerializer."""
+    model = Student
+
+    id = Column()
+    image = ImageUrl()
+    thumbnail = ThumbnailUrl('image')
+    fullname = Column()
+
+
+class TeacherStudentListProjection(Projection):
+    """The payload of TeacherStudentListSerializer (the students annotated with their paid and unpaid amounts)."""
+    model = Student
+
+    id = Column()
+    fullname = Column()
+    image = ImageUrl()
+    thumbnail = ThumbnailUrl('image')
+    level = LevelName('level_id')
+    section = LevelSection('level_id')
+    paid_amount = DecimalString()
+    unpaid_amount = DecimalString()
+
+
+class TeacherNotificationProjection(Projection):
+    """The payload of TeacherNotificationSerializer."""
+    model = TeacherNotification
+
+    id = Column()
+    image = ImageUrl()
+    thumbnail = ThumbnailUrl('image')
+    message = NotificationMessage()
+    meta_data = Column()
+    is_read = Column()
+    created_at = DateTimeString()
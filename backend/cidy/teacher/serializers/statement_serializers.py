@@ -0,0 +1,22 @@
+from rest_framework import serializers
+from ..models import MonthlyStatement, StatementLine
+
+
+class StatementLineSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = StatementLine
+        fields = ['student_id', 'fullname', 'attended_classes', 'paid_classes', 'due_classes', 'not_due_classes',
+                  'absences', 'paid_amount', 'due_amount', 'collected_amount', 'balance']
+
+
+class MonthlyStatementSerializer(serializers.ModelSerializer):
+    month = serializers.DateField(format='%Y-%m')
+    lines = serializers.SerializerMethodField()
+
+    class Meta:
+        model = MonthlyStatement
+        fields = ['month', 'generated_at', 'students_count', 'attended_classes', 'paid_amount', 'due_amount',
+                  'collected_amount', 'balance', 'lines']
+
+    def get_lines(self, statement):
+        return StatementLineSerializer(statement.lines.order_by('fullname', 'student_id'), many=True).data
@@ -1,18 +1,23 @@
 from rest_framework import serializers
+from common.thumbnails import ThumbnailUrlField
 from student.models import Student
 from teacher.models import Class,Level, TeacherEnrollment, Group, GroupEnrollment
+from teacher.archive import enrollment_classes, wants_archived
+from teacher.schedule import group_occurrence
 from django.utils import timezone
+from common.reference_data import get_reference_data
 
 
 class TeacherStudentListSerializer(serializers.ModelSerializer):
     image = serializers.CharField(source='image.url')
+    thumbnail = ThumbnailUrlField(source='image')
     paid_amount = serializers.DecimalField(max_digits=10, decimal_places=2,read_only=True)
     unpaid_amount = serializers.DecimalField(max_digits=10, decimal_places=2,read_only=True)
     level = serializers.CharField(source='level.name')
     section = serializers.CharField(source='level.section')
     class Meta:
         model = Student
-        fields = ['id', 'fullname', 'image', 'level', 'section', 'paid_amount', 'unpaid_amount']
+        fields = ['id', 'fullname', 'image', 'thumbnail', 'level', 'section', 'paid_amount', 'unpaid_amount']
 
 
     
@@ -28,7 +33,10 @@ class TeacherStudentCreateSerializer(serializers.ModelSerializer):
         level_name = attrs['level']
         section_name = attrs['section']
         del attrs['section']
-        attrs['level'] = Level.objects.get(name=level_name, section=section_name)
+        level = get_reference_data().get_level(level_name, section_name)
+        if level is None:
+            raise serializers.ValidationError("LEVEL_NOT_FOUND")
+        attrs['level'] = level
         return attrs
 
     def validate_phone_number(self, value):
@@ -54,8 +62,10 @@ class TeacherStudentUpdateSerializer(serializers.ModelSerializer):
         section = attrs.get('section')
 
         if level or section :
-            level = Level.objects.get(name=level, section=section)
+            level = get_reference_data().get_level(level, section)
             print(level)
+            if level is None:
+                raise serializers.ValidationError("LEVEL_NOT_FOUND")
             attrs['level'] = level
 
         if 'section' in attrs:
@@ -106,11 +116,13 @@ class TeacherStudentDetailSerializer(serializers.ModelSerializer):
         # Get all groups the student is enrolled in with the current teacher
         student_groups = Group.objects.filter(
             teacher=teacher, 
-            students=student_obj
+            groupenrollment__student=student_obj,
+            groupenrollment__deleted_at__isnull=True
         )
 
         group_data = []
         today = timezone.localdate()
+        include_archived = wants_archived(self.context['request'])
 
         for group in student_groups:
             enrollment = GroupEnrollment.objects.get(group=group, student=student_obj)
@@ -124,14 +136,15 @@ class TeacherStudentDetailSerializer(serializers.ModelSerializer):
                 'week_day': group.week_day,
                 'start_time': group.start_time.strftime('%H:%M'),
                 'end_time': group.end_time.strftime('%H:%M'),
-                'classes': TeacherClassListSerializer(enrollment.class_set.all(), many=True).data
+                'classes': TeacherClassListSerializer(enrollment_classes(enrollment, include_archived), many=True).data
             }
 
-            if group.clear_temporary_schedule_at and today < group.clear_temporary_schedule_at:
+            occurrence = group_occurrence(group, today=today)
+            if occurrence.temporary:
                 group_info['temporary_shedule'] = {
-                    'week_day': group.temporary_week_day,
-                    'start_time': group.temporary_start_time.strftime('%H:%M'),
-                    'end_time': group.temporary_end_time.strftime('%H:%M'),
+                    'week_day': occurrence.week_day,
+                    'start_time': occurrence.start_time.strftime('%H:%M'),
+                    'end_time': occurrence.end_time.strftime('%H:%M'),
                 }
 
             group_data.append(group_info)
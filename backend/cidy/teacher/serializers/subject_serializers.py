@@ -1,6 +1,7 @@
 from rest_framework import serializers
-from ..models import Level, Subject, TeacherSubject
+from ..models import Group, Level, Subject, TeacherSubject
 from student.models import Student
+from common.reference_data import get_reference_data
 
 class LevelSerializer(serializers.ModelSerializer):
     class Meta:
@@ -21,9 +22,22 @@ class TeacherSubjectSerializer(serializers.ModelSerializer):
         model = TeacherSubject
         fields = ['id', 'level','section', 'subject', 'price_per_class']
 
+    def validate(self, attrs):
+        reference_data = get_reference_data()
+        level = reference_data.get_level(attrs['level'], attrs['section'])
+        if level is None:
+            raise serializers.ValidationError("LEVEL_NOT_FOUND")
+        subject = reference_data.get_subject(attrs['subject'])
+        if subject is None:
+            raise serializers.ValidationError("SUBJECT_NOT_FOUND")
+        attrs['level'] = level
+        attrs['subject'] = subject
+        return attrs
+
     def create(self, validated_data):
-        level = Level.objects.get(name=validated_data.pop('level'), section=validated_data.pop('section') )
-        subject = Subject.objects.get(name=validated_data.pop('subject'))
+        level = validated_data.pop('level')
+        subject = validated_data.pop('subject')
+        validated_data.pop('section')
         teacher = self.context['request'].user.teacher
         validated_data['level'] = level
         validated_data['subject'] = subject
@@ -70,20 +84,23 @@ class TeacherLevelsSectionsSubjectsHierarchySerializer:
 
 class TesLevelsSectionsSubjectsHierarchySerializer:
 
-    def __init__(self, levels_qs):
-        levels = {}
+    def __init__(self, levels):
+        # the subjects of each level come from the reference data registry to avoid a query per level
+        reference_data = get_reference_data()
+        levels_data = {}
 
-        for level in levels_qs:
+        for level in levels:
 
-            level_data = levels.setdefault(level.name, {})
+            level_data = levels_data.setdefault(level.name, {})
+            subject_names = list(reference_data.get_level_subject_names(level))
 
             if level.section :
                 sections_data = level_data.setdefault('sections', {})
-                sections_data[level.section] = [subject.name for subject in level.subjects.all()]
+                sections_data[level.section] = subject_names
             else:
-                level_data['subjects'] = [subject.name for subject in level.subjects.all()]
+                level_data['subjects'] = subject_names
 
-        self.data = levels
+        self.data = levels_data
 
 """
             level_id = ts.level.id
@@ -131,7 +148,9 @@ class StudentListToReplaceBySerializer(serializers.ModelSerializer):
     def get_groups(self, student_obj):
         request = self.context['request']
         teacher_obj = request.user.teacher
-        groups = student_obj.groups.all(teacher=teacher_obj)
+        groups = Group.objects.filter(
+            teacher=teacher_obj, groupenrollment__student=student_obj, groupenrollment__deleted_at__isnull=True
+        )
         json_groups = []
 
         for group in groups:
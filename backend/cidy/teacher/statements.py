@@ -0,0 +1,165 @@
+"""
+Monthly statements of the teachers.
+
+The statement of a teacher for a month has a line per student : the classes
+he attended over the month (paid, due, not due yet), his absences, their
+amounts (the price per class of the subject of the group), what he paid during
+the month and what he owes the teacher when the statement is generated. It's
+computed with a grouped query over the classes of the month (a row per
+student, and another over the archive for a month of a closed school year,
+see archive.py) and a query over the teacher enrollments (the balances and the
+students without classes this month), then written to the MonthlyStatement /
+StatementLine tables in one transaction, replacing the previous version.
+
+The generate_statements command builds them for every teacher (a monthly cron
+job) and a POST to the API (re)builds the statement of a teacher. The reads
+(JSON, CSV, PDF) only serve the stored statements, a 404 until they exist.
+"""
+import datetime
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from common.pdf import Column
+from student.models import Student
+from .archive import school_year_start
+from .models import ArchivedClass, Class, MonthlyStatement, StatementLine, TeacherEnrollment
+
+ATTENDED_STATUSES = ('attended_and_paid', 'attended_and_the_payment_not_due', 'attended_and_the_payment_due')
+COUNTERS = ('attended_classes', 'paid_classes', 'due_classes', 'not_due_classes', 'absences')
+AMOUNTS = ('paid_amount', 'due_amount', 'collected_amount')
+
+# the columns of the CSV and PDF documents : (field, label, PDF width)
+DOCUMENT_COLUMNS = (
+    ('fullname', 'Élève', 190),
+    ('attended_classes', 'Présences', 62),
+    ('paid_classes', 'Payées', 56),
+    ('due_classes', 'Dues', 50),
+    ('not_due_classes', 'Non dues', 60),
+    ('absences', 'Absences', 58),
+    ('paid_amount', 'Montant payé', 72),
+    ('due_amount', 'Montant dû', 68),
+    ('collected_amount', 'Encaissé', 64),
+    ('balance', 'Solde', 60),
+)
+
+
+def month_bounds(month):
+    """The first day of the month of the date and the first day of the next month."""
+    start = month.replace(day=1)
+    end = (start + datetime.timedelta(days=32)).replace(day=1)
+    return start, end
+
+
+def day_start(day):
+    """The midnight (aware, in the current time zone) starting the day, the bound of the paid_at ranges.
+
+    Comparing paid_at to datetimes instead of filtering paid_at__date keeps the
+    ranges on the (group_enrollment, paid_at) index.
+    """
+    if isinstance(day, datetime.datetime):
+        day = day.date()
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+
+
+def parse_month(value):
+    """The first day of the month written YYYY-MM, ValueError otherwise."""
+    return datetime.datetime.strptime(value, '%Y-%m').date()
+
+
+def previous_month(today=None):
+    today = today or datetime.date.today()
+    return month_bounds(today.replace(day=1) - datetime.timedelta(days=1))[0]
+
+
+def _money_sum(condition):
+    return Coalesce(
+        Sum(F('group_enrollment__group__teacher_subject__price_per_class'), filter=condition),
+        Value(Decimal('0')), output_field=DecimalField(max_digits=10, decimal_places=2)
+    )
+
+
+def compute_statement_lines(teacher, month):
+    """The StatementLine (unsaved) of each student of the teacher for the month, sorted by name."""
+    start, end = month_bounds(month)
+    attended = Q(attendance_date__gte=start, attendance_date__lt=end, status__in=ATTENDED_STATUSES)
+    absent = Q(absence_date__gte=start, absence_date__lt=end, status='absent')
+    collected = Q(paid_at__gte=day_start(start), paid_at__lt=day_start(end))
+
+    activity = {}
+    # the classes of a closed school year may have been archived
+    models = (Class, ArchivedClass) if start < school_year_start() else (Class,)
+    for model in models:
+        rows = (model.objects
+                .of_active_enrollments()
+                .filter(group_enrollment__group__teacher=teacher)
+                .filter(attended | absent | collected)
+                .values('group_enrollment__student_id')
+                .annotate(
+                    attended_classes=Count('id', filter=attended),
+                    paid_classes=Count('id', filter=attended & Q(status='attended_and_paid')),
+                    due_classes=Count('id', filter=attended & Q(status='attended_and_the_payment_due')),
+                    not_due_classes=Count('id', filter=attended & Q(status='attended_and_the_payment_not_due')),
+                    absences=Count('id', filter=absent),
+                    paid_amount=_money_sum(attended & Q(status='attended_and_paid')),
+                    due_amount=_money_sum(attended & Q(status='attended_and_the_payment_due')),
+                    collected_amount=_money_sum(collected),
+                ))
+        for row in rows:
+            student_id = row.pop('group_enrollment__student_id')
+            if student_id in activity:
+                row = {name: activity[student_id][name] + value for name, value in row.items()}
+            activity[student_id] = row
+
+    lines = {}
+    enrolled = TeacherEnrollment.objects.filter(teacher=teacher, student__deleted_at__isnull=True)
+    for student_id, fullname, balance in enrolled.values_list('student_id', 'student__fullname', 'unpaid_amount'):
+        lines[student_id] = StatementLine(student_id=student_id, fullname=fullname, balance=balance, **activity.get(student_id, {}))
+
+    # the students who left the teacher during the month
+    left_student_ids = activity.keys() - lines.keys()
+    for student_id, fullname in Student.all_objects.filter(id__in=left_student_ids).values_list('id', 'fullname'):
+        lines[student_id] = StatementLine(student_id=student_id, fullname=fullname, **activity[student_id])
+
+    return sorted(lines.values(), key=lambda line: (line.fullname.lower(), line.student_id))
+
+
+def generate_statement(teacher, month):
+    """Compute the statement of the teacher for the month and store it (replacing the previous one)."""
+    month = month_bounds(month)[0]
+    lines = compute_statement_lines(teacher, month)
+    with transaction.atomic():
+        statement, _created = MonthlyStatement.objects.select_for_update().get_or_create(teacher=teacher, month=month)
+        statement.lines.all().delete()
+        for line in lines:
+            line.statement = statement
+        StatementLine.objects.bulk_create(lines, batch_size=500)
+
+        statement.students_count = len(lines)
+        statement.attended_classes = sum(line.attended_classes for line in lines)
+        for field in AMOUNTS + ('balance',):
+            setattr(statement, field, sum((getattr(line, field) for line in lines), Decimal('0')))
+        statement.save()
+    return statement
+
+
+def get_statement(teacher, month):
+    """The stored statement of the teacher for the month, None until it's generated."""
+    return MonthlyStatement.objects.filter(teacher=teacher, month=month_bounds(month)[0]).first()
+
+
+def document_rows(statement):
+    """The rows of the CSV / PDF documents of the statement, read with a server side cursor."""
+    fields = [field for field, _label, _width in DOCUMENT_COLUMNS]
+    return statement.lines.order_by('fullname', 'student_id').values_list(*fields).iterator(chunk_size=500)
+
+
+def document_title(statement):
+    return f"Relevé mensuel {statement.month:%m/%Y} - {statement.teacher.fullname}"
+
+
+def pdf_columns():
+    return [Column(label, width, 'left' if field == 'fullname' else 'right') for field, label, width in DOCUMENT_COLUMNS]
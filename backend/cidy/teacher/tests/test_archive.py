@@ -0,0 +1,140 @@
+import csv
+import io
+from datetime import date, datetime, time
+from decimal import Decimal
+
+from unittest import skipUnless
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from account.models import User
+from student.models import Student
+from teacher.archive import archive_classes, school_year_start
+from teacher.models import (Level, Subject, Teacher, TeacherSubject, TeacherEnrollment, Group, GroupEnrollment, Class,
+                            ArchivedClass)
+from teacher.statements import compute_statement_lines
+from teacher.views.dashboard_views import paid_classes_count
+
+
+class ArchiveTestCase(TestCase):
+    """The settled classes of the closed school years moved to the archive."""
+
+    def setUp(self):
+        level = Level.objects.create(name='Quatrième année secondaire', section='Mathématiques', order=1)
+        self.user = User.objects.create_user('teacher@test.com', '11111111', 'testpass123')
+        self.teacher = Teacher.objects.create(user=self.user, fullname='Teacher')
+        physics = TeacherSubject.objects.create(teacher=self.teacher, level=level, subject=Subject.objects.create(name='Physique'),
+                                                price_per_class=Decimal('10'))
+        group = Group.objects.create(teacher=self.teacher, name='A', teacher_subject=physics, week_day='Monday',
+                                     start_time=time(8), end_time=time(10))
+        self.amine = Student.objects.create(fullname='Amine', level=level)
+        TeacherEnrollment.objects.create(teacher=self.teacher, student=self.amine)
+        enrollment = GroupEnrollment.objects.create(group=group, student=self.amine)
+
+        def create_class(status, held_on, paid_at=None):
+            held = {'absence_date': held_on} if status == 'absent' else {'attendance_date': held_on}
+            return Class.objects.create(group_enrollment=enrollment, status=status, paid_at=paid_at and timezone.make_aware(paid_at),
+                                        **held)
+
+        self.paid = create_class('attended_and_paid', date(2024, 10, 7), paid_at=datetime(2024, 10, 20, 18))
+        self.absent = create_class('absent', date(2024, 11, 4))
+        # never archived : still due, paid during the next school year, held during the next school year
+        self.due = create_class('attended_and_the_payment_due', date(2024, 12, 2))
+        self.paid_late = create_class('attended_and_paid', date(2025, 6, 2), paid_at=datetime(2025, 9, 15, 18))
+        self.current = create_class('attended_and_paid', date(2025, 10, 6), paid_at=datetime(2025, 10, 6, 18))
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_school_year_start(self):
+        self.assertEqual(school_year_start(date(2025, 9, 1)), date(2025, 9, 1))
+        self.assertEqual(school_year_start(date(2026, 6, 30)), date(2025, 9, 1))
+
+    def test_archive(self):
+        self.assertEqual(archive_classes(date(2025, 9, 1), dry_run=True), 2)
+        self.assertEqual(archive_classes(date(2025, 9, 1), batch_size=1), 2)
+        self.assertEqual(archive_classes(date(2025, 9, 1)), 0)
+
+        self.assertEqual(set(Class.objects.values_list('id', flat=True)), {self.due.id, self.paid_late.id, self.current.id})
+        archived = ArchivedClass.objects.get(id=self.paid.id)
+        self.assertEqual((archived.group_enrollment_id, archived.status, archived.attendance_date, archived.paid_at),
+                         (self.paid.group_enrollment_id, 'attended_and_paid', self.paid.attendance_date, self.paid.paid_at))
+        self.assertTrue(ArchivedClass.objects.filter(id=self.absent.id, absence_date=date(2024, 11, 4)).exists())
+
+        # the statement of a month of the closed year still counts the archived classes
+        line, = compute_statement_lines(self.teacher, date(2024, 10, 1))
+        self.assertEqual((line.attended_classes, line.paid_classes, line.paid_amount, line.collected_amount),
+                         (1, 1, Decimal('10'), Decimal('10')))
+
+    def test_history_endpoints(self):
+        archive_classes(date(2025, 9, 1))
+
+        def class_ids(url):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            return [class_['id'] for class_ in response.data['student_detail']['groups'][0]['classes']]
+
+        url = f'/api/teacher/students/{self.amine.id}/'
+        self.assertEqual(class_ids(url), [self.due.id, self.paid_late.id, self.current.id])
+        self.assertEqual(class_ids(url + '?include_archived=true'),
+                         [self.paid.id, self.absent.id, self.due.id, self.paid_late.id, self.current.id])
+
+        def export(url):
+            response = self.client.get(url)
+            return list(csv.reader(b''.join(response.streaming_content).decode('utf-8-sig').splitlines()))[1:]
+
+        self.assertEqual([row[0] for row in export('/api/teacher/exports/classes/')], ['2024-12-02', '2025-06-02', '2025-10-06'])
+        rows = export('/api/teacher/exports/classes/?include_archived=true&to=2025-06-30')
+        self.assertEqual([(row[0], row[3]) for row in rows], [
+            ('2024-10-07', 'attended_and_paid'), ('2024-11-04', 'absent'), ('2024-12-02', 'attended_and_the_payment_due'),
+            ('2025-06-02', 'attended_and_paid'),
+        ])
+        self.assertEqual(rows[0][-1], '2024-10-20T18:00+01:00')
+
+        # the attended classes and the absences of the group
+        self.assertEqual(export('/api/teacher/exports/groups/')[0][9:11], ['3', '0'])
+        self.assertEqual(export('/api/teacher/exports/groups/?include_archived=true')[0][9:11], ['4', '1'])
+
+    def test_dashboard_paid_classes(self):
+        enrollment = self.paid.group_enrollment
+        ranges = [(None, None), (date(2024, 9, 1), date(2025, 8, 31)), (date(2025, 1, 1), date(2025, 12, 31))]
+        counts = [paid_classes_count(enrollment, start, end) for start, end in ranges]
+        self.assertEqual(counts, [3, 1, 2])
+
+        archive_classes(date(2025, 9, 1))
+        self.assertEqual([paid_classes_count(enrollment, start, end) for start, end in ranges], counts)
+
+    @skipUnless(connection.features.can_distinct_on_fields, "the dashboard counts the students with DISTINCT ON")
+    def test_dashboard(self):
+        def dashboard(query=''):
+            response = self.client.get('/api/teacher/get_dashboard_data/' + query)
+            self.assertEqual(response.status_code, 200)
+            return response.data['dashboard']
+
+        # the dashboard only counts the students enrolled before the end of the range
+        GroupEnrollment.objects.update(date=date(2024, 9, 1))
+        queries = ['', '?start_date=2024-09-01&end_date=2025-08-31']
+        before = [dashboard(query) for query in queries]
+        self.assertEqual([kpis['total_paid_amount'] for kpis in before], [Decimal('30'), Decimal('10')])
+
+        archive_classes(date(2025, 9, 1))
+        self.assertEqual([dashboard(query) for query in queries], before)
+
+    def test_command(self):
+        stdout = io.StringIO()
+        call_command('archive_classes', before='2025-09-01', dry_run=True, stdout=stdout)
+        self.assertIn('2 class(es) held before 2025-09-01 to archive', stdout.getvalue())
+        self.assertEqual(ArchivedClass.objects.count(), 0)
+
+        call_command('archive_classes', stdout=io.StringIO())
+        # everything settled before the current school year
+        self.assertEqual(ArchivedClass.objects.count(), 4 if school_year_start() > date(2025, 10, 6) else 2)
+
+        with self.assertRaises(CommandError):
+            call_command('archive_classes', before='2999-09-01', stdout=io.StringIO())
+        with self.assertRaises(CommandError):
+            call_command('archive_classes', before='september', stdout=io.StringIO())
@@ -0,0 +1,106 @@
+from datetime import date, time, timedelta
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.test import RequestFactory, TestCase
+
+from account.authentication import clear_user_cache, get_access_token
+from account.models import User
+from parent import views as parent_views
+from parent.models import Parent, ParentNotification, Son
+from student import views as student_views
+from student.models import Student, StudentNotification
+from teacher import views as teacher_views
+from teacher.models import (Level, Subject, Teacher, TeacherSubject, TeacherEnrollment, Group, GroupEnrollment,
+                            TeacherNotification)
+
+
+class AsyncViewsTestCase(TestCase):
+    """The async variants must answer the same responses as the DRF views."""
+
+    def setUp(self):
+        clear_user_cache()
+        self.factory = RequestFactory()
+        level = Level.objects.create(name='Quatrième année secondaire', section='Mathématiques', order=1)
+        subject = Subject.objects.create(name='Physique')
+
+        self.teacher_user = User.objects.create_user('teacher@test.com', '11111111', 'testpass123')
+        teacher = Teacher.objects.create(user=self.teacher_user, fullname='Teacher')
+        teacher_subject = TeacherSubject.objects.create(teacher=teacher, level=level, subject=subject, price_per_class=Decimal('12.5'))
+        group = Group.objects.create(
+            teacher=teacher, name='Groupe A', teacher_subject=teacher_subject, week_day='Tuesday',
+            start_time=time(8, 30), end_time=time(10), temporary_week_day='Friday', temporary_start_time=time(14),
+            temporary_end_time=time(16), clear_temporary_schedule_at=date.today() + timedelta(days=3)
+        )
+        Group.objects.create(teacher=teacher, name='Groupe B', teacher_subject=teacher_subject, week_day='Monday',
+                             start_time=time(18), end_time=time(19, 30))
+        for i in range(3):
+            TeacherNotification.objects.create(teacher=teacher, message=f'Message {i}', meta_data={'student_id': i})
+
+        self.student_user = User.objects.create_user('student@test.com', '22222222', 'testpass123')
+        student = Student.objects.create(user=self.student_user, fullname='Élève', level=level)
+        teacher_enrollment = TeacherEnrollment.objects.create(teacher=teacher, student=student)
+        GroupEnrollment.objects.create(group=group, student=student, paid_amount=Decimal('40'), unpaid_amount=Decimal('7.5'))
+        StudentNotification.objects.create(student=student, message='Message', meta_data={'group_id': group.id})
+
+        self.parent_user = User.objects.create_user('parent@test.com', '33333333', 'testpass123')
+        parent = Parent.objects.create(user=self.parent_user, fullname='Parent')
+        Son.objects.create(parent=parent, fullname='Fils', level=level).student_teacher_enrollments.add(teacher_enrollment)
+        Son.objects.create(parent=parent, fullname='Fille', gender='F', level=level)
+        ParentNotification.objects.create(parent=parent, message='Message', meta_data={'son_id': 1})
+
+        self.tokens = {user.pk: get_access_token(user) for user in (self.teacher_user, self.student_user, self.parent_user)}
+
+    def tearDown(self):
+        clear_user_cache()
+
+    def get(self, user, params=None):
+        headers = {'Authorization': f'Bearer {self.tokens[user.pk]}'} if user else {}
+        return self.factory.get('/', params or {}, headers=headers)
+
+    async def assertSameResponse(self, sync_view, async_view, user, params=None):
+        sync_response = await sync_to_async(lambda: sync_view(self.get(user, params)).render())()
+        async_response = await async_view(self.get(user, params))
+
+        self.assertEqual(async_response.status_code, sync_response.status_code)
+        self.assertEqual(async_response['Content-Type'], sync_response['Content-Type'])
+        self.assertEqual(async_response.content, sync_response.content)
+        return async_response
+
+    async def test_notifications(self):
+        params = {'start_from_notification_id': '0'}
+        for user, views in [(self.teacher_user, teacher_views), (self.student_user, student_views), (self.parent_user, parent_views)]:
+            await self.assertSameResponse(views.get_unread_notifications_count, views.aget_unread_notifications_count, user)
+            response = await self.assertSameResponse(views.get_new_notifications, views.aget_new_notifications, user, params)
+            self.assertIn(b'"new_notifications":[{', response.content)
+            response = await self.assertSameResponse(views.get_new_notifications, views.aget_new_notifications, user, {})
+            self.assertEqual(response.status_code, 400)
+
+    async def test_week_schedule(self):
+        response = await self.assertSameResponse(teacher_views.get_week_schedule, teacher_views.aget_week_schedule, self.teacher_user)
+        self.assertIn(b'"temporary_schedule":true', response.content)
+
+    async def test_student_subject_list(self):
+        response = await self.assertSameResponse(
+            student_views.get_student_subject_list, student_views.aget_student_subject_list, self.student_user
+        )
+        self.assertIn(b'"teacher_name":"Teacher"', response.content)
+
+    async def test_parent_sons(self):
+        response = await self.assertSameResponse(parent_views.get_parent_sons, parent_views.aget_parent_sons, self.parent_user)
+        self.assertIn(b'"has_student":true', response.content)
+        self.assertIn(b'"has_student":false', response.content)
+
+    async def test_authentication_errors(self):
+        response = await self.assertSameResponse(teacher_views.get_week_schedule, teacher_views.aget_week_schedule, None)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response['WWW-Authenticate'], 'Bearer realm="api"')
+
+        request = self.factory.get('/', headers={'Authorization': 'Bearer invalid'})
+        sync_response = await sync_to_async(lambda: teacher_views.get_week_schedule(request).render())()
+        async_response = await teacher_views.aget_week_schedule(self.factory.get('/', headers={'Authorization': 'Bearer invalid'}))
+        self.assertEqual((async_response.status_code, async_response.content), (sync_response.status_code, sync_response.content))
+
+    async def test_only_get_is_allowed(self):
+        response = await teacher_views.aget_week_schedule(self.factory.post('/'))
+        self.assertEqual(response.status_code, 405)
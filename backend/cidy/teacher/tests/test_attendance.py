@@ -0,0 +1,116 @@
+from datetime import time
+from decimal import Decimal
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from account.models import User
+from parent.models import Parent, ParentNotification, ParentUnreadNotification, Son
+from student.models import Student, StudentNotification, StudentUnreadNotification
+from teacher.attendance import mark_attendance_sheet
+from teacher.models import Level, Subject, Teacher, TeacherSubject, TeacherEnrollment, Group, GroupEnrollment, Class
+
+
+class AttendanceSheetTestCase(TestCase):
+    """The attendance sheet applies the rules of the per-group endpoints in bulk."""
+
+    def setUp(self):
+        self.level = Level.objects.create(name='Septième année de base', order=1)
+        self.user = User.objects.create_user('teacher@test.com', '11111111', 'testpass123')
+        self.teacher = Teacher.objects.create(user=self.user, fullname='Teacher')
+        maths = TeacherSubject.objects.create(teacher=self.teacher, level=self.level, subject=Subject.objects.create(name='Maths'),
+                                              price_per_class=Decimal('10'))
+        physics = TeacherSubject.objects.create(teacher=self.teacher, level=self.level,
+                                                subject=Subject.objects.create(name='Physique'), price_per_class=Decimal('15'))
+        self.maths = Group.objects.create(teacher=self.teacher, name='A', teacher_subject=maths, week_day='Monday',
+                                          start_time=time(8), end_time=time(10))
+        self.physics = Group.objects.create(teacher=self.teacher, name='B', teacher_subject=physics, week_day='Monday',
+                                            start_time=time(10), end_time=time(12))
+        self.students = []
+        for fullname in ('Amine', 'Yasmine', 'Sami'):
+            student = Student.objects.create(fullname=fullname, level=self.level)
+            TeacherEnrollment.objects.create(teacher=self.teacher, student=student)
+            GroupEnrollment.objects.create(group=self.maths, student=student)
+            self.students.append(student)
+        GroupEnrollment.objects.create(group=self.physics, student=self.students[0])
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def attendance(self, student, day, group=None, type='attendance', start='08:00', end='10:00'):
+        return {'type': type, 'group_id': (group or self.maths).id, 'student_id': student.id,
+                'date': f'{day:02d}/10/2025', 'start_time': start, 'end_time': end}
+
+    def payment(self, student, number_of_classes):
+        return {'type': 'payment', 'group_id': self.maths.id, 'student_id': student.id,
+                'number_of_classes': number_of_classes, 'payment_datetime': '18:00:00-31/10/2025'}
+
+    def state(self, student):
+        group_enrollment = GroupEnrollment.objects.get(group=self.maths, student=student)
+        teacher_enrollment = TeacherEnrollment.objects.get(student=student)
+        return (
+            list(Class.objects.filter(group_enrollment=group_enrollment).order_by('attendance_date', 'absence_date')
+                              .values_list('status', 'attendance_date', 'absence_date', 'paid_at')),
+            group_enrollment.paid_amount, group_enrollment.unpaid_amount, group_enrollment.attended_non_paid_classes,
+            teacher_enrollment.paid_amount, teacher_enrollment.unpaid_amount,
+        )
+
+    def test_same_outcome_as_the_per_group_endpoints(self):
+        amine, yasmine = self.students[:2]
+        days = (6, 13, 20, 27, 28)
+        for day in days:
+            self.client.put(f'/api/teacher/groups/{self.maths.id}/students/mark_attendance/',
+                            {'student_ids': [amine.id], 'date': f'{day:02d}/10/2025', 'start_time': '08:00', 'end_time': '10:00'},
+                            format='json')
+        self.client.put(f'/api/teacher/groups/{self.maths.id}/students/mark_absence/',
+                        {'student_ids': [amine.id], 'date': '29/10/2025', 'start_time': '08:00', 'end_time': '10:00'}, format='json')
+        self.client.put(f'/api/teacher/groups/{self.maths.id}/students/mark_payment/',
+                        {'student_ids': [amine.id], 'number_of_classes': 3, 'payment_datetime': '18:00:00-31/10/2025'},
+                        format='json')
+
+        results = mark_attendance_sheet(
+            self.teacher,
+            [self.attendance(yasmine, day) for day in days] + [self.attendance(yasmine, 29, type='absence'), self.payment(yasmine, 3)]
+        )
+        self.assertEqual({result['status'] for result in results}, {'marked'})
+        self.assertEqual(self.state(yasmine), self.state(amine))
+
+        self.maths.refresh_from_db()
+        self.assertEqual((self.maths.total_paid, self.maths.total_unpaid), (Decimal('60'), Decimal('0')))
+
+    def test_results_and_notifications(self):
+        amine, yasmine, sami = self.students
+        amine.user = User.objects.create_user('student@test.com', '22222222', 'testpass123')
+        amine.save()
+        parent = Parent.objects.create(user=User.objects.create_user('parent@test.com', '33333333', 'testpass123'), fullname='Parent')
+        Son.objects.create(parent=parent, fullname='Fils', level=self.level).student_teacher_enrollments.add(
+            TeacherEnrollment.objects.get(student=amine)
+        )
+        Class.objects.create(group_enrollment=GroupEnrollment.objects.get(group=self.maths, student=sami), status='absent',
+                             absence_date='2025-10-13', absence_start_time=time(9), absence_end_time=time(11))
+
+        entries = [
+            self.attendance(amine, 13),
+            self.attendance(amine, 13, group=self.physics, start='10:00', end='12:00'),
+            self.attendance(yasmine, 13, group=self.physics),
+            self.attendance(sami, 13),
+            self.attendance(amine, 13, type='absence', start='09:00', end='10:30'),
+            self.payment(amine, 2),
+            {'type': 'attendance', 'group_id': self.maths.id, 'student_id': amine.id, 'date': '2025-10-13'},
+        ]
+        # the groups, the enrollments and the classes are loaded once whatever the number of entries
+        with self.assertNumQueries(18):
+            results = self.client.put('/api/teacher/groups/attendance_sheet/', {'entries': entries}, format='json').data['results']
+
+        self.assertEqual([result['status'] for result in results],
+                         ['marked', 'marked', 'not_found', 'overlapping_class', 'overlapping_class', 'not_enough_classes', 'invalid'])
+        self.assertEqual((results[5]['paid_classes'], results[5]['missing_number_of_classes']), (1, 1))
+        self.assertEqual(Class.objects.filter(group_enrollment__student=amine).count(), 2)
+        self.assertEqual(Class.objects.get(group_enrollment__group=self.maths, group_enrollment__student=amine).status, 'attended_and_paid')
+
+        self.assertEqual(StudentNotification.objects.filter(student=amine).count(), 3)
+        self.assertEqual(StudentUnreadNotification.objects.get(student=amine).unread_notifications, 3)
+        self.assertEqual(ParentUnreadNotification.objects.get(parent=parent).unread_notifications, 3)
+        self.assertIn('Le professeur Teacher a marqué la présence de votre fils Fils dans la séance de Physique qui a eu lieu le 13/10/2025 de 10:00 à 12:00.',
+                      [notification.text for notification in ParentNotification.objects.all()])
+
+        self.assertEqual(self.client.put('/api/teacher/groups/attendance_sheet/', {'entries': []}, format='json').status_code, 400)
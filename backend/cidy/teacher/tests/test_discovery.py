@@ -0,0 +1,78 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from account.models import User
+from student.models import Student
+from teacher import discovery
+from teacher.models import Level, Subject, Teacher, TeacherSubject
+
+
+class DiscoveryTestCase(TestCase):
+    def setUp(self):
+        self.level = Level.objects.create(name='Septième année de base', order=1)
+        self.other_level = Level.objects.create(name='Huitième année de base', order=2)
+        self.math = Subject.objects.create(name='Mathématiques')
+        self.physics = Subject.objects.create(name='Physique')
+
+        self.teachers = []
+        for i in range(5):
+            teacher = Teacher.objects.create(
+                user=User.objects.create_user(f'teacher{i}@test.com', f'1111111{i}', 'testpass123'),
+                fullname=f'Teacher {i}'
+            )
+            TeacherSubject.objects.create(teacher=teacher, level=self.level, subject=self.math, price_per_class=10)
+            TeacherSubject.objects.create(teacher=teacher, level=self.other_level, subject=self.physics, price_per_class=10)
+            self.teachers.append(teacher)
+        TeacherSubject.objects.create(teacher=self.teachers[0], level=self.level, subject=self.physics, price_per_class=10)
+        # a teacher of another level only
+        outsider = Teacher.objects.create(
+            user=User.objects.create_user('outsider@test.com', '22222222', 'testpass123'), fullname='Outsider'
+        )
+        TeacherSubject.objects.create(teacher=outsider, level=self.other_level, subject=self.math, price_per_class=10)
+
+    def test_keyset_pagination(self):
+        with self.assertNumQueries(2):
+            teachers, cursor = discovery.get_teachers_page(level=self.level, page_size=3)
+            subjects = [[offering.subject.name for offering in teacher.matching_offerings] for teacher in teachers]
+
+        self.assertEqual(teachers, self.teachers[:3])
+        self.assertEqual(subjects[0], ['Mathématiques', 'Physique'])
+        self.assertEqual(subjects[1], ['Mathématiques'])
+
+        teachers, cursor = discovery.get_teachers_page(level=self.level, cursor=cursor, page_size=3)
+        self.assertEqual(teachers, self.teachers[3:])
+        self.assertIsNone(cursor)
+
+        with self.assertRaises(discovery.InvalidCursor):
+            discovery.get_teachers_page(level=self.level, cursor='not a cursor')
+
+    def test_search_and_subject_filter(self):
+        teachers, cursor = discovery.get_teachers_page(level=self.level, subject_ids=[self.physics.id])
+        self.assertEqual(teachers, [self.teachers[0]])
+
+        teachers, cursor = discovery.get_teachers_page(level=self.level, search_term='teacher', page_size=4)
+        self.assertEqual(len(teachers), 4)
+        teachers, cursor = discovery.get_teachers_page(level=self.level, search_term='teacher', cursor=cursor, page_size=4)
+        self.assertEqual(teachers, [self.teachers[4]])
+
+    def test_subject_facets(self):
+        facets = discovery.get_subject_facets(level=self.level)
+        self.assertEqual(
+            [(facet['subject__name'], facet['teachers_count']) for facet in facets],
+            [('Mathématiques', 5), ('Physique', 1)]
+        )
+
+    def test_student_get_teachers_view(self):
+        student = Student.objects.create(
+            user=User.objects.create_user('student@test.com', '33333333', 'testpass123'),
+            fullname='Student', level=self.level
+        )
+        client = APIClient()
+        client.force_authenticate(student.user)
+
+        response = client.get('/api/student/teachers/', {'subject_ids': [self.math.id]})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_count'], 5)
+        self.assertIsNone(response.data['next_cursor'])
+        self.assertEqual([subject['name'] for subject in response.data['teachers'][0]['subjects']], ['Mathématiques', 'Physique'])
@@ -0,0 +1,222 @@
+from datetime import time
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from account.models import User
+from common.models import Job
+from parent.models import Parent, ParentNotification, ParentUnreadNotification, Son
+from student.models import Student, StudentNotification, StudentUnreadNotification
+from common.tools import bulk_notify_students_and_parents
+from teacher import enrollments
+from teacher.models import Level, Subject, Teacher, TeacherSubject, TeacherEnrollment, Group, GroupEnrollment, Class
+
+
+class EnrollmentsTestCase(TestCase):
+    def setUp(self):
+        self.level = Level.objects.create(name='Septième année de base', order=1)
+        self.subject = Subject.objects.create(name='Mathématiques')
+        self.teacher = Teacher.objects.create(
+            user=User.objects.create_user('teacher@test.com', '11111111', 'testpass123'),
+            fullname='Teacher'
+        )
+        self.teacher_subject = TeacherSubject.objects.create(
+            teacher=self.teacher, level=self.level, subject=self.subject, price_per_class=10
+        )
+        self.group = Group.objects.create(
+            teacher=self.teacher, name='G1', teacher_subject=self.teacher_subject,
+            week_day='Monday', start_time=time(8), end_time=time(10)
+        )
+        self.students = []
+        for i in range(5):
+            student = Student.objects.create(fullname=f'Student {i}', level=self.level)
+            TeacherEnrollment.objects.create(teacher=self.teacher, student=student)
+            self.students.append(student)
+        self.outsider = Student.objects.create(fullname='Outsider', level=self.level)
+
+    def test_enroll_students_in_group(self):
+        GroupEnrollment.objects.create(group=self.group, student=self.students[0])
+        student_ids = [student.id for student in self.students] + [self.outsider.id]
+
+        with self.assertNumQueries(4):
+            outcomes, enrolled_students = enrollments.enroll_students_in_group(self.group, student_ids)
+
+        self.assertEqual(outcomes[self.students[0].id], enrollments.ALREADY_ENROLLED)
+        self.assertEqual(outcomes[self.outsider.id], enrollments.NOT_FOUND)
+        for student in self.students[1:]:
+            self.assertEqual(outcomes[student.id], enrollments.ENROLLED)
+        self.assertEqual(len(enrolled_students), 4)
+        self.assertEqual(GroupEnrollment.objects.filter(group=self.group).count(), 5)
+
+    def test_unenroll_students_from_group(self):
+        for student in self.students[:3]:
+            enrollment = GroupEnrollment.objects.create(group=self.group, student=student)
+            Class.objects.create(group_enrollment=enrollment, status='absent')
+
+        outcomes, removed_students = enrollments.unenroll_students_from_group(
+            self.group, [self.students[0].id, self.students[1].id, self.students[4].id]
+        )
+
+        self.assertEqual(outcomes, {
+            self.students[0].id: enrollments.REMOVED,
+            self.students[1].id: enrollments.REMOVED,
+            self.students[4].id: enrollments.NOT_ENROLLED,
+        })
+        self.assertEqual(len(removed_students), 2)
+        self.assertEqual(list(self.group.students.all()), [self.students[2]])
+        self.assertEqual(Class.objects.count(), 1)
+
+    def test_remove_students_from_teacher(self):
+        independent_student = self.students[0]
+        independent_student.user = User.objects.create_user('student@test.com', '22222222', 'testpass123')
+        independent_student.save()
+        for student in self.students[:2]:
+            enrollment = GroupEnrollment.objects.create(group=self.group, student=student)
+            Class.objects.create(group_enrollment=enrollment, status='absent')
+
+        outcomes, job = enrollments.remove_students_from_teacher(self.teacher, self.students[:2])
+
+        self.assertEqual(set(outcomes.values()), {enrollments.DELETED})
+        self.assertTrue(Student.objects.filter(id=independent_student.id).exists())
+        self.assertFalse(Student.objects.filter(id=self.students[1].id).exists())
+        self.assertFalse(TeacherEnrollment.objects.filter(student=independent_student).exists())
+        self.assertFalse(GroupEnrollment.objects.filter(group=self.group).exists())
+        self.assertFalse(self.group.enrolled_students().exists())
+        # the students relation still sees the soft deleted enrollment of the independent student
+        self.assertEqual(list(self.group.students.all()), [independent_student])
+        # the deleted student and the enrollments are only hidden until the job purges them with their classes
+        self.assertTrue(Student.all_objects.filter(id=self.students[1].id).exists())
+        self.assertEqual(GroupEnrollment.all_objects.count(), 2)
+        self.assertEqual(Class.objects.count(), 2)
+
+        call_command('run_jobs', once=True)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'done')
+        self.assertEqual(job.progress, 100)
+        self.assertFalse(Student.all_objects.filter(id=self.students[1].id).exists())
+        self.assertTrue(Student.objects.filter(id=independent_student.id).exists())
+        self.assertFalse(GroupEnrollment.all_objects.exists())
+        self.assertFalse(Class.objects.exists())
+
+    def test_remove_students_from_teacher_without_anything_to_purge(self):
+        independent_student = self.students[0]
+        independent_student.user = User.objects.create_user('student@test.com', '22222222', 'testpass123')
+        independent_student.save()
+
+        outcomes, job = enrollments.remove_students_from_teacher(self.teacher, [independent_student])
+
+        self.assertEqual(outcomes, {independent_student.id: enrollments.DELETED})
+        self.assertIsNone(job)
+        self.assertFalse(Job.objects.exists())
+
+    def test_removed_student_can_join_the_group_again(self):
+        independent_student = self.students[0]
+        independent_student.user = User.objects.create_user('student@test.com', '22222222', 'testpass123')
+        independent_student.save()
+        GroupEnrollment.objects.create(group=self.group, student=independent_student)
+        enrollments.remove_students_from_teacher(self.teacher, [independent_student])
+
+        TeacherEnrollment.objects.create(teacher=self.teacher, student=independent_student)
+        outcomes, _enrolled_students = enrollments.enroll_students_in_group(self.group, [independent_student.id])
+
+        self.assertEqual(outcomes, {independent_student.id: enrollments.ENROLLED})
+        self.assertEqual(list(self.group.enrolled_students()), [independent_student])
+
+    def test_delete_groups(self):
+        for student in self.students:
+            enrollment = GroupEnrollment.objects.create(group=self.group, student=student)
+            Class.objects.create(group_enrollment=enrollment, status='absent')
+
+        outcomes, job = enrollments.delete_groups(self.teacher, [self.group.id, 'x', 0])
+
+        self.assertEqual(outcomes, {self.group.id: enrollments.DELETED, 0: enrollments.NOT_FOUND})
+        self.assertFalse(Group.objects.exists())
+        self.assertFalse(GroupEnrollment.objects.exists())
+        self.assertFalse(Class.objects.of_active_enrollments().exists())
+        self.assertFalse(self.students[0].groups.exists())
+        self.assertEqual(Class.objects.count(), 5)
+
+        with override_settings(JOBS_PURGE_CHUNK_SIZE=2):
+            call_command('run_jobs', once=True)
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed, job.total), ('done', 11, 11))
+        self.assertFalse(Group.all_objects.exists())
+        self.assertFalse(GroupEnrollment.all_objects.exists())
+        self.assertFalse(Class.objects.exists())
+
+    def test_classes_of_an_enrollment_are_read_without_joining_it(self):
+        enrollment = GroupEnrollment.objects.create(group=self.group, student=self.students[0])
+        self.assertNotIn('JOIN', str(Class.objects.filter(group_enrollment=enrollment, status='absent').query))
+        self.assertNotIn('JOIN', str(enrollment.class_set.all().query))
+
+    def test_job_without_handler_fails(self):
+        job = Job.objects.create(kind='unknown')
+        call_command('run_jobs', once=True)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertIn('No handler registered', job.error)
+
+    def test_delete_teacher_subject(self):
+        GroupEnrollment.objects.create(group=self.group, student=self.students[0])
+
+        job = enrollments.delete_teacher_subject(self.teacher_subject, owner=self.teacher.user)
+
+        self.assertFalse(TeacherSubject.objects.exists())
+        self.assertFalse(Group.objects.exists())
+        call_command('run_jobs', once=True)
+        self.assertFalse(TeacherSubject.all_objects.exists())
+        self.assertFalse(Group.all_objects.exists())
+
+        client = APIClient()
+        client.force_authenticate(self.teacher.user)
+        response = client.get(f'/api/teacher/jobs/{job.id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['status'], 'done')
+
+    def test_bulk_notify_students_and_parents(self):
+        student = self.students[0]
+        student.user = User.objects.create_user('student@test.com', '22222222', 'testpass123')
+        student.save()
+        parent = Parent.objects.create(
+            user=User.objects.create_user('parent@test.com', '33333333', 'testpass123'), fullname='Parent'
+        )
+        son = Son.objects.create(parent=parent, fullname='Son', level=self.level)
+        son.student_teacher_enrollments.add(TeacherEnrollment.objects.get(student=student))
+
+        bulk_notify_students_and_parents(
+            self.students,
+            self.teacher.image,
+            'student_removed_from_group',
+            'parent_removed_from_group',
+            {'teacher': 'Teacher', 'teacher_gender': 'F', 'subject': 'Maths'}
+        )
+
+        self.assertEqual(StudentNotification.objects.get(student=student).text,
+                         'Votre professeure Teacher vous a retiré du groupe de Maths.')
+        self.assertEqual(StudentUnreadNotification.objects.get(student=student).unread_notifications, 1)
+        notification = ParentNotification.objects.get(parent=parent)
+        self.assertEqual((notification.message, notification.template), ('', 'parent_removed_from_group'))
+        self.assertEqual(notification.text, 'La professeure Teacher a retiré votre fils Son du groupe de Maths.')
+        self.assertEqual(notification.meta_data, {'son_id': son.id})
+        self.assertEqual(ParentUnreadNotification.objects.get(parent=parent).unread_notifications, 1)
+
+    def test_add_and_remove_students_views(self):
+        client = APIClient()
+        client.force_authenticate(self.teacher.user)
+        student_ids = [student.id for student in self.students]
+
+        response = client.put(f'/api/teacher/groups/{self.group.id}/students/add/', {'student_ids': student_ids}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['students_added_count'], 5)
+
+        response = client.put(f'/api/teacher/groups/{self.group.id}/students/remove/', {'student_ids': student_ids[:2]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.group.students.count(), 3)
+
+        response = client.delete('/api/teacher/groups/delete/', {'group_ids': [self.group.id]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Group.objects.exists())
+        self.assertTrue(Job.objects.filter(id=response.data['job_id'], kind='purge_groups').exists())
@@ -0,0 +1,92 @@
+import csv
+from datetime import date, time
+from decimal import Decimal
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from account.models import User
+from student.models import Student
+from teacher.models import Level, Subject, Teacher, TeacherSubject, TeacherEnrollment, Group, GroupEnrollment, Class
+
+
+class ExportsTestCase(TestCase):
+    """The CSV exports streamed from a server side cursor."""
+
+    def setUp(self):
+        level = Level.objects.create(name='Quatrième année secondaire', section='Mathématiques', order=1)
+        self.user = User.objects.create_user('teacher@test.com', '11111111', 'testpass123')
+        self.teacher = Teacher.objects.create(user=self.user, fullname='Teacher')
+        physics = TeacherSubject.objects.create(teacher=self.teacher, level=level, subject=Subject.objects.create(name='Physique'),
+                                                price_per_class=Decimal('10'))
+        self.group = Group.objects.create(teacher=self.teacher, name='A', teacher_subject=physics, week_day='Monday',
+                                          start_time=time(8), end_time=time(10), total_paid=Decimal('10'), total_unpaid=Decimal('20'))
+        Group.objects.create(teacher=self.teacher, name='B', teacher_subject=physics, week_day='Tuesday',
+                             start_time=time(14), end_time=time(16))
+
+        self.amine, self.yasmine = (
+            Student.objects.create(fullname=fullname, phone_number=phone_number, level=level)
+            for fullname, phone_number in (('Amine', '22222222'), ('Yasmine', '33333333'))
+        )
+        TeacherEnrollment.objects.create(teacher=self.teacher, student=self.amine, paid_amount=Decimal('10'), unpaid_amount=Decimal('20'))
+        TeacherEnrollment.objects.create(teacher=self.teacher, student=self.yasmine)
+        TeacherEnrollment.objects.filter(student=self.yasmine).update(date=date(2025, 11, 2))
+        amine = GroupEnrollment.objects.create(group=self.group, student=self.amine)
+        yasmine = GroupEnrollment.objects.create(group=self.group, student=self.yasmine)
+
+        Class.objects.create(group_enrollment=amine, status='attended_and_paid', attendance_date=date(2025, 10, 6),
+                             attendance_start_time=time(8), attendance_end_time=time(10))
+        Class.objects.create(group_enrollment=amine, status='attended_and_the_payment_due', attendance_date=date(2025, 10, 13),
+                             attendance_start_time=time(8), attendance_end_time=time(10))
+        Class.objects.create(group_enrollment=yasmine, status='absent', absence_date=date(2025, 10, 13),
+                             absence_start_time=time(8), absence_end_time=time(10))
+        Class.objects.create(group_enrollment=amine, status='attended_and_the_payment_due', attendance_date=date(2025, 11, 3),
+                             attendance_start_time=time(8), attendance_end_time=time(10))
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def export(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return list(csv.reader(b''.join(response.streaming_content).decode('utf-8-sig').splitlines()))
+
+    def test_students(self):
+        rows = self.export('/api/teacher/exports/students/')
+        self.assertEqual(rows[0][:2], ['id', 'fullname'])
+        self.assertEqual([row[1] for row in rows[1:]], ['Amine', 'Yasmine'])
+        self.assertEqual(rows[1][2:6] + rows[1][7:], ['22222222', 'M', 'Quatrième année secondaire', 'Mathématiques', '10.00', '20.00'])
+
+        rows = self.export('/api/teacher/exports/students/?from=2025-11-01&to=2025-11-30')
+        self.assertEqual([row[1] for row in rows[1:]], ['Yasmine'])
+
+    def test_formulas_in_the_names_are_written_as_text(self):
+        Student.objects.filter(id=self.amine.id).update(fullname='=cmd|"/c calc"!A1')
+        rows = self.export('/api/teacher/exports/classes/')
+        self.assertEqual({row[5] for row in rows[1:]}, {'\'=cmd|"/c calc"!A1', 'Yasmine'})
+        rows = self.export('/api/teacher/exports/students/')
+        self.assertIn('\'=cmd|"/c calc"!A1', [row[1] for row in rows[1:]])
+
+    def test_groups(self):
+        rows = self.export('/api/teacher/exports/groups/')
+        self.assertEqual(rows[1][1:], ['A', 'Quatrième année secondaire', 'Mathématiques', 'Physique', 'Monday', '08:00', '10:00',
+                                       '2', '3', '1', '10.00', '20.00'])
+        self.assertEqual(rows[2][1:2] + rows[2][8:11], ['B', '0', '0', '0'])
+
+        rows = self.export('/api/teacher/exports/groups/?from=2025-11-01')
+        self.assertEqual(rows[1][8:11], ['2', '1', '0'])
+
+    def test_classes(self):
+        rows = self.export('/api/teacher/exports/classes/?from=2025-10-01&to=2025-10-31')
+        self.assertEqual(rows[0], ['date', 'start_time', 'end_time', 'status', 'student_id', 'student', 'group', 'subject', 'price', 'paid_at'])
+        self.assertEqual([(row[0], row[3], row[5]) for row in rows[1:]], [
+            ('2025-10-06', 'attended_and_paid', 'Amine'),
+            ('2025-10-13', 'attended_and_the_payment_due', 'Amine'),
+            ('2025-10-13', 'absent', 'Yasmine'),
+        ])
+        self.assertEqual(rows[3][1:3] + rows[3][6:9], ['08:00', '10:00', 'A', 'Physique', '10.00'])
+        self.assertEqual(len(self.export('/api/teacher/exports/classes/')), 5)
+
+        self.assertEqual(self.client.get('/api/teacher/exports/classes/?from=2025-13-01').status_code, 400)
+        self.assertEqual(self.client.get('/api/teacher/exports/classes/?from=2025-11-01&to=2025-10-01').status_code, 400)
@@ -0,0 +1,101 @@
+import io
+import os
+import tempfile
+from datetime import time
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from account.models import User
+from common.reference_data import get_reference_data
+from common.search import search
+from student.models import Student, StudentUnreadNotification
+from teacher.imports import StudentsImportError, import_students
+from teacher.models import Level, Subject, Teacher, TeacherSubject, TeacherEnrollment, Group, GroupEnrollment
+
+
+class StudentsImportTestCase(TestCase):
+    """The bulk import of the students from a CSV file."""
+
+    def setUp(self):
+        self.level = Level.objects.create(name='Quatrième année secondaire', section='Mathématiques', order=1)
+        self.other_level = Level.objects.create(name='Troisième année secondaire', section='Sciences', order=2)
+        self.user = User.objects.create_user('teacher@test.com', '11111111', 'testpass123')
+        self.teacher = Teacher.objects.create(user=self.user, fullname='Teacher')
+        physics = TeacherSubject.objects.create(teacher=self.teacher, level=self.level, subject=Subject.objects.create(name='Physique'))
+        self.group = Group.objects.create(teacher=self.teacher, name='Groupe A', teacher_subject=physics, week_day='Monday',
+                                          start_time=time(8), end_time=time(10))
+        existing = Student.objects.create(fullname='Existing', phone_number='22222222', level=self.level)
+        TeacherEnrollment.objects.create(teacher=self.teacher, student=existing)
+
+    def test_import(self):
+        lines = [
+            'fullname;phone_number;gender;level;section;group\n',
+            'Amine Ben Salah;33333333;M;Quatrième année secondaire;Mathématiques;groupe a\n',
+            'Yasmine;44444444;F;Troisième année secondaire;Sciences;\n',
+            'Sami;;;;;Groupe A\n',
+            '\n',
+            ';55555555;M;Quatrième année secondaire;Mathématiques;\n',
+            'Duplicate;33333333;M;Quatrième année secondaire;Mathématiques;\n',
+            'Known;22222222;X;Première année;;Groupe Z\n',
+            'Mismatch;66666666;F;Troisième année secondaire;Sciences;Groupe A\n',
+        ]
+        get_reference_data()
+        # the phone numbers, the groups and an INSERT per table (in a savepoint) whatever the number of rows
+        with self.assertNumQueries(8):
+            report = import_students(self.teacher, lines)
+
+        self.assertEqual((report['created_students'], report['enrolled_in_groups'], report['invalid_rows']), (3, 2, 4))
+        self.assertEqual(report['errors'], [
+            {'line': 6, 'fullname': '', 'errors': ['FULLNAME_REQUIRED']},
+            {'line': 7, 'fullname': 'Duplicate', 'errors': ['PHONE_NUMBER_ALREADY_EXISTS']},
+            {'line': 8, 'fullname': 'Known', 'errors': ['PHONE_NUMBER_ALREADY_EXISTS', 'INVALID_GENDER', 'GROUP_NOT_FOUND', 'LEVEL_NOT_FOUND']},
+            {'line': 9, 'fullname': 'Mismatch', 'errors': ['GROUP_LEVEL_MISMATCH']},
+        ])
+
+        amine = Student.objects.get(fullname='Amine Ben Salah')
+        self.assertEqual((amine.phone_number, amine.level, amine.search_name), ('33333333', self.level, 'amine ben salah'))
+        self.assertEqual(Student.objects.get(fullname='Sami').level, self.level)
+        self.assertEqual(Student.objects.get(fullname='Yasmine').level, self.other_level)
+        self.assertEqual(TeacherEnrollment.objects.filter(teacher=self.teacher).count(), 4)
+        self.assertEqual(set(GroupEnrollment.objects.values_list('student__fullname', flat=True)), {'Amine Ben Salah', 'Sami'})
+        self.assertTrue(StudentUnreadNotification.objects.filter(student=amine).exists())
+        self.assertEqual(list(search(Student.objects.all(), 'amine').values_list('id', flat=True)), [amine.id])
+
+    def test_invalid_files(self):
+        with self.assertRaisesMessage(StudentsImportError, 'MISSING_COLUMNS: fullname'):
+            import_students(self.teacher, ['name,phone_number\n', 'Amine,33333333\n'])
+        with self.assertRaisesMessage(StudentsImportError, 'EMPTY_FILE'):
+            import_students(self.teacher, [])
+        with self.settings(STUDENTS_IMPORT_MAX_ROWS=1):
+            with self.assertRaisesMessage(StudentsImportError, 'TOO_MANY_ROWS'):
+                import_students(self.teacher, ['fullname,group\n', 'A,Groupe A\n', 'B,Groupe A\n'])
+        self.assertEqual(Student.objects.count(), 1)
+
+    def test_api_and_command(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        content = '﻿fullname,phone_number,group\r\nAmine,33333333,Groupe A\r\nSami,33333333,Groupe A\r\n'.encode('utf-8')
+
+        response = client.post('/api/teacher/students/import/?dry_run=1', {'file': SimpleUploadedFile('students.csv', content)})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['created_students'], response.data['invalid_rows']), (1, 1))
+        self.assertEqual(Student.objects.count(), 1)
+
+        response = client.post('/api/teacher/students/import/', {'file': SimpleUploadedFile('students.csv', content)})
+        self.assertEqual(response.data['errors'], [{'line': 3, 'fullname': 'Sami', 'errors': ['PHONE_NUMBER_ALREADY_EXISTS']}])
+        self.assertTrue(self.group.students.filter(fullname='Amine').exists())
+
+        response = client.post('/api/teacher/students/import/', {'file': SimpleUploadedFile('students.csv', 'é'.encode('latin-1'))})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(client.post('/api/teacher/students/import/', {}).status_code, 400)
+
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, encoding='utf-8') as file:
+            file.write('fullname,level,section\nYasmine,Troisième année secondaire,Sciences\n')
+        self.addCleanup(os.remove, file.name)
+        stdout = io.StringIO()
+        call_command('import_students', file.name, teacher='teacher@test.com', stdout=stdout)
+        self.assertIn('Imported 1 student(s)', stdout.getvalue())
+        self.assertEqual(Student.objects.get(fullname='Yasmine').level, self.other_level)
@@ -0,0 +1,111 @@
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from account.models import User
+from parent.models import Parent, ParentNotification
+from student.models import Student, StudentNotification
+from teacher.models import (Level, Subject, Teacher, TeacherSubject, TeacherEnrollment, Group, GroupEnrollment, Class,
+                            TeacherNotification)
+from teacher.statements import day_start
+
+
+class QueryIndexesTestCase(TestCase):
+    """The hot queries are served by the composite indexes (EXPLAIN on seeded data)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        level = Level.objects.create(name='Septième année de base', order=1)
+        users = [User.objects.create_user(f'teacher{i}@test.com', f'1111111{i}', 'testpass123') for i in range(3)]
+        teachers = [Teacher.objects.create(user=user, fullname=f'Teacher {i}') for i, user in enumerate(users)]
+        cls.teacher = teachers[0]
+        cls.parent = Parent.objects.create(user=User.objects.create_user('parent@test.com', '22222222', 'testpass123'), fullname='Parent')
+
+        students = Student.objects.bulk_create([Student(fullname=f'Student {i}', level=level) for i in range(60)])
+        cls.student = students[0]
+        group_enrollments = []
+        for teacher in teachers:
+            teacher_subject = TeacherSubject.objects.create(teacher=teacher, level=level, subject=Subject.objects.create(name='Maths'),
+                                                            price_per_class=Decimal('10'))
+            TeacherEnrollment.objects.bulk_create([TeacherEnrollment(teacher=teacher, student=student) for student in students])
+            for day in range(5):
+                group = Group.objects.create(teacher=teacher, name=f'G{day}', teacher_subject=teacher_subject,
+                                             week_day='Monday', start_time=time(8 + day), end_time=time(9 + day))
+                group_enrollments += GroupEnrollment.objects.bulk_create([
+                    GroupEnrollment(group=group, student=student, date=date(2025, 1, 1) + timedelta(days=i * 3))
+                    for i, student in enumerate(students)
+                ])
+        cls.group_enrollment = group_enrollments[0]
+
+        statuses = ('attended_and_paid', 'attended_and_the_payment_due', 'attended_and_the_payment_not_due', 'absent')
+        paid_at = timezone.make_aware(datetime(2025, 3, 1, 18))
+        Class.objects.bulk_create([
+            Class(group_enrollment=group_enrollment, status=statuses[week % 4],
+                  attendance_date=date(2025, 1, 6) + timedelta(weeks=week), attendance_start_time=time(8),
+                  paid_at=paid_at + timedelta(days=week) if week % 4 == 0 else None)
+            for group_enrollment in group_enrollments for week in range(12)
+        ])
+
+        for teacher in teachers:
+            TeacherNotification.objects.bulk_create([TeacherNotification(teacher=teacher, message='message')] * 200)
+        for student in students[:10]:
+            StudentNotification.objects.bulk_create([StudentNotification(student=student, message='message')] * 50)
+        ParentNotification.objects.bulk_create([ParentNotification(parent=cls.parent, message='message')] * 200)
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def setUp(self):
+        if connection.vendor == 'postgresql':
+            # the seeded tables are small enough for a sequential scan to look cheaper
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan, f"{index_name} not used by :\n{queryset.query}\n{plan}")
+
+    def test_classes(self):
+        # the attended classes not paid yet, in the order they are paid
+        self.assertUsesIndex(
+            Class.objects.filter(group_enrollment=self.group_enrollment,
+                                 status__in=('attended_and_the_payment_due', 'attended_and_the_payment_not_due'))
+                         .order_by('attendance_date', 'attendance_start_time', 'id'),
+            'class_enrollment_status_idx'
+        )
+        # the due classes attended in a date range
+        self.assertUsesIndex(
+            Class.objects.filter(group_enrollment=self.group_enrollment, status='attended_and_the_payment_due',
+                                 attendance_date__gte=date(2025, 2, 1), attendance_date__lte=date(2025, 2, 28)),
+            'class_enrollment_status_idx'
+        )
+        # the classes paid in a date range
+        self.assertUsesIndex(
+            Class.objects.filter(group_enrollment=self.group_enrollment, paid_at__gte=day_start(date(2025, 3, 1)),
+                                 paid_at__lt=day_start(date(2025, 4, 1))),
+            'class_enrollment_paid_at_idx'
+        )
+
+    def test_notifications(self):
+        self.assertUsesIndex(
+            TeacherNotification.objects.filter(teacher=self.teacher).exclude(id__gte=150).order_by('-id'),
+            'teacher_notification_idx'
+        )
+        self.assertUsesIndex(TeacherNotification.objects.filter(teacher=self.teacher, id__lte=100), 'teacher_notification_idx')
+        self.assertUsesIndex(
+            StudentNotification.objects.filter(student=self.student).exclude(id__gte=30).order_by('-id'),
+            'student_notification_idx'
+        )
+        self.assertUsesIndex(
+            ParentNotification.objects.filter(parent=self.parent).exclude(id__gte=150).order_by('-id'),
+            'parent_notification_idx'
+        )
+
+    def test_group_enrollments(self):
+        self.assertUsesIndex(
+            GroupEnrollment.objects.filter(group__teacher=self.teacher, date__gte=date(2025, 2, 1), date__lte=date(2025, 2, 28)),
+            'groupenrollment_group_date_idx'
+        )
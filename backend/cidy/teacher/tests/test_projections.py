@@ -0,0 +1,99 @@
+from datetime import time
+from decimal import Decimal
+
+from django.db.models import DecimalField, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.test import TestCase
+from rest_framework.renderers import JSONRenderer
+
+from account.models import User
+from common.reference_data import get_reference_data, invalidate_reference_data
+from parent.models import Parent, ParentNotification
+from parent.serializers import ParentNotificationProjection, ParentNotificationSerializer
+from student.models import Student, StudentNotification
+from student.serializers import StudentNotificationProjection, StudentNotificationSerializer
+from teacher.models import (Level, Subject, Teacher, TeacherSubject, TeacherEnrollment, Group, GroupEnrollment,
+                            TeacherNotification)
+from teacher.serializers import (GroupListSerializer, GroupListProjection,
+                                 GroupStudentListSerializer, GroupStudentListProjection,
+                                 GroupPossibleStudentListSerializer, GroupPossibleStudentListProjection,
+                                 TeacherStudentListSerializer, TeacherStudentListProjection,
+                                 TeacherNotificationSerializer, TeacherNotificationProjection)
+
+
+class ProjectionsCompatibilityTestCase(TestCase):
+    """The projections must render the same JSON as the serializers they replace."""
+
+    def setUp(self):
+        invalidate_reference_data()
+        self.level = Level.objects.create(name='Quatrième année secondaire', section='Mathématiques', order=1)
+        self.subject = Subject.objects.create(name='Physique')
+        self.teacher = Teacher.objects.create(
+            user=User.objects.create_user('teacher@test.com', '11111111', 'testpass123'), fullname='Teacher'
+        )
+        teacher_subject = TeacherSubject.objects.create(
+            teacher=self.teacher, level=self.level, subject=self.subject, price_per_class=Decimal('12.5')
+        )
+        self.group = Group.objects.create(
+            teacher=self.teacher, name='Groupe A', teacher_subject=teacher_subject, week_day='Tuesday',
+            start_time=time(8, 30), end_time=time(10), total_paid=Decimal('120'), total_unpaid=Decimal('7.5')
+        )
+        for i in range(3):
+            student = Student.objects.create(fullname=f'Élève {i}', level=self.level, image=f'student_images/élève {i}.png')
+            TeacherEnrollment.objects.create(teacher=self.teacher, student=student, paid_amount=Decimal(i), unpaid_amount=Decimal('2.25'))
+            GroupEnrollment.objects.create(group=self.group, student=student, paid_amount=Decimal(i * 10), unpaid_amount=Decimal('0.5'))
+        Student.objects.create(fullname='Sans groupe', level=self.level)
+
+        for i in range(3):
+            TeacherNotification.objects.create(teacher=self.teacher, message=f'Message {i}', meta_data={'student_id': i}, is_read=bool(i % 2))
+
+    def tearDown(self):
+        invalidate_reference_data()
+
+    def assertSameJSON(self, serializer_data, projection_data):
+        renderer = JSONRenderer()
+        self.assertEqual(renderer.render(projection_data), renderer.render(serializer_data))
+
+    def test_group_list(self):
+        groups = Group.objects.all()
+        self.assertSameJSON(GroupListSerializer(groups, many=True).data, GroupListProjection.data(groups))
+
+    def test_group_student_lists(self):
+        students = self.group.students.annotate(
+            paid_amount=Coalesce(Sum('groupenrollment__paid_amount', filter=Q(groupenrollment__group=self.group)), Value(0), output_field=DecimalField()),
+            unpaid_amount=Coalesce(Sum('groupenrollment__unpaid_amount', filter=Q(groupenrollment__group=self.group)), Value(0), output_field=DecimalField()),
+        )
+        self.assertSameJSON(GroupStudentListSerializer(students, many=True).data, GroupStudentListProjection.data(students))
+
+        students = Student.objects.exclude(groups=self.group)
+        self.assertSameJSON(GroupPossibleStudentListSerializer(students, many=True).data, GroupPossibleStudentListProjection.data(students))
+
+    def test_teacher_student_list(self):
+        students = Student.objects.filter(teacherenrollment__teacher=self.teacher).annotate(
+            paid_amount=Sum('teacherenrollment__paid_amount'),
+            unpaid_amount=Sum('teacherenrollment__unpaid_amount')
+        ).order_by('id')
+        self.assertSameJSON(TeacherStudentListSerializer(students, many=True).data, TeacherStudentListProjection.data(students))
+
+    def test_notifications(self):
+        notifications = TeacherNotification.objects.order_by('-id')
+        self.assertSameJSON(TeacherNotificationSerializer(notifications, many=True).data, TeacherNotificationProjection.data(notifications))
+
+        student = Student.objects.first()
+        StudentNotification.objects.create(student=student, message='Message', meta_data={'group_id': 1})
+        notifications = StudentNotification.objects.all()
+        self.assertSameJSON(StudentNotificationSerializer(notifications, many=True).data, StudentNotificationProjection.data(notifications))
+
+        parent = Parent.objects.create(user=User.objects.create_user('parent@test.com', '22222222', 'testpass123'), fullname='Parent')
+        ParentNotification.objects.create(parent=parent, message='Message', meta_data={'son_id': 1})
+        notifications = ParentNotification.objects.all()
+        self.assertSameJSON(ParentNotificationSerializer(notifications, many=True).data, ParentNotificationProjection.data(notifications))
+
+    def test_projection_pages_are_built_without_model_instances(self):
+        get_reference_data()
+        groups = GroupListProjection.values(Group.objects.all())
+        # one query for the rows, the labels come from the reference data registry
+        with self.assertNumQueries(1):
+            data = GroupListProjection.build(groups)
+        self.assertEqual(data[0]['subject'], 'Physique')
+        self.assertEqual(data[0]['total_unpaid'], '7.50')
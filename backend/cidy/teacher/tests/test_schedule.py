@@ -0,0 +1,125 @@
+import io
+from datetime import date, time, timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from account.models import User
+from student.models import Student
+from student.serializers import StudentSubjectListSerializer
+from teacher import enrollments
+from teacher.models import Level, Subject, Teacher, TeacherSubject, Group, GroupEnrollment
+from teacher.schedule import (WEEK_CACHE_KEY, expand, expire_temporary_schedules, get_schedule_version, get_teacher_week,
+                              group_occurrence, schedule_payload, week_start)
+
+# a Wednesday
+TODAY = date(2025, 10, 15)
+MONDAY = date(2025, 10, 13)
+SUNDAY = date(2025, 10, 19)
+
+
+class ScheduleTestCase(TestCase):
+    """The occurrences of the groups, with their temporary schedule applied once."""
+
+    def setUp(self):
+        cache.clear()
+        self.level = level = Level.objects.create(name='Quatrième année secondaire', section='Mathématiques', order=1)
+        subject = Subject.objects.create(name='Physique')
+        self.user = User.objects.create_user('teacher@test.com', '11111111', 'testpass123')
+        self.teacher = Teacher.objects.create(user=self.user, fullname='Teacher')
+        teacher_subject = TeacherSubject.objects.create(teacher=self.teacher, level=level, subject=subject, price_per_class=Decimal('10'))
+        # moved to Friday afternoon for the week of TODAY
+        self.moved = Group.objects.create(
+            teacher=self.teacher, name='Groupe A', teacher_subject=teacher_subject, week_day='Tuesday',
+            start_time=time(8, 30), end_time=time(10), temporary_week_day='Friday', temporary_start_time=time(14),
+            temporary_end_time=time(16), clear_temporary_schedule_at=SUNDAY
+        )
+        self.permanent = Group.objects.create(
+            teacher=self.teacher, name='Groupe B', teacher_subject=teacher_subject, week_day='Monday',
+            start_time=time(18), end_time=time(19, 30)
+        )
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_the_override_replaces_the_class_of_its_week_only(self):
+        occurrence = group_occurrence(self.moved, MONDAY, today=TODAY)
+        self.assertEqual((occurrence.date, occurrence.week_day, occurrence.start_time, occurrence.temporary),
+                         (date(2025, 10, 17), 'Friday', time(14), True))
+
+        for monday in (MONDAY - timedelta(days=7), MONDAY + timedelta(days=7)):
+            occurrence = group_occurrence(self.moved, monday, today=TODAY)
+            self.assertEqual((occurrence.date, occurrence.temporary), (monday + timedelta(days=1), False))
+
+        # the history of the week is kept once it's past
+        self.assertTrue(group_occurrence(self.moved, MONDAY, today=TODAY + timedelta(days=30)).temporary)
+        self.assertEqual(week_start(SUNDAY), MONDAY)
+
+    def test_expand_a_date_range(self):
+        occurrences = expand([self.moved, self.permanent], MONDAY, SUNDAY + timedelta(days=2), today=TODAY)
+        self.assertEqual(
+            [(occurrence.group_id, occurrence.date, occurrence.temporary) for occurrence in occurrences],
+            [(self.permanent.id, MONDAY, False), (self.moved.id, date(2025, 10, 17), True),
+             (self.permanent.id, date(2025, 10, 20), False), (self.moved.id, date(2025, 10, 21), False)]
+        )
+
+    def test_the_teacher_weeks_are_cached_until_a_group_changes(self):
+        entries = get_teacher_week(self.teacher.id, MONDAY, today=TODAY)
+        self.assertEqual([(entry['name'], entry['date'], entry['temporary_schedule']) for entry in entries],
+                         [('Groupe B', '2025-10-13', False), ('Groupe A', '2025-10-17', True)])
+        self.assertEqual(entries[1]['level'], 'Quatrième année secondaire Mathématiques')
+
+        with self.assertNumQueries(0):
+            get_teacher_week(self.teacher.id, TODAY, today=TODAY)
+
+        self.permanent.start_time = time(17)
+        self.permanent.save()
+        self.assertEqual(get_teacher_week(self.teacher.id, MONDAY, today=TODAY)[0]['start_time'], '17:00')
+
+        enrollments.delete_groups(self.teacher, [self.permanent.id])
+        self.assertEqual([entry['name'] for entry in get_teacher_week(self.teacher.id, MONDAY, today=TODAY)], ['Groupe A'])
+
+    def test_a_week_cached_before_the_commit_is_dropped(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.permanent.start_time = time(17)
+            self.permanent.save()
+            # another worker reads the groups before the commit and caches the week under the bumped version
+            stale_version = get_schedule_version(self.teacher.id)
+            cache.set(WEEK_CACHE_KEY.format(self.teacher.id, stale_version, MONDAY.isoformat(), MONDAY.isoformat()), [])
+
+        self.assertNotEqual(get_schedule_version(self.teacher.id), stale_version)
+        self.assertEqual(get_teacher_week(self.teacher.id, MONDAY, today=TODAY)[0]['start_time'], '17:00')
+
+    def test_week_schedule_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get('/api/teacher/week_schedule/', {'week': '2025-10-22'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([entry['date'] for entry in response.data['groups']], ['2025-10-20', '2025-10-21'])
+        self.assertEqual(client.get('/api/teacher/week_schedule/', {'week': 'next'}).status_code, 400)
+
+    def test_the_students_see_both_slots(self):
+        payload = schedule_payload(self.moved, today=TODAY)
+        self.assertEqual(payload['temporary'], {'week_day': 'Friday', 'start_time': time(14), 'end_time': time(16)})
+        self.assertEqual(payload['permanent']['week_day'], 'Tuesday')
+        self.assertNotIn('temporary', schedule_payload(self.moved, today=TODAY + timedelta(days=7)))
+
+        student = Student.objects.create(user=User.objects.create_user('student@test.com', '22222222', 'testpass123'), fullname='Élève', level=self.level)
+        GroupEnrollment.objects.create(group=self.permanent, student=student)
+        data = StudentSubjectListSerializer(GroupEnrollment.objects.filter(student=student), many=True).data
+        self.assertEqual(list(data[0]['schedule']), ['permanent'])
+
+    def test_the_past_overrides_are_expired(self):
+        self.assertEqual(expire_temporary_schedules(today=SUNDAY), 0)
+        get_teacher_week(self.teacher.id, SUNDAY + timedelta(days=1), today=SUNDAY + timedelta(days=1))
+
+        call_command('expire_temporary_schedules', today=(SUNDAY + timedelta(days=1)).isoformat(), stdout=io.StringIO())
+        self.moved.refresh_from_db()
+        self.assertEqual((self.moved.temporary_week_day, self.moved.temporary_start_time, self.moved.clear_temporary_schedule_at),
+                         (None, None, None))
+        # the cached weeks of the teacher were dropped
+        with self.assertNumQueries(1):
+            get_teacher_week(self.teacher.id, SUNDAY + timedelta(days=1), today=SUNDAY + timedelta(days=1))
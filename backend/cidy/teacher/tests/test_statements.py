@@ -0,0 +1,106 @@
+import io
+from datetime import date, datetime, time
+from decimal import Decimal
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from account.models import User
+from student.models import Student
+from teacher.models import (Level, Subject, Teacher, TeacherSubject, TeacherEnrollment, Group, GroupEnrollment, Class,
+                            MonthlyStatement)
+from teacher.statements import compute_statement_lines, generate_statement, month_bounds
+
+
+class StatementsTestCase(TestCase):
+    """The monthly statements computed from the classes with grouped queries."""
+
+    def setUp(self):
+        level = Level.objects.create(name='Quatrième année secondaire', section='Mathématiques', order=1)
+        self.user = User.objects.create_user('teacher@test.com', '11111111', 'testpass123')
+        self.teacher = Teacher.objects.create(user=self.user, fullname='Teacher')
+        physics = TeacherSubject.objects.create(teacher=self.teacher, level=level, subject=Subject.objects.create(name='Physique'),
+                                                price_per_class=Decimal('10'))
+        maths = TeacherSubject.objects.create(teacher=self.teacher, level=level, subject=Subject.objects.create(name='Maths'),
+                                              price_per_class=Decimal('15'))
+        physics_group = Group.objects.create(teacher=self.teacher, name='A', teacher_subject=physics, week_day='Monday',
+                                             start_time=time(8), end_time=time(10))
+        maths_group = Group.objects.create(teacher=self.teacher, name='B', teacher_subject=maths, week_day='Tuesday',
+                                           start_time=time(8), end_time=time(10))
+
+        self.amine, self.yasmine, self.idle = (
+            Student.objects.create(fullname=fullname, level=level) for fullname in ('Amine', 'Yasmine', 'Zied')
+        )
+        for student, unpaid_amount in ((self.amine, Decimal('25')), (self.yasmine, Decimal('0')), (self.idle, Decimal('0'))):
+            TeacherEnrollment.objects.create(teacher=self.teacher, student=student, unpaid_amount=unpaid_amount)
+
+        amine_physics = GroupEnrollment.objects.create(group=physics_group, student=self.amine)
+        amine_maths = GroupEnrollment.objects.create(group=maths_group, student=self.amine)
+        yasmine_physics = GroupEnrollment.objects.create(group=physics_group, student=self.yasmine)
+
+        paid_at = timezone.make_aware(datetime(2025, 10, 20, 18))
+        self.create_class(amine_physics, 'attended_and_paid', date(2025, 10, 6), paid_at=paid_at)
+        self.create_class(amine_physics, 'attended_and_the_payment_due', date(2025, 10, 13))
+        self.create_class(amine_maths, 'attended_and_the_payment_due', date(2025, 10, 14))
+        self.create_class(amine_maths, 'absent', absence_date=date(2025, 10, 21))
+        # paid in october for a class of september
+        self.create_class(yasmine_physics, 'attended_and_paid', date(2025, 9, 29), paid_at=paid_at)
+        self.create_class(yasmine_physics, 'attended_and_the_payment_not_due', date(2025, 10, 6))
+        # another month
+        self.create_class(yasmine_physics, 'attended_and_the_payment_due', date(2025, 11, 3))
+
+    def create_class(self, group_enrollment, status, attendance_date=None, absence_date=None, paid_at=None):
+        return Class.objects.create(group_enrollment=group_enrollment, status=status, attendance_date=attendance_date,
+                                    absence_date=absence_date, paid_at=paid_at)
+
+    def test_lines(self):
+        self.assertEqual(month_bounds(date(2025, 12, 15)), (date(2025, 12, 1), date(2026, 1, 1)))
+        # and the archive, october 2025 is in a closed school year
+        with self.assertNumQueries(3):
+            lines = compute_statement_lines(self.teacher, date(2025, 10, 1))
+        self.assertEqual(
+            [(line.fullname, line.attended_classes, line.paid_classes, line.due_classes, line.not_due_classes, line.absences,
+              line.paid_amount, line.due_amount, line.collected_amount, line.balance) for line in lines],
+            [('Amine', 3, 1, 2, 0, 1, Decimal('10'), Decimal('25'), Decimal('10'), Decimal('25')),
+             ('Yasmine', 1, 0, 0, 1, 0, Decimal('0'), Decimal('0'), Decimal('10'), Decimal('0')),
+             ('Zied', 0, 0, 0, 0, 0, 0, 0, 0, Decimal('0'))]
+        )
+
+    def test_generate_replaces_the_previous_statement(self):
+        statement = generate_statement(self.teacher, date(2025, 10, 17))
+        self.assertEqual((statement.month, statement.students_count, statement.attended_classes), (date(2025, 10, 1), 3, 4))
+        self.assertEqual((statement.due_amount, statement.collected_amount, statement.balance), (Decimal('25'), Decimal('20'), Decimal('25')))
+
+        call_command('generate_statements', month='2025-10', stdout=io.StringIO())
+        self.assertEqual(MonthlyStatement.objects.get().lines.count(), 3)
+
+    def test_api(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        # the reads don't generate the statement
+        self.assertEqual(client.get('/api/teacher/statements/2025-10/').status_code, 404)
+        self.assertEqual(client.get('/api/teacher/statements/2025-10/pdf/').status_code, 404)
+        self.assertFalse(MonthlyStatement.objects.exists())
+        self.assertEqual(client.get('/api/teacher/statements/2025-10/generate/').status_code, 405)
+        response = client.post('/api/teacher/statements/2025-10/generate/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['students_count'], 3)
+
+        response = client.get('/api/teacher/statements/2025-10/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['month'], '2025-10')
+        self.assertEqual([line['fullname'] for line in response.data['lines']], ['Amine', 'Yasmine', 'Zied'])
+        self.assertEqual(client.get('/api/teacher/statements/october/').status_code, 400)
+
+        response = client.get('/api/teacher/statements/2025-10/csv/')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        content = b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual(content[0].split(',')[:2], ['fullname', 'attended_classes'])
+        self.assertEqual(content[1], 'Amine,3,1,2,0,1,10.00,25.00,10.00,25.00')
+
+        response = client.get('/api/teacher/statements/2025-10/pdf/')
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(response.content.startswith(b'%PDF-'))
+        self.assertIn(b'/FontFile2', response.content)
@@ -0,0 +1,98 @@
+from datetime import date, time, timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from account.models import User
+from teacher.models import Level, Subject, Teacher, TeacherSubject, Group
+from teacher.timetable import get_timetable
+
+
+class TimetableTestCase(TestCase):
+    """The schedule conflicts and the free slots, found in the cached timetable of the teacher."""
+
+    def setUp(self):
+        cache.clear()
+        level = Level.objects.create(name='Quatrième année secondaire', section='Mathématiques', order=1)
+        subject = Subject.objects.create(name='Physique')
+        self.user = User.objects.create_user('teacher@test.com', '11111111', 'testpass123')
+        self.teacher = Teacher.objects.create(user=self.user, fullname='Teacher')
+        self.teacher_subject = TeacherSubject.objects.create(teacher=self.teacher, level=level, subject=subject,
+                                                             price_per_class=Decimal('10'))
+        self.morning = self.create_group('Groupe A', 'Monday', time(8), time(10))
+        self.evening = self.create_group('Groupe B', 'Monday', time(18), time(19, 30))
+        # moved to Wednesday morning for the current week
+        self.moved = self.create_group(
+            'Groupe C', 'Tuesday', time(14), time(16), temporary_week_day='Wednesday', temporary_start_time=time(9),
+            temporary_end_time=time(11), clear_temporary_schedule_at=date.today() + timedelta(days=6 - date.today().weekday())
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def tearDown(self):
+        cache.clear()
+
+    def create_group(self, name, week_day, start_time, end_time, **fields):
+        return Group.objects.create(teacher=self.teacher, name=name, teacher_subject=self.teacher_subject, week_day=week_day,
+                                    start_time=start_time, end_time=end_time, **fields)
+
+    def test_overlapping_intervals(self):
+        timetable = get_timetable(self.teacher.id)
+        self.assertEqual([interval[2] for interval in timetable.overlapping('Monday', time(9), time(18, 30))],
+                         [self.morning.id, self.evening.id])
+        self.assertEqual(timetable.overlapping('Monday', time(10), time(18)), [])
+        self.assertEqual(timetable.overlapping('Monday', time(9), time(9, 30), exclude_group_id=self.morning.id), [])
+        self.assertEqual(timetable.overlapping('Wednesday', time(10), time(12)), [(9 * 60, 11 * 60, self.moved.id, True)])
+        self.assertEqual(len(timetable.overlapping('Tuesday', time(15), time(17))), 1)
+
+    def test_the_timetable_is_cached_until_a_group_changes(self):
+        get_timetable(self.teacher.id)
+        with self.assertNumQueries(0):
+            get_timetable(self.teacher.id)
+        self.create_group('Groupe D', 'Friday', time(8), time(9))
+        self.assertEqual(len(get_timetable(self.teacher.id).overlapping('Friday', time(8), time(9))), 1)
+
+    def test_a_bulk_created_group_drops_the_cached_timetable(self):
+        get_timetable(self.teacher.id)
+        Group.objects.bulk_create([Group(teacher=self.teacher, name='Groupe D', teacher_subject=self.teacher_subject,
+                                         week_day='Friday', start_time=time(8), end_time=time(9))])
+        data = {'name': 'Groupe E', 'level': 'Quatrième année secondaire', 'section': 'Mathématiques', 'subject': 'Physique',
+                'week_day': 'Friday', 'start_time': '08:30', 'end_time': '10:00'}
+        response = self.client.post('/api/teacher/groups/create/', data, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['non_field_errors'], ['SCHEDULE_CONFLICT_DETECTED'])
+
+    def test_the_temporary_slot_stops_conflicting_once_its_week_is_over(self):
+        next_week = date.today() + timedelta(days=7)
+        self.assertEqual(get_timetable(self.teacher.id, today=next_week).overlapping('Wednesday', time(10), time(12)), [])
+
+    def test_create_group_conflicts(self):
+        data = {'name': 'Groupe E', 'level': 'Quatrième année secondaire', 'section': 'Mathématiques', 'subject': 'Physique',
+                'week_day': 'Wednesday', 'start_time': '10:30', 'end_time': '12:00'}
+        response = self.client.post('/api/teacher/groups/create/', data, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['non_field_errors'], ['SCHEDULE_CONFLICT_DETECTED'])
+
+        data['start_time'] = '11:00'
+        response = self.client.post('/api/teacher/groups/create/', data, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        # a partial edit is checked against the slot of the group
+        response = self.client.put(f'/api/teacher/groups/{self.evening.id}/edit/', {'start_time': '09:30'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_free_slots(self):
+        response = self.client.get('/api/teacher/groups/free_slots/', {'duration': 90, 'week_days': 'Monday,Wednesday'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['free_slots'], {
+            'Monday': [{'start_time': '10:00', 'end_time': '18:00'}],
+            'Wednesday': [{'start_time': '11:00', 'end_time': '20:00'}],
+        })
+        response = self.client.get('/api/teacher/groups/free_slots/', {'duration': 30, 'week_days': 'Monday', 'day_start': '07:00'})
+        self.assertEqual(response.data['free_slots']['Monday'], [
+            {'start_time': '07:00', 'end_time': '08:00'}, {'start_time': '10:00', 'end_time': '18:00'},
+            {'start_time': '19:30', 'end_time': '20:00'},
+        ])
+        self.assertEqual(self.client.get('/api/teacher/groups/free_slots/', {'week_days': 'Funday'}).status_code, 400)
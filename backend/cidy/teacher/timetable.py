@@ -0,0 +1,107 @@
+"""
+Timetable of a teacher : the busy intervals of his groups, per week day.
+
+Each group occupies its permanent slot, and its temporary slot while it's in
+effect (its week isn't over, see schedule.py). The intervals of a day are kept
+sorted by their start (in minutes since midnight), so the groups overlapping
+a slot are found with two binary searches :
+
+    starts before the end of the slot       bisect_left(starts, end)
+    and can still reach its start           bisect_left(starts, start - longest interval of the day)
+
+then by checking the ends of the few intervals in between. The timetable
+answers the schedule conflicts of the group creation / edit and the free slots
+proposed by the group creation screen. It's cached (sorted) per teacher under
+the version of his schedule and the current week (when the temporary slots
+stop being in effect). The version lives in the shared cache and is bumped
+when his groups are saved, deleted, bulk created or expired, again once the
+transaction is committed (see schedule.py), so the timetables cached by the
+workers don't outlive a change of the groups.
+"""
+import bisect
+import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Group
+from .schedule import WEEK_DAYS, get_schedule_version, week_start
+
+TIMETABLE_CACHE_KEY = 'schedule_timetable:{}:{}:{}'
+
+
+def to_minutes(value):
+    return value.hour * 60 + value.minute
+
+
+def to_time(minutes):
+    return datetime.time(minutes // 60, minutes % 60)
+
+
+def group_intervals(group, today):
+    """The (week_day, start, end, group_id, temporary) intervals occupied by the group."""
+    intervals = [(group.week_day, to_minutes(group.start_time), to_minutes(group.end_time), group.id, False)]
+    clear_at = group.clear_temporary_schedule_at
+    if (clear_at is not None and clear_at >= week_start(today)
+            and group.temporary_week_day and group.temporary_start_time and group.temporary_end_time):
+        intervals.append((group.temporary_week_day, to_minutes(group.temporary_start_time),
+                          to_minutes(group.temporary_end_time), group.id, True))
+    return intervals
+
+
+class Timetable:
+    """The busy intervals of a teacher sorted per week day."""
+
+    def __init__(self, intervals):
+        self.days = {}
+        for week_day in WEEK_DAYS:
+            day_intervals = sorted(interval[1:] for interval in intervals if interval[0] == week_day)
+            self.days[week_day] = (
+                [start for start, _end, _group_id, _temporary in day_intervals],
+                day_intervals,
+                max((end - start for start, end, _group_id, _temporary in day_intervals), default=0),
+            )
+
+    @classmethod
+    def from_groups(cls, groups, today=None):
+        today = today or datetime.date.today()
+        return cls([interval for group in groups for interval in group_intervals(group, today)])
+
+    def overlapping(self, week_day, start_time, end_time, exclude_group_id=None):
+        """The (start, end, group_id, temporary) intervals overlapping the slot (other than the excluded group's)."""
+        starts, intervals, longest = self.days.get(week_day, ((), (), 0))
+        start, end = to_minutes(start_time), to_minutes(end_time)
+        low = bisect.bisect_left(starts, start - longest)
+        high = bisect.bisect_left(starts, end)
+        return [
+            interval for interval in intervals[low:high]
+            if interval[1] > start and interval[2] != exclude_group_id
+        ]
+
+    def free_slots(self, week_day, day_start, day_end, duration):
+        """The free (start_time, end_time) windows of the day, between day_start and day_end, lasting duration minutes at least."""
+        _starts, intervals, _longest = self.days.get(week_day, ((), (), 0))
+        cursor, day_end = to_minutes(day_start), to_minutes(day_end)
+        slots = []
+        for start, end, _group_id, _temporary in intervals:
+            if min(start, day_end) - cursor >= duration:
+                slots.append((cursor, min(start, day_end)))
+            cursor = max(cursor, end)
+        if day_end - cursor >= duration:
+            slots.append((cursor, day_end))
+        return [(to_time(start), to_time(end)) for start, end in slots]
+
+
+def get_timetable(teacher_id, today=None):
+    """The timetable of the teacher (cached until his groups change or the week ends)."""
+    today = today or datetime.date.today()
+    key = TIMETABLE_CACHE_KEY.format(teacher_id, get_schedule_version(teacher_id), week_start(today).isoformat())
+    timetable = cache.get(key)
+    if timetable is None:
+        groups = Group.objects.filter(teacher_id=teacher_id).only(
+            'id', 'week_day', 'start_time', 'end_time', 'temporary_week_day', 'temporary_start_time',
+            'temporary_end_time', 'clear_temporary_schedule_at'
+        )
+        timetable = Timetable.from_groups(groups, today)
+        cache.set(key, timetable, getattr(settings, 'SCHEDULE_CACHE_TIMEOUT', 24 * 3600))
+    return timetable
@@ -1,13 +1,14 @@
 from django.urls import path
+from common.async_views import sync_or_async
 from . import views
 
 
 urlpatterns = [
     # Notifications endpoints
-    path('notifications/unread_count/', views.get_unread_notifications_count, name='get_unread_notifications_count'),
+    path('notifications/unread_count/', sync_or_async(views.get_unread_notifications_count, views.aget_unread_notifications_count), name='get_unread_notifications_count'),
     path('notifications/mark_as_read/', views.mark_notifications_as_read, name='mark_notifications_as_read'),
     path('notifications/', views.get_notifications, name='get_notifications'),
-    path('notifications/new/', views.get_new_notifications, name='get_new_notifications'),
+    path('notifications/new/', sync_or_async(views.get_new_notifications, views.aget_new_notifications), name='get_new_notifications'),
     path('notifications/<int:notification_id>/mark_as_read/', views.mark_a_notification_as_read, name='mark_a_notification_as_read'),
     path('notifications/<int:notification_id>/accept_student_request_form/', views.student_request_accept_form_data, name='student_request_accept_form_data'),
     path('notifications/<int:notification_id>/accept_student_request/', views.accept_student_request, name='accept_student_request'),
@@ -20,12 +21,13 @@ urlpatterns = [
     path('get_dashboard_data/', views.get_dashboard_data, name='teacher_get_dashboard_data'),
     
     # Week schedule endpoints
-    path('week_schedule/', views.get_week_schedule, name='teacher_week_schedule'),
+    path('week_schedule/', sync_or_async(views.get_week_schedule, views.aget_week_schedule), name='teacher_week_schedule'),
     path('update_group_schedule/<int:group_id>/', views.update_group_schedule, name='update_group_schedule'),
     
     # Group endpoints
     path('can_create_group/', views.can_create_group, name='can_create_group'),
     path('groups/', views.get_groups, name='get_groups'),
+    path('groups/free_slots/', views.get_free_slots, name='get_free_slots'),
     path('groups/create/', views.create_group, name='create_group'),
     path('groups/delete/', views.delete_groups, name='delete_groups'),
     path('groups/<int:group_id>/', views.get_group_details, name='get_group_details'),
@@ -43,10 +45,12 @@ urlpatterns = [
     path('groups/<int:group_id>/students/mark_payment/', views.mark_payment, name='mark_payment'),
     path('groups/<int:group_id>/students/unmark_payment/', views.unmark_payment, name='unmark_payment'),
     path('groups/<int:group_id>/students/mark_attendance_and_payment/', views.mark_attendance_and_payment, name='mark_attendance_and_payment'),
+    path('groups/attendance_sheet/', views.mark_attendance_sheet, name='mark_attendance_sheet'),
     # Student endpoints
     path('students/can_create/', views.can_create_student, name='can_create_student'),
     path('students/', views.get_students, name='get_students'),
     path('students/create/', views.create_student, name='create_student'),
+    path('students/import/', views.import_students, name='import_students'),
     path('students/delete/', views.delete_students, name='delete_students'),
     path('students/<int:student_id>/', views.get_student_details, name='get_student_details'),
     path('students/<int:student_id>/edit/', views.edit_student, name='edit_student'),
@@ -68,5 +72,19 @@ urlpatterns = [
     path('account/update/', views.update_account_info, name='update_account_info'),
     path('account/change_password/', views.change_password, name='change_password'),
 
+    # Background jobs endpoints
+    path('jobs/<int:job_id>/', views.get_job_status, name='teacher_get_job_status'),
+
+    # Monthly statements endpoints (month : YYYY-MM)
+    path('statements/<str:month>/', views.get_monthly_statement, name='get_monthly_statement'),
+    path('statements/<str:month>/generate/', views.generate_monthly_statement, name='generate_monthly_statement'),
+    path('statements/<str:month>/csv/', views.export_monthly_statement_csv, name='export_monthly_statement_csv'),
+    path('statements/<str:month>/pdf/', views.export_monthly_statement_pdf, name='export_monthly_statement_pdf'),
+
+    # CSV exports endpoints (?from=YYYY-MM-DD&to=YYYY-MM-DD, ?include_archived=true for the groups and the classes)
+    path('exports/students/', views.export_students_csv, name='export_students_csv'),
+    path('exports/groups/', views.export_groups_csv, name='export_groups_csv'),
+    path('exports/classes/', views.export_classes_csv, name='export_classes_csv'),
+
 ]
 
@@ -1,10 +1,12 @@
 from .dashboard_views import get_dashboard_data
-from .week_schedule_views import get_week_schedule, update_group_schedule
+from .week_schedule_views import get_week_schedule, aget_week_schedule, update_group_schedule
 from .notifications_views import (
     get_unread_notifications_count,
+    aget_unread_notifications_count,
     mark_notifications_as_read,
     get_notifications,
     get_new_notifications,
+    aget_new_notifications,
     mark_a_notification_as_read,
     student_request_accept_form_data,
     accept_student_request,
@@ -15,20 +17,22 @@ from .notifications_views import (
 )
 
 from .groups_views import (
-    can_create_group, get_groups, 
+    can_create_group, get_free_slots, get_groups, 
     create_group, delete_groups, 
     get_group_details, edit_group, get_group_students,
     create_group_student,get_the_possible_students_for_a_group,add_students_to_group,remove_students_from_group,
     mark_attendance, unmark_attendance,
     mark_absence, unmark_absence,
     mark_payment, unmark_payment,
-    mark_attendance_and_payment
+    mark_attendance_and_payment,
+    mark_attendance_sheet
 )
 
 from .students_views import (
     can_create_student,
     get_students,
     create_student,
+    import_students,
     delete_students,
     get_student_details,
     edit_student,
@@ -51,4 +55,19 @@ from .account_views import (
     get_account_info,
     update_account_info,
     change_password
-)
\ No newline at end of file
+)
+
+from .jobs_views import get_job_status
+
+from .statements_views import (
+    get_monthly_statement,
+    generate_monthly_statement,
+    export_monthly_statement_csv,
+    export_monthly_statement_pdf
+)
+
+from .exports_views import (
+    export_students_csv,
+    export_groups_csv,
+    export_classes_csv
+)
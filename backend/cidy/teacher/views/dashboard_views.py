@@ -1,9 +1,12 @@
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from ..models import Class, Group, GroupEnrollment, TeacherSubject
+from ..models import ArchivedClass, Class, Group, GroupEnrollment, TeacherSubject
 from student.models import Student
 from datetime import datetime, timedelta,date 
+from common.routers import read_from_replica
+from ..archive import school_year_start
+from ..statements import day_start
 
 
 def get_date_range(range_preset):
@@ -23,8 +26,27 @@ def get_date_range(range_preset):
 
     return start_date, end_date
 
+
+def paid_classes_count(group_enrollment, start_date=None, end_date=None):
+    """The number of classes of the enrollment paid in the date range (all of them without a range).
+
+    The paid classes of the closed school years may have been archived (see
+    teacher/archive.py), so the ranges starting before the current school year
+    (this year from January 1, all time) count the archive too.
+    """
+    in_closed_year = start_date is None or day_start(start_date) < day_start(school_year_start())
+    count = 0
+    for model in (Class, ArchivedClass) if in_closed_year else (Class,):
+        paid_classes = model.objects.filter(group_enrollment=group_enrollment, status='attended_and_paid')
+        if start_date and end_date:
+            paid_classes = paid_classes.filter(
+                paid_at__gte=day_start(start_date), paid_at__lt=day_start(end_date + timedelta(days=1)))
+        count += paid_classes.count()
+    return count
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@read_from_replica
 def get_dashboard_data(request):
 
     teacher = request.user.teacher
@@ -113,10 +135,8 @@ def get_dashboard_data(request):
         print(f"{teacher_subject_group_enrollments.count()} group enrollments for teacher subject id : {teacher_subject.id}")
         for teacher_subject_group_enrollment in teacher_subject_group_enrollments:
             
-            paid_classes_of_teacher_subject = Class.objects.filter(
-                group_enrollment=teacher_subject_group_enrollment,
-                status='attended_and_paid'
-            )
+            # the archived classes are all settled, they only count in the paid amounts
+            paid_classes_count_of_teacher_subject = paid_classes_count(teacher_subject_group_enrollment, start_date, end_date)
 
             unpaid_classes_of_teacher_subject = Class.objects.filter(
                 group_enrollment=teacher_subject_group_enrollment,
@@ -125,17 +145,14 @@ def get_dashboard_data(request):
 
             
             if start_date and end_date:
-                paid_classes_of_teacher_subject = paid_classes_of_teacher_subject.filter(
-                    paid_at__date__gte=start_date, paid_at__date__lte=end_date)
-                
                 unpaid_classes_of_teacher_subject = unpaid_classes_of_teacher_subject.filter(
                     attendance_date__gte=start_date, attendance_date__lte=end_date)
             else : 
                 print("No date filtering for paid and unpaid classes")
 
-            print(f"paid and unpaid classes sum : {paid_classes_of_teacher_subject.count() + unpaid_classes_of_teacher_subject.count()} for enrollment id : {teacher_subject_group_enrollment.id}")
+            print(f"paid and unpaid classes sum : {paid_classes_count_of_teacher_subject + unpaid_classes_of_teacher_subject.count()} for enrollment id : {teacher_subject_group_enrollment.id}")
 
-            paid_amount += paid_classes_of_teacher_subject.count() * class_price
+            paid_amount += paid_classes_count_of_teacher_subject * class_price
             unpaid_amount += unpaid_classes_of_teacher_subject.count() * class_price
             print(f"paid amount : {paid_amount} , unpaid amount : {unpaid_amount} for teacher subject: {teacher_subject.level.name} {teacher_subject.level.section} - {teacher_subject.subject.name}")
 
@@ -0,0 +1,37 @@
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from common.exports import csv_response
+from .. import exports
+from ..archive import wants_archived
+
+
+def export_response(request, name, **options):
+    """Stream the export of the teacher as CSV, filtered by the ?from=YYYY-MM-DD&to=YYYY-MM-DD range (both optional)"""
+    try:
+        date_from, date_to = exports.parse_date_range(request.GET)
+    except ValueError:
+        return Response({'error': 'Invalid date range, expected from=YYYY-MM-DD&to=YYYY-MM-DD'}, status=400)
+    header, rows = exports.EXPORTS[name]
+    return csv_response(f'{name}.csv', header, rows(request.user.teacher, date_from, date_to, **options))
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_students_csv(request):
+    """Download the students of the teacher with their balances (filtered by their enrollment date)"""
+    return export_response(request, 'students')
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_groups_csv(request):
+    """Download the groups of the teacher with their totals (the classes counted over the date range, ?include_archived=true to count the archived classes)"""
+    return export_response(request, 'groups', include_archived=wants_archived(request))
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_classes_csv(request):
+    """Download the history of the classes of the groups of the teacher (filtered by the date of the class, ?include_archived=true to add the archived classes)"""
+    return export_response(request, 'classes', include_archived=wants_archived(request))
@@ -3,7 +3,8 @@ from tokenize import group
 from django.utils import timezone
 import time 
 from django.core.paginator import Paginator
-from django.db.models import Q
+from django.db.models import Q, Sum, Value, DecimalField
+from django.db.models.functions import Coalesce
 
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
@@ -11,13 +12,25 @@ from rest_framework.response import Response
 from rest_framework import status
 from student.models import Student, StudentNotification, StudentUnreadNotification
 from parent.models import ParentNotification,Son 
-from common.tools import increment_student_unread_notifications, increment_parent_unread_notifications
+from common.tools import (increment_student_unread_notifications, increment_parent_unread_notifications,
+                          bulk_notify_students_and_parents)
+from common.notifications import teacher_params
 
 from ..models import Group, TeacherSubject,GroupEnrollment,Class,TeacherEnrollment
+from .. import attendance, enrollments
+from ..schedule import WEEK_DAYS
+from ..timetable import get_timetable
+from common.search import search
+from common.routers import read_from_replica
 from django.http import HttpResponseServerError
 from ..serializers import (GroupCreateStudentSerializer,GroupStudentListSerializer,StudentsWithOverlappingClasses,
                            GroupListSerializer, TeacherLevelsSectionsSubjectsHierarchySerializer,
-                           GroupCreateUpdateSerializer,GroupDetailsSerializer,GroupPossibleStudentListSerializer)
+                           GroupCreateUpdateSerializer,GroupDetailsSerializer,GroupPossibleStudentListSerializer,
+                           GroupListProjection,GroupStudentListProjection,GroupPossibleStudentListProjection)
+
+# the hours of the day the free slots are proposed in by default
+FREE_SLOTS_DAY_START = '08:00'
+FREE_SLOTS_DAY_END = '20:00'
 
 
 @api_view(['GET'])
@@ -42,6 +55,34 @@ def can_create_group(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+def get_free_slots(request):
+    """Propose the free slots of the week for a new group (?duration= in minutes, ?day_start=, ?day_end=, ?week_days=)"""
+    teacher = request.user.teacher
+    try:
+        duration = int(request.GET.get('duration', 60))
+        day_start = datetime.strptime(request.GET.get('day_start', FREE_SLOTS_DAY_START), '%H:%M').time()
+        day_end = datetime.strptime(request.GET.get('day_end', FREE_SLOTS_DAY_END), '%H:%M').time()
+    except ValueError:
+        return Response({'error': 'Invalid duration or day bounds'}, status=400)
+    week_days = request.GET.get('week_days')
+    week_days = week_days.split(',') if week_days else WEEK_DAYS
+    if duration <= 0 or day_start >= day_end or any(week_day not in WEEK_DAYS for week_day in week_days):
+        return Response({'error': 'Invalid duration, day bounds or week days'}, status=400)
+
+    timetable = get_timetable(teacher.id)
+    free_slots = {
+        week_day: [
+            {'start_time': start.strftime('%H:%M'), 'end_time': end.strftime('%H:%M')}
+            for start, end in timetable.free_slots(week_day, day_start, day_end, duration)
+        ]
+        for week_day in week_days
+    }
+    return Response({'duration': duration, 'free_slots': free_slots})
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@read_from_replica
 def get_groups(request):
     #time.sleep(1)
     #return HttpResponseServerError("An unexpected error occurred.")
@@ -64,7 +105,7 @@ def get_groups(request):
     # Apply search filter
     search_term = request.GET.get('name', '')
     if search_term:
-        groups = groups.filter(name__icontains=search_term)
+        groups = search(groups, search_term)
     
     # Apply level filter
     level = request.GET.get('level')
@@ -117,6 +158,9 @@ def get_groups(request):
             groups = groups.order_by('-total_unpaid')
         elif sort_by == 'unpaid_amount_asc':
             groups = groups.order_by('total_unpaid')
+    elif search_term :
+        # the best matches of the search first
+        groups = groups.order_by('-search_rank','-teacher_subject__level__order','name')
     else : 
         # default sorting by level order descending
         groups = groups.order_by('-teacher_subject__level__order','name')
@@ -135,13 +179,13 @@ def get_groups(request):
         paginated_groups = paginator.page(paginator.num_pages)
         page = paginator.num_pages
     """
-    serializer = GroupListSerializer(groups, many=True)
+    groups_data = GroupListProjection.data(groups)
 
     
     response = {
         'has_groups': True,
         'groups_total_count': groups.count(),
-        'groups': serializer.data,
+        'groups': groups_data,
         'teacher_levels_sections_subjects_hierarchy': teacher_levels_sections_subjects_hierarchy.data
     }
     #print(response)
@@ -188,38 +232,29 @@ def delete_groups(request):
         return Response({'error': 'No groups selected'}, status=400)
     
     # Get the groups to delete
-    groups = Group.objects.filter(teacher=teacher, id__in=group_ids)
+    groups = Group.objects.filter(teacher=teacher, id__in=enrollments.clean_ids(group_ids)).select_related('teacher_subject__subject')
     
-    student_teacher_pronoun = "Votre professeur" if teacher.gender == "M" else "Votre professeure"
-    parent_teacher_pronoun = "Le professeur" if teacher.gender == "M" else "La professeure"
     for group in groups:
-        students = group.students.all()
-        for student in students:
-            # send a notification to each student with an independant account
-            if student.user :
-                student_message = f"{student_teacher_pronoun} {teacher.fullname} a supprimé le groupe {group.teacher_subject.subject.name} dans lequel vous étiez inscrit."
-                StudentNotification.objects.create(
-                    student = student,
-                    image = teacher.image,
-                    message = student_message)
-                increment_student_unread_notifications(student)
-            # send a notification to the parent of the sons attached to each student belongs to the group
-            for son in Son.objects.filter(student_teacher_enrollments__student=student).all() : 
-                child_pronoun = "votre fils" if student.gender == "M" else "votre fille"
-                parent_message = f"{parent_teacher_pronoun} {teacher.fullname} a supprimé le groupe du {group.teacher_subject.subject.name} dans lequel {child_pronoun} {son.fullname} était inscrit."
+        # send a notification to each student with an independant account
+        # and to the parent of the sons attached to each student belongs to the group
+        bulk_notify_students_and_parents(
+            group.enrolled_students(),
+            teacher.image,
+            'student_group_deleted',
+            'parent_group_deleted',
+            teacher_params(teacher, group.teacher_subject.subject.name)
+        )
 
-                ParentNotification.objects.create(
-                    parent=son.parent,
-                    image=son.image,
-                    message=parent_message,
-                    meta_data = {"son_id":son.id}
-                )
-                increment_parent_unread_notifications(son.parent)
-        group.delete()    
+    # hide all of the groups (and their enrollments and classes) at once,
+    # the rows are purged in the background by the returned job
+    outcomes, job = enrollments.delete_groups(teacher, group_ids, owner=request.user)
+    deleted_groups_count = sum(1 for outcome in outcomes.values() if outcome == enrollments.DELETED)
     
     return Response({
         'success': True,
-        'message': f'{len(groups)} groups deleted successfully'
+        'message': f'{deleted_groups_count} groups deleted successfully',
+        'outcomes': outcomes,
+        'job_id': job.id if job else None
     })
 
 
@@ -301,6 +336,7 @@ def edit_group(request, group_id):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@read_from_replica
 def get_group_students(request,group_id):
     """
     Get all students of the teacher with filtering options
@@ -312,18 +348,29 @@ def get_group_students(request,group_id):
     except Group.DoesNotExist:
         return Response({'error': 'Group not found'}, status=404)
 
-    # Get students associated with this group
-    students = group.students.all()
+    # Get students associated with this group with their paid and unpaid amounts in the group
+    students = group.enrolled_students().annotate(
+        paid_amount=Coalesce(
+            Sum('groupenrollment__paid_amount', filter=Q(groupenrollment__group=group)),
+            Value(0),
+            output_field=DecimalField()
+        ),
+        unpaid_amount=Coalesce(
+            Sum('groupenrollment__unpaid_amount', filter=Q(groupenrollment__group=group)),
+            Value(0),
+            output_field=DecimalField()
+        )
+    )
 
     # Apply fullname filter
     fullname = request.GET.get('fullname', '')
     if fullname:
-        students = students.filter(fullname__icontains=fullname)
+        students = search(students, fullname)
     
 
     page = request.GET.get('page', 1)
     page_size = request.GET.get('page_size', 30)
-    paginator = Paginator(students, page_size)
+    paginator = Paginator(GroupStudentListProjection.values(students), page_size)
     
     try:
         paginated_students = paginator.page(page)
@@ -332,10 +379,10 @@ def get_group_students(request,group_id):
         page = paginator.num_pages
         paginated_students = paginator.page(paginator.num_pages)
     
-    serializer = GroupStudentListSerializer(paginated_students,many=True)
+    students_data = GroupStudentListProjection.build(paginated_students)
     
     return Response({
-        'students': serializer.data,
+        'students': students_data,
         'total_students': paginator.count,
         'page':page
     })
@@ -377,6 +424,7 @@ def create_group_student(request, group_id):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@read_from_replica
 def get_the_possible_students_for_a_group(request,group_id):
     teacher = request.user.teacher
     try:
@@ -389,16 +437,16 @@ def get_the_possible_students_for_a_group(request,group_id):
     student_qs = Student.objects.filter(teacherenrollment__teacher=teacher,level=teacher_subject.level)
 
     # Exclude students already in the group
-    student_qs = student_qs.exclude(groups=group)
+    student_qs = student_qs.exclude(id__in=GroupEnrollment.objects.filter(group=group).values('student_id'))
    
     # Apply fullname filter
     fullname = request.GET.get('fullname', '')
     if fullname:
-        student_qs = student_qs.filter(fullname__icontains=fullname)
+        student_qs = search(student_qs, fullname)
 
     page = request.GET.get('page', 1)
     page_size = request.GET.get('page_size', 30)
-    paginator = Paginator(student_qs, page_size)
+    paginator = Paginator(GroupPossibleStudentListProjection.values(student_qs), page_size)
 
     try:
         paginated_students = paginator.page(page)
@@ -407,10 +455,9 @@ def get_the_possible_students_for_a_group(request,group_id):
         page = 1
         paginated_students = paginator.page(1)
     
-    serializer = GroupPossibleStudentListSerializer(paginated_students,many=True)
-    print(serializer.data)
+    students_data = GroupPossibleStudentListProjection.build(paginated_students)
     return Response({
-        'students': serializer.data,
+        'students': students_data,
         'total_students': paginator.count,
         'page': int(page)
     })
@@ -428,39 +475,26 @@ def add_students_to_group(request,group_id):
     except Group.DoesNotExist:
         return Response({'error': 'Group not found'}, status=404)
     
-    student_teacher_pronoun = "Votre professeur" if teacher.gender == "M" else "Votre professeure"
-    parent_teacher_pronoun = "Le professeur" if teacher.gender == "M" else "La professeure"
-    # add the students to the group 
-    students_qs = Student.objects.filter(id__in=student_ids, teacherenrollment__teacher=teacher)
-    for student in students_qs :
-        # enroll the student in the group 
-        GroupEnrollment.objects.create(group=group, student=student)
-        # Create notification for each student that has an independant account
-        if student.user : 
-            student_message = f"{student_teacher_pronoun} {teacher.fullname} a ajouté vous à un groupe de {group.teacher_subject.subject.name}."
-            StudentNotification.objects.create(
-                student=student,
-                image=teacher.image,
-                message=student_message,
-                meta_data = {'group_id': group.id}
-            )
-            increment_student_unread_notifications(student)
-        # If student has parents, notify them too
-        child_pronoun = "votre fils" if student.gender == "M" else "votre fille"
-        for son in Son.objects.filter(student_teacher_enrollments__student=student).all() :
-            # Assuming `son` has an attribute `gender` that can be 'male' or 'female'
-            parent_message = f"{parent_teacher_pronoun} {teacher.fullname} a ajouté {child_pronoun} {son.fullname} à un groupe de {group.teacher_subject.subject.name}."
-            ParentNotification.objects.create(
-                parent=son.parent,
-                image=son.image,
-                message=parent_message,
-                meta_data = {"son_id":son.id,'group_id':group.id}
-            )
-            increment_parent_unread_notifications(son.parent)
+    # enroll all of the students in the group with a single insert
+    outcomes, enrolled_students = enrollments.enroll_students_in_group(group, student_ids)
+
+    # Create notification for each student that has an independant account
+    # and for the parents of the sons attached to them
+    bulk_notify_students_and_parents(
+        enrolled_students,
+        teacher.image,
+        'student_added_to_group',
+        'parent_added_to_group',
+        teacher_params(teacher, group.teacher_subject.subject.name),
+        student_meta_data={'group_id': group.id},
+        build_parent_meta_data=lambda student, son: {"son_id": son.id, 'group_id': group.id}
+    )
 
     return Response({
         'success': True,
-        'message': 'Students added to the group successfully'
+        'message': 'Students added to the group successfully',
+        'students_added_count': len(enrolled_students),
+        'outcomes': outcomes
     })
 
 
@@ -480,42 +514,24 @@ def remove_students_from_group(request, group_id):
     if not student_ids:
         return Response({'error': 'No student IDs provided'}, status=400)
 
-    students_to_remove = group.students.filter(id__in=student_ids)
-    if not students_to_remove.exists():
+    # Remove the students from the group with a single delete
+    outcomes, removed_students = enrollments.unenroll_students_from_group(group, student_ids)
+    if not removed_students:
         return Response({'error': 'No matching students found in the group'}, status=404)
 
-    student_teacher_pronoun = "Votre professeur" if teacher.gender == "M" else "Votre professeure"
-    parent_teacher_pronoun = "Le professeur" if teacher.gender == "M" else "La professeure"
-
-    for student in students_to_remove:
-        # Notify the student if they have an independent account
-        if student.user:
-            student_message = f"{student_teacher_pronoun} {teacher.fullname} vous a retiré du groupe de {group.teacher_subject.subject.name}."
-            StudentNotification.objects.create(
-                student=student,
-                image=teacher.image,
-                message=student_message
-            )
-            increment_student_unread_notifications(student)
-
-        # Notify the parents of the student
-        child_pronoun = "votre fils" if student.gender == "M" else "votre fille"
-        for son in Son.objects.filter(student_teacher_enrollments__student=student).all():
-            parent_message = f"{parent_teacher_pronoun} {teacher.fullname} a retiré {child_pronoun} {son.fullname} du groupe de {group.teacher_subject.subject.name}."
-            ParentNotification.objects.create(
-                parent=son.parent,
-                image=son.image,
-                message=parent_message,
-                meta_data={"son_id": son.id}
-            )
-            increment_parent_unread_notifications(son.parent)
-
-        # Remove the student from the group
-        group.students.remove(student)
+    # Notify the students that have an independent account and the parents of the students
+    bulk_notify_students_and_parents(
+        removed_students,
+        teacher.image,
+        'student_removed_from_group',
+        'parent_removed_from_group',
+        teacher_params(teacher, group.teacher_subject.subject.name)
+    )
 
     return Response({
         'success': True,
-        'message': f'{students_to_remove.count()} students removed from the group successfully'
+        'message': f'{len(removed_students)} students removed from the group successfully',
+        'outcomes': outcomes
     })
 
 @api_view(['PUT'])
@@ -553,7 +569,7 @@ def mark_attendance(request, group_id):
         return Response({'error': 'Group not found'}, status=404)
 
     # check if these students are enrolled in the group of the teacher
-    students = group.students.filter(id__in=student_ids, teacherenrollment__teacher=teacher)
+    students = group.enrolled_students().filter(id__in=student_ids, teacherenrollment__teacher=teacher)
     if not students.exists():
         return Response({'error': 'No students found in the group'}, status=404)
 
@@ -569,7 +585,7 @@ def mark_attendance(request, group_id):
         student_group_enrollment = GroupEnrollment.objects.get(student=student, group=group)
         old_unpaid_amount = student_group_enrollment.unpaid_amount
         # across all the classes of this student with this teacher, check if the attendance date and time overlaps with another class
-        overlapping_classes = Class.objects.filter(
+        overlapping_classes = Class.objects.of_active_enrollments().filter(
             group_enrollment__student=student,
             group_enrollment__group__teacher=teacher
         ).filter(
@@ -705,7 +721,7 @@ def unmark_attendance(request, group_id):
     if not num_classes_to_unmark or not isinstance(num_classes_to_unmark, int) or num_classes_to_unmark < 1:
         return Response({'error': 'Invalid number of classes to unmark'}, status=400)
 
-    students = group.students.filter(id__in=student_ids)
+    students = group.enrolled_students().filter(id__in=student_ids)
     student_teacher_pronoun = "Votre professeur" if teacher.gender == "M" else "Votre professeure"
     parent_teacher_pronoun = "Le professeur" if teacher.gender == "M" else "La professeure"
 
@@ -1050,7 +1066,7 @@ def mark_payment(request, group_id):
 
     payment_datetime = datetime.strptime(payment_datetime, "%H:%M:%S-%d/%m/%Y")
 
-    students = group.students.filter(id__in=student_ids)
+    students = group.enrolled_students().filter(id__in=student_ids)
     student_teacher_pronoun = "Votre professeur" if teacher.gender == "M" else "Votre professeure"
     parent_teacher_pronoun = "Le professeur" if teacher.gender == "M" else "La professeure"
 
@@ -1388,7 +1404,7 @@ def mark_attendance_and_payment(request,group_id):
         return Response({'error': 'Group not found'}, status=404)
 
     # check if these students are enrolled in the group of the teacher
-    students = group.students.filter(id__in=student_ids, teacherenrollment__teacher=teacher)
+    students = group.enrolled_students().filter(id__in=student_ids, teacherenrollment__teacher=teacher)
     if not students.exists():
         return Response({'error': 'No students found in the group'}, status=404)
 
@@ -1402,7 +1418,7 @@ def mark_attendance_and_payment(request,group_id):
     for student in students:
 
         # across all the classes of this student with this teacher, check if the attendance date and time overlaps with another class
-        overlapping_classes = Class.objects.filter(
+        overlapping_classes = Class.objects.of_active_enrollments().filter(
             group_enrollment__student=student,
             group_enrollment__group__teacher=teacher
         ).filter(
@@ -1594,4 +1610,18 @@ def mark_attendance_and_payment(request,group_id):
             group.save()
                 
 
-"""
\ No newline at end of file
+"""
+
+@api_view(['PUT'])
+@permission_classes([IsAuthenticated])
+def mark_attendance_sheet(request):
+    """Mark the attendances, absences and payments of several groups and dates at once (see teacher/attendance.py)"""
+    try:
+        results = attendance.mark_attendance_sheet(request.user.teacher, request.data.get('entries'))
+    except ValueError as error:
+        return Response({'error': str(error)}, status=400)
+    return Response({
+        'success': True,
+        'marked_count': sum(1 for result in results if result['status'] == attendance.MARKED),
+        'results': results,
+    })
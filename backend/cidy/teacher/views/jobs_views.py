@@ -0,0 +1,23 @@
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from common.models import Job
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_job_status(request, job_id):
+    """Get the progress of a background job (like the purge of deleted groups) of the teacher"""
+    try:
+        job = Job.objects.get(id=job_id, owner=request.user)
+    except Job.DoesNotExist:
+        return Response({'error': 'Job not found'}, status=404)
+
+    return Response({
+        'id': job.id,
+        'kind': job.kind,
+        'status': job.status,
+        'processed': job.processed,
+        'total': job.total,
+        'progress': job.progress,
+    })
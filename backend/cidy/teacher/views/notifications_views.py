@@ -9,16 +9,28 @@ from teacher.models import Group,GroupEnrollment,TeacherEnrollment
 from common.tools import increment_student_unread_notifications, increment_parent_unread_notifications
 
 from ..models import TeacherNotification,TeacherUnreadNotification
-from ..serializers import TeacherNotificationSerializer,StudentListToReplaceBySerializer
+from ..serializers import TeacherNotificationProjection,StudentListToReplaceBySerializer
+from common.routers import read_from_replica
+from common.async_views import async_api_view, json_response
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@read_from_replica
 def get_unread_notifications_count(request):
     teacher = request.user.teacher
     teacher_unread_notifications = TeacherUnreadNotification.objects.get(teacher=teacher)
     return Response({'unread_count': teacher_unread_notifications.unread_notifications})
 
+
+@async_api_view
+@read_from_replica
+async def aget_unread_notifications_count(request):
+    """Async variant of get_unread_notifications_count (ASGI)"""
+    teacher = request.user.teacher
+    teacher_unread_notifications = await TeacherUnreadNotification.objects.aget(teacher=teacher)
+    return json_response({'unread_count': teacher_unread_notifications.unread_notifications})
+
 # this will be used to mark the notifications as read after leaving the notification screen
 # starting from the last notification ID loaded in the screen and going backward 
 @api_view(['PUT'])
@@ -40,6 +52,7 @@ def mark_notifications_as_read(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@read_from_replica
 def get_notifications(request):
     """Get paginated notifications for the teacher"""
     teacher = request.user.teacher
@@ -55,8 +68,8 @@ def get_notifications(request):
     notifications = TeacherNotification.objects.filter(teacher=teacher
                                                       ).exclude(id__gte=int(start_from_notification_id)
                                                       ).order_by('-id')
-    # Paginate results
-    paginator = Paginator(notifications, 30)
+    # Paginate results (the rows are read with values() and built as dicts by the projection)
+    paginator = Paginator(TeacherNotificationProjection.values(notifications), 30)
     try:
         paginated_notifications = paginator.page(page)
     except Exception:
@@ -65,10 +78,10 @@ def get_notifications(request):
         page = paginator.num_pages
 
     # Serialize the data
-    serializer = TeacherNotificationSerializer(paginated_notifications, many=True)
+    notifications_data = TeacherNotificationProjection.build(paginated_notifications)
     
     return Response({
-        'notifications': serializer.data,
+        'notifications': notifications_data,
         'unread_count': teacher.teacherunreadnotifications.unread_notifications,
         'total_count': paginator.count,
         'total_pages': paginator.num_pages,
@@ -79,6 +92,7 @@ def get_notifications(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@read_from_replica
 def get_new_notifications(request):
     """Get new notifications for the teacher"""
     teacher = request.user.teacher
@@ -94,10 +108,27 @@ def get_new_notifications(request):
 
 
     # Serialize the data
-    serializer = TeacherNotificationSerializer(notifications, many=True)
+    notifications_data = TeacherNotificationProjection.data(notifications)
     
     return Response({
-        'new_notifications': serializer.data,
+        'new_notifications': notifications_data,
+    })
+
+
+@async_api_view
+@read_from_replica
+async def aget_new_notifications(request):
+    """Async variant of get_new_notifications (ASGI)"""
+    teacher = request.user.teacher
+
+    start_from_notification_id = request.GET.get('start_from_notification_id')
+    if not start_from_notification_id or not start_from_notification_id.isdigit():
+        return json_response({'status': 'error', 'message': 'Invalid start_from_notification_id'}, status=400)
+
+    notifications = TeacherNotification.objects.filter(teacher=teacher, id__gte=int(start_from_notification_id)).order_by('-id')
+
+    return json_response({
+        'new_notifications': await TeacherNotificationProjection.adata(notifications),
     })
 
 
@@ -0,0 +1,72 @@
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from common.exports import csv_response, pdf_response
+from .. import statements
+from ..serializers import MonthlyStatementSerializer
+
+
+def parse_requested_month(month):
+    """The first day of the month (YYYY-MM) of the url, None if the month is invalid"""
+    try:
+        return statements.parse_month(month)
+    except ValueError:
+        return None
+
+
+def not_found(month):
+    return Response({'error': f'No statement generated for {month:%Y-%m}'}, status=404)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_monthly_statement(request, month):
+    """Get the stored statement of the month of the students of the teacher (404 until it's generated)"""
+    month = parse_requested_month(month)
+    if month is None:
+        return Response({'error': 'Invalid month, expected YYYY-MM'}, status=400)
+    statement = statements.get_statement(request.user.teacher, month)
+    if statement is None:
+        return not_found(month)
+    return Response(MonthlyStatementSerializer(statement).data)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def generate_monthly_statement(request, month):
+    """Generate (or regenerate) the statement of the month of the students of the teacher"""
+    month = parse_requested_month(month)
+    if month is None:
+        return Response({'error': 'Invalid month, expected YYYY-MM'}, status=400)
+    statement = statements.generate_statement(request.user.teacher, month)
+    return Response(MonthlyStatementSerializer(statement).data)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_monthly_statement_csv(request, month):
+    """Download the stored statement of the month as CSV"""
+    month = parse_requested_month(month)
+    if month is None:
+        return Response({'error': 'Invalid month, expected YYYY-MM'}, status=400)
+    statement = statements.get_statement(request.user.teacher, month)
+    if statement is None:
+        return not_found(month)
+    header = [field for field, _label, _width in statements.DOCUMENT_COLUMNS]
+    return csv_response(f'statement-{statement.month:%Y-%m}.csv', header, statements.document_rows(statement))
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_monthly_statement_pdf(request, month):
+    """Download the stored statement of the month as PDF"""
+    month = parse_requested_month(month)
+    if month is None:
+        return Response({'error': 'Invalid month, expected YYYY-MM'}, status=400)
+    statement = statements.get_statement(request.user.teacher, month)
+    if statement is None:
+        return not_found(month)
+    return pdf_response(
+        f'statement-{statement.month:%Y-%m}.pdf', statements.document_title(statement), statements.pdf_columns(),
+        statements.document_rows(statement)
+    )
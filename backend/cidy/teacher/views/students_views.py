@@ -1,3 +1,4 @@
+import codecs
 from datetime import datetime
 import time
 from rest_framework.permissions import IsAuthenticated
@@ -6,15 +7,20 @@ from rest_framework.response import Response
 from django.db.models import Q, Sum
 from django.core.paginator import Paginator
 from ..models import Group, GroupEnrollment, TeacherSubject,TeacherEnrollment,Class
+from .. import enrollments, imports
+from common.tools import bulk_notify_students_and_parents
+from common.search import search
 from student.models import Student, StudentNotification, StudentUnreadNotification
 from parent.models import ParentNotification, ParentUnreadNotification, Son
 from ..serializers import (TeacherLevelsSectionsSubjectsHierarchySerializer,
                            TeacherStudentListSerializer,
+                           TeacherStudentListProjection,
                            TeacherStudentCreateSerializer,
                            TeacherStudentDetailSerializer,
                            TeacherStudentUpdateSerializer,)
 from rest_framework import serializers
 from django.http import HttpResponseServerError
+from common.routers import read_from_replica
 
 
 def increment_student_unread_notifications(student):
@@ -51,6 +57,7 @@ def can_create_student(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@read_from_replica
 def get_students(request):
     #time.sleep(5)
     """Get a filtered list of students for the teacher"""
@@ -60,7 +67,7 @@ def get_students(request):
     # Apply fullname filter
     fullname = request.GET.get('fullname', '')
     if fullname:
-        students = students.filter(fullname__icontains=fullname)
+        students = search(students, fullname)
 
     # Apply level filter
     level = request.GET.get('level')
@@ -88,28 +95,30 @@ def get_students(request):
             students = students.order_by('-unpaid_amount')
         elif sort_by == 'unpaid_amount_asc':
             students = students.order_by('unpaid_amount')
+    elif fullname:
+        # the best matches of the search first
+        students = students.order_by('-search_rank', 'id')
     else:
         students = students.order_by('id')
     # Pagination
     page = request.GET.get('page', 1)
     page_size = request.GET.get('page_size', 30)
-    paginator = Paginator(students, page_size)
+    paginator = Paginator(TeacherStudentListProjection.values(students), page_size)
     try:
         paginated_students = paginator.page(page)
     except Exception:
         page = 1
         paginated_students = paginator.page(1)
 
-    # Serialize the students
-    serializer = TeacherStudentListSerializer(paginated_students, many=True, context={'request': request})
+    # Build the payload of the students (read with values()) of the page
+    students_data = TeacherStudentListProjection.build(paginated_students)
 
     # Get teacher levels, sections, and subjects hierarchy for filter options
     teacher_subjects = TeacherSubject.objects.filter(teacher=teacher).select_related('level', 'subject')
     teacher_levels_sections_subjects_hierarchy = TeacherLevelsSectionsSubjectsHierarchySerializer(teacher_subjects)
-    print("============ paid amount type :", type(students[0].paid_amount))
     return Response({
         'total_students': paginator.count,
-        'students': serializer.data,
+        'students': students_data,
         'page': int(page),
         'teacher_levels_sections_subjects_hierarchy': teacher_levels_sections_subjects_hierarchy.data
     })
@@ -135,6 +144,22 @@ def create_student(request):
     print(serializer.errors)
     return Response(serializer.errors, status=400)
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def import_students(request):
+    """Create the students of an uploaded CSV file (and add them to their group), ?dry_run=1 to only validate it"""
+    upload = request.FILES.get('file')
+    if upload is None:
+        return Response({'error': 'No CSV file uploaded'}, status=400)
+
+    dry_run = request.GET.get('dry_run') == '1'
+    try:
+        report = imports.import_students(request.user.teacher, codecs.iterdecode(upload, 'utf-8-sig'), dry_run=dry_run)
+    except imports.StudentsImportError as error:
+        return Response({'error': str(error)}, status=400)
+    return Response(report)
+
+
 @api_view(['DELETE'])
 @permission_classes([IsAuthenticated])
 def delete_students(request):
@@ -150,9 +175,9 @@ def delete_students(request):
             'message': 'No students selected for deletion.'
         }, status=400)
 
-    students = Student.objects.filter(id__in=student_ids, teacherenrollment__teacher=teacher)
+    students = list(Student.objects.filter(id__in=enrollments.clean_ids(student_ids), teacherenrollment__teacher=teacher))
     
-    if not students.exists():
+    if not students:
         return Response({
             'success': False,
             'message': 'Selected students do not exist.'
@@ -161,53 +186,26 @@ def delete_students(request):
     student_teacher_pronoun = "Votre professeur" if teacher.gender == "M" else "Votre professeure"
     parent_teacher_pronoun = "Le professeur" if teacher.gender == "M" else "La professeure"
     
-    print(students)
-    for student in students:
-        print(f"Processing student: {student.fullname}")
-        # Check if the student has his independent account
-        if student.user:
-            print(f"student has a user : {student.fullname}")
-            # send a notification to the student
-            student_message = f"{student_teacher_pronoun} {teacher.fullname} a mis fin à votre relation."
-            StudentNotification.objects.create(
-                student=student,
-                image=teacher.image,
-                message=student_message
-            )
-            increment_student_unread_notifications(student)
-
-        # send a notification to the parent of the sons attached to each student to delete
-       
-        
-        for son in Son.objects.filter(student_teacher_enrollments__student=student).all() : 
-
-            child_pronoun = "votre fils" if son.gender == "M" else "votre fille"
-            parent_message = f"{parent_teacher_pronoun} {teacher.fullname} a mis fin à la relation avec {child_pronoun} {son.fullname}."
-            
-            ParentNotification.objects.create(
-                parent=son.parent,
-                image=son.image,
-                message=parent_message,
-                meta_data = {"son_id":son.id}
-            )
-            increment_parent_unread_notifications(son.parent)
-
-        # notes i made the deletes here to get the sons attached to the student before deleting him or his enrollments
-        if student.user:
-            print(student.user)
-            print(f"student has a user : {student.fullname}")
-            # delete the enrollment with this teacher and the enrollments in the groups of this teacher without deleting the student because he has his independent account
-            TeacherEnrollment.objects.filter(student=student, teacher=teacher).delete()
-            GroupEnrollment.objects.filter(student=student, group__teacher=teacher).delete()
-        else :
-            print(f'Student {student.fullname} deleted.')
-            # delete the student here, because he doesn't have an independent account, 
-            # this will lead to deleting his teacher enrollment and his group enrollments
-            student.delete()
+    # send a notification to the students with an independent account
+    # and to the parent of the sons attached to each student to delete
+    # note : the notifications are sent before the deletes to get the sons attached to the students
+    bulk_notify_students_and_parents(
+        students,
+        teacher.image,
+        lambda student: f"{student_teacher_pronoun} {teacher.fullname} a mis fin à votre relation.",
+        lambda student, son: f"{parent_teacher_pronoun} {teacher.fullname} a mis fin à la relation avec {'votre fils' if son.gender == 'M' else 'votre fille'} {son.fullname}."
+    )
+
+    # delete the enrollments of the students with an independent account with this teacher and hide their
+    # enrollments in his groups, and hide the other students with their group enrollments,
+    # the hidden rows and their classes are purged in the background by the returned job
+    outcomes, job = enrollments.remove_students_from_teacher(teacher, students, owner=request.user)
 
     return Response({
         'success': True,
-        'message': f'{len(student_ids)} students were deleted.'
+        'message': f'{len(students)} students were deleted.',
+        'outcomes': outcomes,
+        'job_id': job.id if job else None
     })
 
 
@@ -7,6 +7,8 @@ from ..models import TeacherSubject, Level, Subject, Group, GroupEnrollment
 from ..serializers import TeacherLevelsSectionsSubjectsHierarchySerializer,TeacherSubjectSerializer,TesLevelsSectionsSubjectsHierarchySerializer,EditTeacherSubjectPriceSerializer
 from student.models import StudentNotification, StudentUnreadNotification
 from parent.models import ParentNotification, ParentUnreadNotification,Son 
+from common.reference_data import get_reference_data
+from .. import enrollments
 import time
 
 
@@ -39,7 +41,7 @@ def get_levels_sections_subjects(request):
     }
 
     if not has_tes:
-        tes_levels_sections_subjects_hierarchy_serializer = TesLevelsSectionsSubjectsHierarchySerializer(Level.objects.all().order_by('order'))
+        tes_levels_sections_subjects_hierarchy_serializer = TesLevelsSectionsSubjectsHierarchySerializer(get_reference_data().levels)
         response['tes_levels_sections_subjects_hierarchy'] = tes_levels_sections_subjects_hierarchy_serializer.data
     
     print(response)
@@ -140,8 +142,9 @@ def delete_level_section_subject(request, teacher_subject_id):
     except TeacherSubject.DoesNotExist:
         return Response({"error": "Teacher subject not found."}, status=status.HTTP_404_NOT_FOUND)
     
-    teacher_subject.delete()
-    return Response({"message": "Teacher subject deleted successfully."}, status=status.HTTP_200_OK)
+    # hide the teacher subject with its groups right away and purge them (with their classes) in the background
+    job = enrollments.delete_teacher_subject(teacher_subject, owner=request.user)
+    return Response({"message": "Teacher subject deleted successfully.", "job_id": job.id}, status=status.HTTP_200_OK)
 
     """
     # Get related groups
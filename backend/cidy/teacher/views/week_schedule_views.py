@@ -1,5 +1,4 @@
 import datetime
-from tracemalloc import start
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
@@ -7,6 +6,8 @@ from ..models import Group
 from student.models import StudentNotification, StudentUnreadNotification
 from parent.models import ParentNotification, ParentUnreadNotification, Son 
 from ..serializers import GroupCreateUpdateSerializer
+from common.async_views import async_api_view, json_response
+from .. import schedule
 
 def increment_student_unread_notifications(student):
     """Helper function to increment student unread notifications count"""
@@ -20,45 +21,39 @@ def increment_parent_unread_notifications(parent):
     unread_obj.unread_notifications += 1
     unread_obj.save()
 
+def parse_week(request):
+    """The day of the requested week (?week=YYYY-MM-DD, any day of the week), None for the current week"""
+    week = request.GET.get('week')
+    if not week:
+        return None
+    return datetime.date.fromisoformat(week)
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_week_schedule(request):
 
     """
-    Get all groups of the teacher with their schedule details for the week schedule screen
+    Get the classes of the groups of the teacher in the week (the current one or ?week=) for the week schedule screen
     """
     teacher = request.user.teacher
-    groups = Group.objects.filter(teacher=teacher)
-    
-    schedule_data = []
-    today = datetime.date.today()
-    for group in groups:
-        teacher_subject = group.teacher_subject
-        level = teacher_subject.level
-        subject = teacher_subject.subject
-        temporary_schedule = False 
-        week_day = group.week_day
-        start_time = group.start_time
-        end_time = group.end_time
-
-        if group.clear_temporary_schedule_at and today < group.clear_temporary_schedule_at : 
-            temporary_schedule = True
-            week_day = group.temporary_week_day
-            start_time = group.temporary_start_time
-            end_time = group.temporary_end_time
-
-        schedule_data.append({
-            'id': group.id,
-            'name': group.name,
-            'level': level.name+(f" {level.section}" if level.section else ""),
-            'subject':  subject.name,
-            'temporary_schedule' : temporary_schedule,
-            'week_day': week_day,
-            'start_time': start_time.strftime("%H:%M"),
-            'end_time': end_time.strftime("%H:%M"),
-        })
-    print(schedule_data)
-    return Response({'groups': schedule_data})
+    try:
+        day = parse_week(request)
+    except ValueError:
+        return Response({'status': 'error', 'message': 'Invalid week'}, status=400)
+
+    return Response({'groups': schedule.get_teacher_week(teacher.id, day)})
+
+
+@async_api_view
+async def aget_week_schedule(request):
+    """Async variant of get_week_schedule (ASGI)"""
+    teacher = request.user.teacher
+    try:
+        day = parse_week(request)
+    except ValueError:
+        return json_response({'status': 'error', 'message': 'Invalid week'}, status=400)
+
+    return json_response({'groups': await schedule.aget_teacher_week(teacher.id, day)})
 
 # review it
 @api_view(['PUT'])
@@ -124,7 +119,7 @@ def update_group_schedule(request, group_id):
     student_teacher_pronoun = "Votre professeur" if teacher.gender == "M" else "Votre professeure"
     parent_teacher_pronoun = "Le professeur" if teacher.gender == "M" else "La professeure"
 
-    for student in group.students.all():
+    for student in group.enrolled_students():
         # Create notification for each student
         student_message = f"{student_teacher_pronoun} {teacher.fullname} a modifié l'horaire du cours de {group.subject.name} à : {group.week_day} de {group.start_time_range} à {group.end_time_range} {'seulement cette semaine' if schedule_change_type == 'temporary' else 'de façon permanente'}."
         StudentNotification.objects.create(